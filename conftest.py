@@ -0,0 +1,11 @@
+"""Shared pytest setup; being at the repository root also puts kmscse on sys.path."""
+import openseespy.opensees as ops
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_domain():
+    """Every test starts from, and leaves behind, an empty OpenSees domain."""
+    ops.wipe()
+    yield
+    ops.wipe()
@@ -0,0 +1 @@
+"""Shared model builders and analysis tools for the kmscse OpenSees examples."""
@@ -0,0 +1,200 @@
+"""Gravity, ground-motion and pushover drivers shared by the kmscse tools.
+
+The analysis settings and the convergence fallbacks (Newton with initial
+tangent, Broyden, NewtonWithLineSearch) are those of the example scripts.
+"""
+import math
+import time as clock
+
+import numpy as np
+import openseespy.opensees as ops
+
+Tol = 1.0e-8
+
+
+def fallbacks(tol=Tol):
+    """(label, test, algorithm) tried in turn when a step does not converge."""
+    return (
+        ("Newton with Initial Tangent", ('NormDispIncr', tol, 1000, 0), ('Newton', '-initial')),
+        ("Broyden", None, ('Broyden', 8)),
+        ("NewtonWithLineSearch", None, ('NewtonLineSearch', 0.8)),
+    )
+
+
+def step(args, test, algorithm, verbose=True, trace=None, size=0.0):
+    """Advance one step, walking the fallback algorithms if it does not converge.
+
+    Returns (ok, name of the algorithm that converged or None, total Newton
+    iterations including those of failed attempts). With a ``trace``
+    (see kmscse.telemetry) the step is also recorded there.
+    """
+    start = clock.perf_counter()
+    ok = ops.analyze(1, *args)
+    lastIter = iterations = ops.testIter()
+    converged = algorithm[0] if ok == 0 else None
+    if ok != 0:
+        for label, fbTest, fbAlgorithm in fallbacks(test[1]):
+            if verbose:
+                print("Trying %s .." % label)
+            if fbTest:
+                ops.test(*fbTest)
+            ops.algorithm(*fbAlgorithm)
+            ok = ops.analyze(1, *args)
+            lastIter = ops.testIter()
+            iterations += lastIter
+            if trace is not None:
+                # the fallback's norms are lost once the original test is restored
+                norms = ops.testNorm()
+            ops.test(*test)
+            ops.algorithm(*algorithm)
+            if ok == 0:
+                converged = label
+                break
+    elif trace is not None:
+        norms = ops.testNorm()
+    if trace is not None:
+        norm = norms[lastIter - 1] if 0 < lastIter <= len(norms) else np.nan
+        trace.record(ops.getTime(), clock.perf_counter() - start, iterations, norm, converged or 'failed', size, ok)
+    return ok, converged, iterations
+
+
+def gravity(PCol, node=2, NstepGravity=10, beamLoads=(), sensitivity=False):
+    """Apply the column weight in load control and hold it constant.
+
+    ``beamLoads`` are (element, w) uniform beam loads, as on the kmscse002
+    portal-frame beam. With ``sensitivity`` the DDM sensitivities of the
+    defined parameters are computed at every step (see kmscse.sensitivity),
+    as they are by the pushover and ground-motion drivers.
+    """
+    def loads(series):
+        ops.timeSeries(series, 1)
+        ops.pattern('Plain', 1, 1)
+        if PCol:
+            ops.load(node, 0, -PCol, 0)
+        for ele, w in beamLoads:
+            ops.eleLoad('-ele', ele, '-type', '-beamUniform', w)
+
+    loads('Linear')
+    ops.constraints('Plain')
+    ops.numberer('Plain')
+    ops.system('BandGeneral')
+    ops.test('NormDispIncr', Tol, 6)
+    ops.algorithm('Newton')
+    ops.integrator('LoadControl', 1.0 / NstepGravity)
+    ops.analysis('Static')
+    if sensitivity:
+        ops.sensitivityAlgorithm('-computeAtEachStep')
+    ok = ops.analyze(NstepGravity)
+    ops.loadConst('-time', 0.0)
+    if sensitivity:
+        # the transient DDM still ramps a loadConst'ed Linear series, so hold the loads with a Constant one
+        ops.remove('loadPattern', 1)
+        ops.remove('timeSeries', 1)
+        loads('Constant')
+    return ok
+
+
+def pushover(Dmax, Dincr, Hload, ctrlNode=2, ctrlDOF=1, baseEle=1, verbose=True, trace=None, recorder=None,
+             loadNodes=None, sensitivity=False):
+    """Displacement-controlled pushover of ``ctrlNode`` to ``Dmax``.
+
+    ``Hload`` is applied at every node of ``loadNodes`` (default ``ctrlNode``).
+    Returns a dict of control displacement, lateral load per node and
+    base-moment histories, the Newton iteration count and the final ``ok``
+    flag. A ``recorder`` (see kmscse.recording) records every converged step.
+    """
+    IDloadTag = 200
+    ops.timeSeries('Linear', IDloadTag)
+    ops.pattern('Plain', IDloadTag, IDloadTag)
+    for node in loadNodes or (ctrlNode,):
+        ops.load(node, Hload, 0.0, 0.0)
+
+    ops.wipeAnalysis()
+    ops.constraints('Plain')
+    ops.numberer('Plain')
+    ops.system('BandGeneral')
+    test = ('EnergyIncr', Tol, 6, 0)
+    algorithm = ('Newton',)
+    ops.test(*test)
+    ops.algorithm(*algorithm)
+    ops.integrator('DisplacementControl', ctrlNode, ctrlDOF, Dincr)
+    ops.analysis('Static')
+    if sensitivity:
+        ops.sensitivityAlgorithm('-computeAtEachStep')
+
+    Nsteps = int(round(Dmax / Dincr))
+    disp = np.zeros(Nsteps)
+    force = np.zeros(Nsteps)
+    moment = np.zeros(Nsteps)
+    ok = 0
+    n = 0
+    iterations = 0
+    while n < Nsteps:
+        ok, _, stepIterations = step((), test, algorithm, verbose, trace, Dincr)
+        iterations += stepIterations
+        if ok != 0:
+            break
+        disp[n] = ops.nodeDisp(ctrlNode, ctrlDOF)
+        force[n] = ops.getLoadFactor(IDloadTag) * Hload
+        moment[n] = ops.eleForce(baseEle, 3)
+        if recorder is not None:
+            recorder.record()
+        n += 1
+    return dict(disp=disp[:n], force=force[:n], baseMoment=moment[:n], iterations=iterations, ok=ok)
+
+
+def ground_motion(accel, dt, GMfact=1.0, TmaxAnalysis=10.0, DtAnalysis=0.01, xDamp=0.02,
+                  GMdirection=1, ctrlNode=2, baseEle=1, verbose=True, trace=None, recorder=None, sensitivity=False,
+                  rayleigh=None):
+    """Run the kmscse004/005 dynamic analysis one step at a time.
+
+    Returns a dict of time, control-node displacement and base-moment histories,
+    the Newton iteration count and the final ``ok`` flag. A ``recorder`` (see
+    kmscse.recording) records every converged step. ``rayleigh`` replaces the
+    scripts' damping by the given (alphaM, betaK, betaKinit, betaKcomm).
+    """
+    ops.wipeAnalysis()
+    ops.constraints('Transformation')
+    ops.numberer('Plain')
+    ops.system('SparseGeneral', '-piv')
+    test = ('EnergyIncr', Tol, 10, 0)
+    # DDM solves with the factorized stiffness, which ModifiedNewton leaves at that of the step start
+    algorithm = ('Newton',) if sensitivity else ('ModifiedNewton',)
+    ops.test(*test)
+    ops.algorithm(*algorithm)
+    ops.integrator('Newmark', 0.5, 0.25)
+    ops.analysis('Transient')
+    if sensitivity:
+        ops.sensitivityAlgorithm('-computeAtEachStep')
+
+    # Rayleigh damping, stiffness proportional to the last-committed stiffness;
+    # the default solver gives the scripts' -fullGenLapack eigenvalue, and
+    # -fullGenLapack drops the first recorder in OpenSeesPy 3.7
+    if rayleigh is None:
+        lambda1 = ops.eigen(1)[0]
+        rayleigh = (0.0, 0.0, 0.0, 2 * xDamp / math.sqrt(lambda1))
+    ops.rayleigh(*rayleigh)
+
+    IDloadTag = 400
+    ops.timeSeries('Path', IDloadTag, '-dt', dt, '-values', *accel, '-factor', GMfact)
+    ops.pattern('UniformExcitation', IDloadTag, GMdirection, '-accel', IDloadTag)
+
+    Nsteps = int(round(TmaxAnalysis / DtAnalysis))
+    time = np.zeros(Nsteps)
+    disp = np.zeros(Nsteps)
+    moment = np.zeros(Nsteps)
+    ok = 0
+    n = 0
+    iterations = 0
+    while n < Nsteps:
+        ok, _, stepIterations = step((DtAnalysis,), test, algorithm, verbose, trace, DtAnalysis)
+        iterations += stepIterations
+        if ok != 0:
+            break
+        time[n] = ops.getTime()
+        disp[n] = ops.nodeDisp(ctrlNode, 1)
+        moment[n] = ops.eleForce(baseEle, 3)
+        if recorder is not None:
+            recorder.record()
+        n += 1
+    return dict(time=time[:n], disp=disp[:n], baseMoment=moment[:n], iterations=iterations, ok=ok)
@@ -0,0 +1,122 @@
+"""Fiber-mesh and integration-point convergence study for the kmscse005 column.
+
+Every (nfY, numIntgrPts) combination is run in a worker process and its
+response compared with a refined reference discretization. nfZ is fixed at 1:
+the fibers of a 2D section only differ in y, so it does not change the
+response. The combinations within the tolerance are then timed one after
+another in this process, so the timings are not skewed by competing
+processes, and the cheapest is recommended.
+
+    python -m kmscse.convergence --nfY 4 8 16 32 --numIntgrPts 3 4 5 7
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import time
+
+import numpy as np
+
+from kmscse import analysis, models, records
+
+REFERENCE = dict(nfY=64, nfZ=1, numIntgrPts=10)
+
+
+def run(p, study, GMfact=1.0):
+    """Build the fiber column with ``p``, run ``study`` and return (response, seconds).
+
+    The pushover goes to the kmscse005 Dmax of 1% drift; the dynamic study runs
+    BM68elc.acc scaled by ``GMfact``.
+    """
+    start = time.perf_counter()
+    models.build_column('fiber', p)
+    analysis.gravity(models.derived(p)['PCol'])
+    if study == 'pushover':
+        result = analysis.pushover(0.01 * p['LCol'], 0.001 * p['LCol'], p['Weight'], verbose=False)
+    else:
+        name, accel, dt = records.read_record(records.DEFAULT_RECORD)
+        result = analysis.ground_motion(accel, dt, GMfact, verbose=False)
+    return result, time.perf_counter() - start
+
+
+def _run(args):
+    return run(*args)
+
+
+def response_error(result, reference, study):
+    """Peak and RMS error of the response history relative to the reference peak."""
+    key = 'force' if study == 'pushover' else 'disp'
+    n = min(len(result[key]), len(reference[key]))
+    if result['ok'] != 0 or n == 0:
+        return np.inf, np.inf
+    diff = result[key][:n] - reference[key][:n]
+    scale = np.abs(reference[key]).max()
+    return float(np.abs(diff).max() / scale), float(np.sqrt(np.mean(diff ** 2)) / scale)
+
+
+def study(nfYs, numIntgrPtss, kind='pushover', GMfact=1.0, numBarsCol=None, processes=None, tolerance=None):
+    """Run the sweep plus the reference and return one row per discretization and the reference's seconds.
+
+    The rows within ``tolerance`` (all if None) are timed serially; the
+    others have NaN seconds.
+    """
+    base = models.params('fiber')
+    if numBarsCol is not None:
+        base['numBarsCol'] = numBarsCol
+    grid = [dict(nfY=y, nfZ=1, numIntgrPts=n) for y, n in itertools.product(nfYs, numIntgrPtss)]
+    tasks = [(dict(base, **mesh), kind, GMfact) for mesh in [REFERENCE] + grid]
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(_run, tasks)
+
+    reference = results[0][0]
+    rows = []
+    for mesh, (result, seconds) in zip(grid, results[1:]):
+        peakError, rmsError = response_error(result, reference, kind)
+        rows.append(dict(mesh, fibers=mesh['nfY'] + 2 * base['numBarsCol'], seconds=np.nan,
+                         peakError=peakError, rmsError=rmsError, ok=result['ok']))
+    # pool timings share the CPUs with the other workers, so the candidates are timed one at a time here
+    referenceSeconds = run(dict(base, **REFERENCE), kind, GMfact)[1]
+    for row, task in zip(rows, tasks[1:]):
+        if tolerance is None or row['peakError'] <= tolerance:
+            row['seconds'] = run(*task)[1]
+    return rows, referenceSeconds
+
+
+def recommend(rows, tolerance):
+    """Cheapest (serially timed) row whose peak error is within ``tolerance``, or None."""
+    good = [r for r in rows if r['peakError'] <= tolerance and not np.isnan(r['seconds'])]
+    return min(good, key=lambda r: r['seconds']) if good else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--nfY', nargs='+', type=int, default=[4, 8, 16, 32])
+    parser.add_argument('--numIntgrPts', nargs='+', type=int, default=[3, 4, 5, 7])
+    parser.add_argument('--numBarsCol', type=int, help="bars per layer (default: %d)" % models.FIBER['numBarsCol'])
+    parser.add_argument('--study', choices=['pushover', 'dynamic'], default='pushover')
+    parser.add_argument('--GMfact', type=float, default=1.0, help="record scale factor for --study dynamic")
+    parser.add_argument('--tolerance', type=float, default=0.01, help="allowed peak error")
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--json', help="also write the report rows to this file")
+    args = parser.parse_args(argv)
+
+    rows, referenceSeconds = study(args.nfY, args.numIntgrPts, args.study, args.GMfact, args.numBarsCol,
+                                   args.processes, args.tolerance)
+    print("reference nfY = %(nfY)d, numIntgrPts = %(numIntgrPts)d" % REFERENCE + ": %.3f s" % referenceSeconds)
+    print("%4s %4s %7s %9s %11s %11s" % ('nfY', 'nIP', 'fibers', 'seconds', 'peakError', 'rmsError'))
+    for r in sorted(rows, key=lambda r: (np.isnan(r['seconds']), r['seconds'], r['peakError'])):
+        print("%(nfY)4d %(numIntgrPts)4d %(fibers)7d %(seconds)9.3f %(peakError)11.3e %(rmsError)11.3e" % r)
+
+    best = recommend(rows, args.tolerance)
+    if best is None:
+        print("no discretization within a peak error of %g" % args.tolerance)
+    else:
+        print("recommended: nfY = %(nfY)d, numIntgrPts = %(numIntgrPts)d" % best)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(dict(reference=REFERENCE, referenceSeconds=referenceSeconds, rows=rows,
+                           recommended=best), f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
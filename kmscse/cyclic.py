@@ -0,0 +1,162 @@
+"""Cyclic displacement protocols for the kmscse004/kmscse005 columns.
+
+A protocol is an array of displacement reversal points. ``run_protocol``
+drives DisplacementControl through it with a single ``analyze(n)`` per
+monotonic half-cycle and only falls back to the step-by-step convergence
+fallbacks for the rest of a segment that does not converge. The response is
+collected by Node recorders, so no Python runs between the steps of a
+segment.
+
+    python -m kmscse.cyclic --model fiber --protocol fema461 --drift 0.04
+"""
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+import openseespy.opensees as ops
+
+from kmscse import analysis, models
+
+
+def reversals(amplitudes):
+    """Reversal points +a, -a for every cycle amplitude, returning to zero."""
+    amplitudes = np.asarray(amplitudes, float)
+    return np.append(np.column_stack([amplitudes, -amplitudes]).ravel(), 0.0)
+
+
+def fema461(Dmax, numAmplitudes=10, ratio=1.4, cyclesPerAmplitude=2):
+    """FEMA 461 quasi-static protocol: amplitudes growing by ``ratio`` up to ``Dmax``."""
+    amplitudes = Dmax * ratio ** (np.arange(numAmplitudes) - (numAmplitudes - 1.0))
+    return reversals(np.repeat(amplitudes, cyclesPerAmplitude))
+
+
+def atc24(Dy, Dmax, elastic=(1. / 3., 2. / 3.), elasticCycles=3):
+    """ATC-24 protocol in multiples of the yield displacement ``Dy``.
+
+    ``elasticCycles`` cycles at each fraction in ``elastic``, three cycles each
+    at 1, 2 and 3 Dy, then two cycles at every further multiple up to ``Dmax``.
+    """
+    pre = np.repeat(np.asarray(elastic) * Dy, elasticCycles)
+    early = np.repeat(np.array([1.0, 2.0, 3.0]) * Dy, 3)
+    late = np.repeat(np.arange(4.0, math.floor(Dmax / Dy) + 1.0) * Dy, 2)
+    amplitudes = np.concatenate([pre, early, late])
+    return reversals(amplitudes[amplitudes <= Dmax])
+
+
+PROTOCOLS = ('fema461', 'atc24')
+
+
+def run_protocol(targets, Dincr, Hload, ctrlNode=2, ctrlDOF=1, baseNode=1, dataDir=None, verbose=True):
+    """Drive ``ctrlNode`` through the reversal points ``targets``.
+
+    Each segment is one ``analyze(n)`` with n = ceil(|segment| / Dincr); if it
+    fails the remainder of the segment is stepped with ``analysis.step``,
+    halving the increment (down to 1/16) where the fallbacks do not converge.
+    Returns a dict with the control displacement and base-shear histories,
+    the per-segment number of recovered steps and the final ``ok`` flag.
+    """
+    if not len(targets):
+        raise ValueError("the protocol has no reversal points")
+    IDloadTag = 200
+    ops.timeSeries('Linear', IDloadTag)
+    ops.pattern('Plain', IDloadTag, IDloadTag)
+    ops.load(ctrlNode, Hload, 0.0, 0.0)
+
+    ops.wipeAnalysis()
+    ops.constraints('Plain')
+    ops.numberer('Plain')
+    ops.system('BandGeneral')
+    test = ('EnergyIncr', analysis.Tol, 6, 0)
+    algorithm = ('Newton',)
+    ops.test(*test)
+    ops.algorithm(*algorithm)
+    ops.integrator('DisplacementControl', ctrlNode, ctrlDOF, Dincr)
+    ops.analysis('Static')
+
+    tmp = None
+    if dataDir is None:
+        tmp = tempfile.TemporaryDirectory()
+        dataDir = tmp.name
+    DFree = os.path.join(dataDir, 'DFree.out')
+    RBase = os.path.join(dataDir, 'RBase.out')
+    recorderTags = (ops.recorder('Node', '-file', DFree, '-node', ctrlNode, '-dof', ctrlDOF, 'disp'),
+                    ops.recorder('Node', '-file', RBase, '-node', baseNode, '-dof', ctrlDOF, 'reaction'))
+
+    recovered = np.zeros(len(targets), int)
+    ok = 0
+    for i, target in enumerate(targets):
+        current = ops.nodeDisp(ctrlNode, ctrlDOF)
+        n = int(math.ceil(abs(target - current) / Dincr - 1.0e-9))
+        if n == 0:
+            continue
+        dU = (target - current) / n
+        ops.integrator('DisplacementControl', ctrlNode, ctrlDOF, dU)
+        ok = ops.analyze(n)
+        if ok != 0:
+            # finish the segment step by step with the fallbacks, halving the increment when they fail
+            du = dU
+            while abs(target - ops.nodeDisp(ctrlNode, ctrlDOF)) > 1.0e-6 * Dincr:
+                remaining = target - ops.nodeDisp(ctrlNode, ctrlDOF)
+                if abs(du) > abs(remaining):
+                    du = remaining
+                ops.integrator('DisplacementControl', ctrlNode, ctrlDOF, du)
+                ok = analysis.step((), test, algorithm, verbose)[0]
+                if ok == 0:
+                    recovered[i] += 1
+                    if abs(du) < abs(dU):
+                        du = 2.0 * du  # grow back after a converged step
+                elif abs(du) > abs(dU) / 16.0:
+                    du /= 2.0
+                    if verbose:
+                        print("Trying increment %.4g .." % du)
+                else:
+                    break
+            if ok != 0:
+                break
+
+    for tag in recorderTags:
+        ops.remove('recorder', tag)  # flush and close the files, leaving the caller's recorders
+    disp = np.loadtxt(DFree, ndmin=1)
+    force = -np.loadtxt(RBase, ndmin=1)
+    if tmp is not None:
+        tmp.cleanup()
+    return dict(disp=disp, force=force, recovered=recovered, segments=i + 1, ok=ok)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--model', choices=['aggregator', 'fiber'], default='fiber')
+    parser.add_argument('--protocol', choices=PROTOCOLS, default='fema461')
+    parser.add_argument('--drift', type=float, default=0.04, help="peak drift ratio")
+    parser.add_argument('--Dincr', type=float, help="displacement increment (default: 0.001 LCol)")
+    parser.add_argument('--out', help="save the hysteresis to this .npz file")
+    args = parser.parse_args(argv)
+
+    p = models.params(args.model)
+    Dmax = args.drift * p['LCol']
+    Dincr = args.Dincr or 0.001 * p['LCol']
+    if args.protocol == 'fema461':
+        targets = fema461(Dmax)
+    else:
+        My, PhiY = models.yield_capacity(args.model, p)
+        targets = atc24(PhiY * p['LCol'] ** 2 / 3.0, Dmax)
+
+    models.build_column(args.model, p)
+    analysis.gravity(models.derived(p)['PCol'])
+    start = time.perf_counter()
+    result = run_protocol(targets, Dincr, p['Weight'])
+    elapsed = time.perf_counter() - start
+
+    print("%s: %d segments, %d steps, %d recovered steps, %.3f s, ok = %d" % (
+        args.protocol, result['segments'], len(result['disp']), result['recovered'].sum(), elapsed, result['ok']))
+    print("peak base shear %.1f at a peak drift of %.3e" % (
+        np.abs(result['force']).max(), np.abs(result['disp']).max() / p['LCol']))
+    if args.out:
+        np.savez(args.out, targets=targets, disp=result['disp'], force=result['force'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""Broker-less job distribution over TCP with ``multiprocessing.managers``.
+
+The coordinator serves a task queue; workers on any host connect, pull
+(model spec, record, scale) jobs, run them with kmscse.jobs and send each
+result back as soon as it is done. A worker holds a lease on its tasks and
+renews it with heartbeats; tasks of a worker that stops heartbeating are put
+back in the queue. Record files a worker cannot see are fetched from the
+coordinator once and cached. A job that raises is returned as a row with
+status ``error`` rather than taking its worker down.
+
+The manager unpickles whatever its clients send, so the coordinator listens
+on 127.0.0.1 unless ``--host`` says otherwise, and every connection needs the
+authkey: ``--authkey`` or ``KMSCSE_AUTHKEY``, else a random key that the
+coordinator prints for its workers.
+
+    python -m kmscse.distributed coordinator --model fiber --scales 1000 2000 3000 --port 50000 --local-workers 2
+    python -m kmscse.distributed coordinator --host 0.0.0.0 --port 50000 --authkey "$KEY"
+    python -m kmscse.distributed worker --address coordinator-host:50000 --authkey "$KEY"
+"""
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import secrets
+import socket
+import threading
+import traceback
+import time
+from multiprocessing.managers import BaseManager
+
+import numpy as np
+
+from kmscse import jobs, records
+
+AUTHKEY_ENV = 'KMSCSE_AUTHKEY'
+
+
+class Coordinator:
+    """Task queue with leases; all methods are called through manager proxies."""
+
+    def __init__(self, jobList, leaseTimeout=60.0):
+        self.lock = threading.Lock()
+        self.jobs = list(jobList)
+        self.pending = collections.deque(range(len(self.jobs)))
+        self.leases = {}  # taskId -> (workerId, deadline)
+        self.results = {}
+        self.requeued = 0
+        self.leaseTimeout = leaseTimeout
+        self.seen = {}  # workerId -> time of its last call
+
+    def get_task(self, workerId):
+        """Lease the next task to ``workerId``; None when nothing is pending."""
+        with self.lock:
+            self.seen[workerId] = time.time()
+            self._reap()
+            if not self.pending:
+                return None
+            taskId = self.pending.popleft()
+            self.leases[taskId] = (workerId, time.time() + self.leaseTimeout)
+            return taskId, self.jobs[taskId]
+
+    def put_result(self, workerId, taskId, result):
+        with self.lock:
+            self.seen[workerId] = time.time()
+            self.leases.pop(taskId, None)
+            # a re-queued task may finish twice, keep the first result
+            self.results.setdefault(taskId, dict(result, worker=workerId))
+
+    def heartbeat(self, workerId):
+        with self.lock:
+            self.seen[workerId] = time.time()
+            deadline = time.time() + self.leaseTimeout
+            for taskId, (owner, _) in self.leases.items():
+                if owner == workerId:
+                    self.leases[taskId] = (owner, deadline)
+
+    def get_record(self, path):
+        """(name, values, dt) of a record file on the coordinator's disk."""
+        name, accel, dt = jobs.load_record(path)
+        return name, accel.tolist(), dt
+
+    def finished(self):
+        with self.lock:
+            self._reap()
+            return len(self.results) == len(self.jobs)
+
+    def active_workers(self, exclude=()):
+        """Workers other than ``exclude`` heard from within the lease timeout."""
+        with self.lock:
+            now = time.time()
+            return [w for w, t in self.seen.items() if w not in exclude and now - t < self.leaseTimeout]
+
+    def progress(self):
+        with self.lock:
+            return dict(total=len(self.jobs), done=len(self.results), pending=len(self.pending),
+                        leased=len(self.leases), requeued=self.requeued)
+
+    def _reap(self):
+        now = time.time()
+        for taskId, (owner, deadline) in list(self.leases.items()):
+            if deadline < now:
+                del self.leases[taskId]
+                if taskId not in self.results:
+                    self.pending.append(taskId)
+                    self.requeued += 1
+
+
+class _Manager(BaseManager):
+    pass
+
+
+def serve(coordinator, address, authkey):
+    """Serve ``coordinator`` on ``address`` from a daemon thread; return the server."""
+    _Manager.register('coordinator', callable=lambda: coordinator)
+    server = _Manager(address=address, authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def connect(address, authkey, retries=50):
+    _Manager.register('coordinator')
+    for attempt in range(retries):
+        manager = _Manager(address=address, authkey=authkey)
+        try:
+            manager.connect()
+            return manager.coordinator()
+        except ConnectionRefusedError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.1)
+
+
+def worker(address, authkey, heartbeat=5.0, poll=0.5):
+    """Pull and run tasks until the coordinator has every result."""
+    coordinator = connect(address, authkey)
+    workerId = "%s:%d" % (socket.gethostname(), os.getpid())
+    beating = threading.Event()
+    fetched = {}  # records read from the coordinator, by path
+
+    def beat():
+        proxy = connect(address, authkey)  # proxies are not shared between threads
+        while not beating.wait(heartbeat):
+            proxy.heartbeat(workerId)
+
+    threading.Thread(target=beat, daemon=True).start()
+    try:
+        while True:
+            task = coordinator.get_task(workerId)
+            if task is None:
+                if coordinator.finished():
+                    return
+                time.sleep(poll)
+                continue
+            taskId, job = task
+            try:
+                record = job.get('record')
+                if isinstance(record, str) and record not in fetched:
+                    try:
+                        jobs.load_record(record)
+                    except OSError:
+                        name, values, dt = coordinator.get_record(record)
+                        fetched[record] = (np.array(values), dt)
+                if record in fetched:
+                    job = dict(job, accel=fetched[record][0], dt=fetched[record][1])
+                result = jobs.run_job(job)
+            except Exception as e:
+                traceback.print_exc()
+                job.pop('accel', None)
+                job.pop('dt', None)
+                result = dict(job, status='error', error='%s: %s' % (type(e).__name__, e), ok=-1)
+            coordinator.put_result(workerId, taskId, result)
+    finally:
+        beating.set()
+
+
+def _parse_address(text):
+    host, port = text.rsplit(':', 1)
+    return host, int(port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    sub = parser.add_subparsers(dest='role', required=True)
+
+    c = sub.add_parser('coordinator')
+    c.add_argument('--jobs', help="JSON list of job dicts (otherwise built from the options below)")
+    c.add_argument('--model', choices=['elastic', 'aggregator', 'fiber'], default='aggregator')
+    c.add_argument('--records', nargs='*', help="acceleration files (default: BM68elc.acc)")
+    c.add_argument('--scales', nargs='+', type=float, default=[1.0])
+    c.add_argument('--host', default='127.0.0.1', help="interface to listen on, e.g. 0.0.0.0 for remote workers")
+    c.add_argument('--port', type=int, default=50000)
+    c.add_argument('--lease', type=float, default=60.0, help="seconds without heartbeat before re-queueing")
+    c.add_argument('--local-workers', type=int, default=0, help="also start this many workers on this host")
+    c.add_argument('--out', help="write the results to this JSON file")
+
+    w = sub.add_parser('worker')
+    w.add_argument('--address', required=True, help="coordinator host:port")
+    for p in (c, w):
+        p.add_argument('--authkey', default=os.environ.get(AUTHKEY_ENV),
+                       help="shared secret of the coordinator and its workers (default: $%s)" % AUTHKEY_ENV)
+    args = parser.parse_args(argv)
+
+    if args.role == 'worker':
+        if not args.authkey:
+            parser.error("workers need the coordinator's --authkey or $%s" % AUTHKEY_ENV)
+        worker(_parse_address(args.address), args.authkey.encode())
+        return
+
+    if args.jobs:
+        with open(args.jobs) as f:
+            jobList = json.load(f)
+    else:
+        paths = [os.path.abspath(p) for p in (args.records or [records.DEFAULT_RECORD])]
+        jobList = [jobs.make_job(args.model, record=path, GMfact=s) for path in paths for s in args.scales]
+
+    authkey = args.authkey
+    if not authkey:
+        authkey = secrets.token_hex(16)
+        print("authkey %s (pass it to the workers with --authkey or $%s)" % (authkey, AUTHKEY_ENV))
+    coordinator = Coordinator(jobList, args.lease)
+    serve(coordinator, (args.host, args.port), authkey.encode())
+    address = ('127.0.0.1' if args.host in ('', '0.0.0.0') else args.host, args.port)
+    local = [multiprocessing.Process(target=worker, args=(address, authkey.encode()))
+             for _ in range(args.local_workers)]
+    for process in local:
+        process.start()
+
+    while not coordinator.finished():
+        time.sleep(0.5)
+        print("%(done)d/%(total)d done, %(leased)d running, %(pending)d pending, %(requeued)d requeued"
+              % coordinator.progress())
+        if local and not any(process.is_alive() for process in local) and not coordinator.finished():
+            hostname = socket.gethostname()
+            remote = coordinator.active_workers({"%s:%d" % (hostname, process.pid) for process in local})
+            if not remote:
+                print("every local worker has exited (exit codes %s) and no other worker is connected; stopping"
+                      % ', '.join(str(process.exitcode) for process in local))
+                break
+    for process in local:
+        process.join()
+
+    results = [coordinator.results.get(i, dict(job, status='lost', ok=-1)) for i, job in enumerate(jobList)]
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
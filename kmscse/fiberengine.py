@@ -0,0 +1,333 @@
+"""Vectorized NumPy state engine for the kmscse005 fiber section.
+
+Fiber coordinates, areas and the Concrete02/Steel02 state variables are kept
+in flat arrays of shape (nCases, nFibers), so one ``trial``/``commit`` pair
+advances every fiber of every case by one step. The material updates are
+line-by-line ports of OpenSees' Concrete02.cpp and Steel02.cpp.
+
+    python -m kmscse.fiberengine --cases 200 --steps 400
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import openseespy.opensees as ops
+
+from kmscse import models, sections
+
+DBL_EPSILON = sys.float_info.epsilon
+
+
+class Concrete02:
+    """Concrete02 (linear tension softening) over an array of fibers."""
+
+    def __init__(self, shape, fc, epsc0, fcu, epscu, rat, ft, Ets):
+        self.fc, self.epsc0, self.fcu, self.epscu = fc, epsc0, fcu, epscu
+        self.rat, self.ft, self.Ets = rat, ft, Ets
+        self.ec0 = 2.0 * fc / epsc0
+
+        # committed history
+        self.ecminP = np.zeros(shape)
+        self.deptP = np.zeros(shape)
+        self.epsP = np.zeros(shape)
+        self.sigP = np.zeros(shape)
+        self.eP = np.full(shape, self.ec0)
+        self.ecmin, self.dept = self.ecminP, self.deptP
+        self.eps, self.sig, self.e = self.epsP, self.sigP, self.eP
+
+    def _compr_envlp(self, epsc):
+        ratLocal = epsc / self.epsc0
+        slope = (self.fcu - self.fc) / (self.epscu - self.epsc0)
+        sigc = np.where(epsc >= self.epsc0, self.fc * ratLocal * (2.0 - ratLocal),
+                        np.where(epsc > self.epscu, slope * (epsc - self.epsc0) + self.fc, self.fcu))
+        Ect = np.where(epsc >= self.epsc0, self.ec0 * (1.0 - ratLocal),
+                       np.where(epsc > self.epscu, slope, 1.0e-10))
+        return sigc, Ect
+
+    def _tens_envlp(self, epsc):
+        eps0 = self.ft / self.ec0
+        epsu = self.ft * (1.0 / self.Ets + 1.0 / self.ec0)
+        sigc = np.where(epsc <= eps0, epsc * self.ec0,
+                        np.where(epsc <= epsu, self.ft - self.Ets * (epsc - eps0), 0.0))
+        Ect = np.where(epsc <= eps0, self.ec0, np.where(epsc <= epsu, -self.Ets, 1.0e-10))
+        return sigc, Ect
+
+    def trial(self, eps):
+        ec0 = self.ec0
+        ecmin = self.ecminP
+        dept = self.deptP
+        deps = eps - self.epsP
+
+        # monotonic envelope in compression
+        sigEnv, eEnv = self._compr_envlp(eps)
+
+        # unloading-reloading between ecmin and ept (Eqs. 2.31-2.36 of the EERC report)
+        epsr = (self.fcu - self.rat * ec0 * self.epscu) / (ec0 * (1.0 - self.rat))
+        sigmr = ec0 * epsr
+        sigmm = self._compr_envlp(ecmin)[0]
+        er = (sigmm - sigmr) / (ecmin - epsr)
+        ept = ecmin - sigmm / er
+
+        sigmin = sigmm + er * (eps - ecmin)
+        sigmax = er * 0.5 * (eps - ept)
+        sigUnl = self.sigP + ec0 * deps
+        eUnl = np.full_like(eps, ec0)
+        low = sigUnl <= sigmin
+        sigUnl = np.where(low, sigmin, sigUnl)
+        eUnl = np.where(low, er, eUnl)
+        high = sigUnl >= sigmax
+        sigUnl = np.where(high, sigmax, sigUnl)
+        eUnl = np.where(high, 0.5 * er, eUnl)
+
+        # reloading in tension up to epn, then the shifted tensile envelope
+        epn = ept + dept
+        sicn = self._tens_envlp(dept)[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            eRel = np.where(dept != 0.0, sicn / dept, ec0)
+        sigRel = eRel * (eps - ept)
+        sigTen, eTen = self._tens_envlp(eps - ept)
+
+        comp = eps < ecmin
+        unl = ~comp & (eps <= ept)
+        rel = ~comp & ~unl & (eps <= epn)
+        ten = ~comp & ~unl & ~rel
+        sig = np.where(comp, sigEnv, np.where(unl, sigUnl, np.where(rel, sigRel, sigTen)))
+        e = np.where(comp, eEnv, np.where(unl, eUnl, np.where(rel, eRel, eTen)))
+        ecmin = np.where(comp, eps, ecmin)
+        dept = np.where(ten, eps - ept, dept)
+
+        # no strain change: keep the committed state
+        still = np.abs(deps) < DBL_EPSILON
+        self.sig = np.where(still, self.sigP, sig)
+        self.e = np.where(still, self.eP, e)
+        self.ecmin = np.where(still, self.ecminP, ecmin)
+        self.dept = np.where(still, self.deptP, dept)
+        self.eps = eps
+        return self.sig, self.e
+
+    def commit(self):
+        self.ecminP, self.deptP = self.ecmin, self.dept
+        self.epsP, self.sigP, self.eP = self.eps, self.sig, self.e
+
+
+class Steel02:
+    """Steel02 (Giuffre-Menegotto-Pinto) over an array of fibers, no isotropic hardening."""
+
+    def __init__(self, shape, Fy, E0, b, R0, cR1, cR2, a1=0.0, a2=1.0, a3=0.0, a4=1.0):
+        self.Fy, self.E0, self.b = Fy, E0, b
+        self.R0, self.cR1, self.cR2 = R0, cR1, cR2
+        self.a1, self.a2, self.a3, self.a4 = a1, a2, a3, a4
+        epsy = Fy / E0
+
+        # committed history
+        self.konP = np.zeros(shape, int)
+        self.epsmaxP = np.full(shape, epsy)
+        self.epsminP = np.full(shape, -epsy)
+        self.epsplP = np.zeros(shape)
+        self.epss0P = np.zeros(shape)
+        self.sigs0P = np.zeros(shape)
+        self.epssrP = np.zeros(shape)
+        self.sigsrP = np.zeros(shape)
+        self.epsP = np.zeros(shape)
+        self.sigP = np.zeros(shape)
+        self.eP = np.full(shape, E0)
+        self.trial(np.zeros(shape))
+
+    def trial(self, eps):
+        Fy, E0, b = self.Fy, self.E0, self.b
+        Esh = b * E0
+        epsy = Fy / E0
+        deps = eps - self.epsP
+
+        epsmax, epsmin, epspl = self.epsmaxP, self.epsminP, self.epsplP
+        epss0, sigs0 = self.epss0P, self.sigs0P
+        epsr, sigr = self.epssrP, self.sigsrP
+        kon = self.konP
+
+        # first excursion out of the virgin state
+        first = (kon == 0) | (kon == 3)
+        still = first & (np.abs(deps) < 10.0 * DBL_EPSILON)
+        start = first & ~still
+        neg = start & (deps < 0.0)
+        pos = start & ~neg
+        epsmax = np.where(start, epsy, epsmax)
+        epsmin = np.where(start, -epsy, epsmin)
+        kon = np.where(neg, 2, np.where(pos, 1, np.where(still, 3, kon)))
+        epss0 = np.where(neg, -epsy, np.where(pos, epsy, epss0))
+        sigs0 = np.where(neg, -Fy, np.where(pos, Fy, sigs0))
+        epspl = np.where(neg, -epsy, np.where(pos, epsy, epspl))
+
+        # load reversals: store the reversal point and the new asymptote intersection
+        up = (kon == 2) & (deps > 0.0)
+        down = (kon == 1) & (deps < 0.0)
+        rev = up | down
+        epsr = np.where(rev, self.epsP, epsr)
+        sigr = np.where(rev, self.sigP, sigr)
+        epsmin = np.where(up, np.minimum(self.epsP, epsmin), epsmin)
+        epsmax = np.where(down, np.maximum(self.epsP, epsmax), epsmax)
+        shftUp = 1.0 + self.a3 * ((epsmax - epsmin) / (2.0 * (self.a4 * epsy))) ** 0.8
+        shftDown = 1.0 + self.a1 * ((epsmax - epsmin) / (2.0 * (self.a2 * epsy))) ** 0.8
+        epss0Up = (Fy * shftUp - Esh * epsy * shftUp - sigr + E0 * epsr) / (E0 - Esh)
+        epss0Down = (-Fy * shftDown + Esh * epsy * shftDown - sigr + E0 * epsr) / (E0 - Esh)
+        epss0 = np.where(up, epss0Up, np.where(down, epss0Down, epss0))
+        sigs0 = np.where(up, Fy * shftUp + Esh * (epss0 - epsy * shftUp),
+                         np.where(down, -Fy * shftDown + Esh * (epss0 + epsy * shftDown), sigs0))
+        epspl = np.where(up, epsmax, np.where(down, epsmin, epspl))
+        kon = np.where(up, 1, np.where(down, 2, kon))
+
+        # stress and tangent on the current Menegotto-Pinto branch
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xi = np.abs((epspl - epss0) / epsy)
+            R = self.R0 * (1.0 - (self.cR1 * xi) / (self.cR2 + xi))
+            epsrat = (eps - epsr) / (epss0 - epsr)
+            dum1 = 1.0 + np.abs(epsrat) ** R
+            dum2 = dum1 ** (1.0 / R)
+            sig = (b * epsrat + (1.0 - b) * epsrat / dum2) * (sigs0 - sigr) + sigr
+            e = (b + (1.0 - b) / (dum1 * dum2)) * (sigs0 - sigr) / (epss0 - epsr)
+
+        self.sig = np.where(still, 0.0, sig)
+        self.e = np.where(still, E0, e)
+        self.eps = eps
+        self.kon, self.epsmax, self.epsmin, self.epspl = kon, epsmax, epsmin, epspl
+        self.epss0, self.sigs0, self.epssr, self.sigsr = epss0, sigs0, epsr, sigr
+        return self.sig, self.e
+
+    def commit(self):
+        self.konP, self.epsmaxP, self.epsminP, self.epsplP = self.kon, self.epsmax, self.epsmin, self.epspl
+        self.epss0P, self.sigs0P, self.epssrP, self.sigsrP = self.epss0, self.sigs0, self.epssr, self.sigsr
+        self.epsP, self.sigP, self.eP = self.eps, self.sig, self.e
+
+
+class FiberSection:
+    """The kmscse005 section for ``nCases`` independent deformation histories."""
+
+    def __init__(self, p, nCases=1):
+        y, A, isSteel = sections.fiber_layout(p)
+        self.y = y - (A * y).sum() / A.sum()  # about the area centroid, as FiberSection2d
+        self.A = A
+        self.isSteel = isSteel
+        concrete, steel = sections.materials(p)
+        self.concrete = Concrete02((nCases, (~isSteel).sum()), *concrete)
+        self.steel = Steel02((nCases, isSteel.sum()), *steel)
+
+    def trial(self, eps0, kappa):
+        """Set section deformations (arrays of shape (nCases,)); return (P, Mz, ks)."""
+        eps = eps0[:, None] - self.y * kappa[:, None]
+        sig = np.empty_like(eps)
+        E = np.empty_like(eps)
+        sig[:, ~self.isSteel], E[:, ~self.isSteel] = self.concrete.trial(eps[:, ~self.isSteel])
+        sig[:, self.isSteel], E[:, self.isSteel] = self.steel.trial(eps[:, self.isSteel])
+
+        fs = sig * self.A
+        P = fs.sum(1)
+        Mz = -(fs * self.y).sum(1)
+        EA = E * self.A
+        ks = np.empty((len(P), 2, 2))
+        ks[:, 0, 0] = EA.sum(1)
+        ks[:, 0, 1] = ks[:, 1, 0] = -(EA * self.y).sum(1)
+        ks[:, 1, 1] = (EA * self.y ** 2).sum(1)
+        return P, Mz, ks
+
+    def commit(self):
+        self.concrete.commit()
+        self.steel.commit()
+
+    def run(self, deformations):
+        """Drive deformation histories of shape (nSteps, nCases, 2) and return the section forces."""
+        forces = np.empty_like(deformations)
+        for n, d in enumerate(deformations):
+            forces[n, :, 0], forces[n, :, 1] = self.trial(d[:, 0], d[:, 1])[:2]
+            self.commit()
+        return forces
+
+
+def opensees_section_response(p, deformation):
+    """Section forces of an OpenSees zeroLengthSection driven through ``deformation`` (nSteps, 2).
+
+    Raises RuntimeError if a step does not converge.
+    """
+    nSteps = len(deformation)
+    ops.wipe()
+    ops.model('basic', '-ndm', 2, '-ndf', 3)
+    sections.fiber_section(p, models.ColSecTag)
+    ops.node(1, 0.0, 0.0)
+    ops.node(2, 0.0, 0.0)
+    ops.fix(1, 1, 1, 1)
+    ops.fix(2, 0, 1, 0)
+    ops.element('zeroLengthSection', 1, 1, 2, models.ColSecTag)
+
+    # imposed axial strain and curvature histories, one step per pseudo-time unit
+    steps = list(range(nSteps + 1))
+    for dof, column in ((1, 0), (3, 1)):
+        ops.timeSeries('Path', dof, '-time', *steps, '-values', 0.0, *deformation[:, column])
+        ops.pattern('Plain', dof, dof)
+        ops.sp(2, dof, 1.0)
+
+    ops.constraints('Penalty', 1.0e20, 1.0e20)
+    ops.numberer('Plain')
+    ops.system('FullGeneral')
+    ops.test('NormDispIncr', 1.0e-14, 25)
+    ops.algorithm('Newton')
+    ops.integrator('LoadControl', 1.0)
+    ops.analysis('Static')
+
+    forces = np.empty((nSteps, 2))
+    for n in range(nSteps):
+        if ops.analyze(1) != 0:
+            # the engine would be validated against an unconverged state
+            ops.wipe()
+            raise RuntimeError("OpenSees reference step %d of %d did not converge" % (n + 1, nSteps))
+        forces[n] = ops.eleResponse(1, 'section', 'force')
+    return forces
+
+
+def cyclic_histories(p, nCases, nSteps, seed=0):
+    """Random-amplitude cyclic (eps0, kappa) histories spanning cracking to post-yield."""
+    rng = np.random.default_rng(seed)
+    epsY = p['Fy'] / p['Es']
+    kY = 2.0 * epsY / p['HCol']
+    t = np.linspace(0.0, 1.0, nSteps)[:, None]
+    cycles = rng.uniform(1.0, 4.0, nCases)
+    growth = rng.uniform(0.5, 8.0, nCases)
+    kappa = kY * growth * t * np.sin(2 * np.pi * cycles * t)
+    # axial compression plus the centroid elongation that comes with cracking
+    eps0 = -0.3 * epsY * rng.uniform(0.0, 1.0, nCases) * t + 0.1 * p['HCol'] * np.abs(kappa)
+    return np.stack([eps0, kappa], axis=-1)
+
+
+def validate(p, deformations, cases=None):
+    """Largest force error of the engine against OpenSees, relative to each case's peak force."""
+    forces = FiberSection(p, deformations.shape[1]).run(deformations)
+    worst = 0.0
+    for c in (range(deformations.shape[1]) if cases is None else cases):
+        reference = opensees_section_response(p, deformations[:, c])
+        scale = np.abs(reference).max(0)
+        worst = max(worst, float((np.abs(forces[:, c] - reference) / scale).max()))
+    return worst
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--cases', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=400)
+    parser.add_argument('--check', type=int, default=5, help="cases compared against OpenSees")
+    parser.add_argument('--tolerance', type=float, default=1.0e-8)
+    args = parser.parse_args(argv)
+
+    p = models.params('fiber')
+    deformations = cyclic_histories(p, args.cases, args.steps)
+
+    start = time.perf_counter()
+    FiberSection(p, args.cases).run(deformations)
+    elapsed = time.perf_counter() - start
+    print("%d cases x %d steps in %.3f s" % (args.cases, args.steps, elapsed))
+
+    error = validate(p, deformations, range(min(args.check, args.cases)))
+    print("max relative error against OpenSees: %.3e" % error)
+    if error > args.tolerance:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Element-formulation benchmark for the kmscse004/kmscse005 columns.
+
+Runs the same pushover and ground motion with each element formulation of
+``models.build_column`` and compares runtime, Newton iterations and response
+with the scripts' legacy nonlinearBeamColumn. Cases run one after another so
+the timings are not skewed by competing processes.
+
+    python -m kmscse.formulations --model fiber --GMfact 3000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from kmscse import analysis, models, records
+
+FORMULATIONS = {
+    'legacy': dict(element='nonlinearBeamColumn'),
+    'force-Lobatto': dict(element='forceBeamColumn', integration='Lobatto'),
+    'force-HingeRadau': dict(element='forceBeamColumn', integration='HingeRadau'),
+    'disp-1': dict(element='dispBeamColumn', numEle=1),
+    'disp-2': dict(element='dispBeamColumn', numEle=2),
+    'disp-4': dict(element='dispBeamColumn', numEle=4),
+    'hinge': dict(element='hinge'),
+}
+
+
+def run(kind, p, study, GMfact=1.0):
+    """Run one study on the column and return the response with its wall time."""
+    start = time.perf_counter()
+    models.build_column(kind, p)
+    analysis.gravity(models.derived(p)['PCol'])
+    if study == 'pushover':
+        result = analysis.pushover(0.05 * p['LCol'], 0.001 * p['LCol'], p['Weight'], verbose=False)
+    else:
+        name, accel, dt = records.read_record(records.DEFAULT_RECORD)
+        result = analysis.ground_motion(accel, dt, GMfact, verbose=False)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def benchmark(kind, names, GMfact=1.0, repeat=1):
+    """Benchmark the named formulations; the first one is the reference."""
+    base = models.params(kind)
+    rows = []
+    reference = {}
+    for name in names:
+        p = dict(base, **FORMULATIONS[name])
+        for study in ('pushover', 'dynamic'):
+            runs = [run(kind, p, study, GMfact) for _ in range(repeat)]
+            result = runs[-1]
+            key = 'force' if study == 'pushover' else 'disp'
+            reference.setdefault(study, result)
+            ref = reference[study][key]
+            n = min(len(ref), len(result[key]))
+            error = np.abs(result[key][:n] - ref[:n]).max() / np.abs(ref).max() if n else np.inf
+            rows.append(dict(
+                formulation=name,
+                study=study,
+                seconds=min(r['seconds'] for r in runs),
+                iterations=result['iterations'],
+                peakDrift=float(np.abs(result['disp']).max() / p['LCol']) if n else np.nan,
+                peakMoment=float(np.abs(result['baseMoment']).max()) if n else np.nan,
+                error=float(error),
+                ok=result['ok'],
+            ))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--model', choices=['aggregator', 'fiber'], default='fiber')
+    parser.add_argument('--formulations', nargs='+', choices=list(FORMULATIONS), default=list(FORMULATIONS))
+    parser.add_argument('--GMfact', type=float, default=3000.0, help="BM68elc.acc scale factor")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per case, the fastest is reported")
+    parser.add_argument('--json', help="also write the report rows to this file")
+    args = parser.parse_args(argv)
+
+    rows = benchmark(args.model, args.formulations, args.GMfact, args.repeat)
+    print("%-17s %-9s %9s %10s %10s %12s %10s %3s" % (
+        'formulation', 'study', 'seconds', 'iterations', 'drift', 'Mbase', 'error', 'ok'))
+    for r in rows:
+        print("%(formulation)-17s %(study)-9s %(seconds)9.3f %(iterations)10d %(peakDrift)10.3e "
+              "%(peakMoment)12.4g %(error)10.3e %(ok)3d" % r)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
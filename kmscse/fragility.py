@@ -0,0 +1,197 @@
+"""Lognormal fragility curves by maximum likelihood, vectorized over variants and bootstrap resamples.
+
+For each model variant and drift limit state, every run contributes its
+intensity measure (Sa or GMfact) and whether the limit state was exceeded;
+runs that did not converge count as exceedances (collapse).
+P(exceed | IM) = Phi(ln(IM / theta) / beta) is fitted by Fisher scoring on
+all variants and all bootstrap resamples at once, as one batch of 2x2
+systems, so a whole portfolio refits in a single pass.
+
+    python -m kmscse.fragility results --model fiber --limit-states 0.01 0.02 --group-by fc --bootstrap 1000
+"""
+import argparse
+import json
+
+import numpy as np
+
+from kmscse import resultstore
+
+
+def ndtr(x):
+    """Standard normal CDF (Chebyshev erfc approximation, relative error below 1.2e-7)."""
+    z = np.abs(x) * np.sqrt(0.5)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = 0.17087277 * t
+    for c in (-0.82215223, 1.48851587, -1.13520398, 0.27886807, -0.18628806, 0.09678418, 0.37409196,
+              1.00002368):
+        poly += c
+        poly *= t
+    poly -= 1.26551223 + z * z
+    half = np.exp(poly, out=poly)
+    half *= 0.5 * t  # Phi(-|x|)
+    return np.where(x < 0, half, 1.0 - half)
+
+
+def fit(im, exceeded, weights=None, start=None, iterations=50, tol=1e-6, chunk=256):
+    """MLE (theta, beta) of lognormal fragilities for every batch of runs along the last axis.
+
+    ``im``, ``exceeded`` and ``weights`` (0 for padding, counts for bootstrap
+    resamples) broadcast to (..., nRuns). Batches whose exceedances are
+    perfectly separated in IM, or all on one side, have no finite MLE and
+    return NaN. ``start`` is an optional (theta, beta) broadcastable to the
+    batches to start from, e.g. the fit of the data for its resamples. The
+    batches are solved ``chunk`` at a time, which keeps the working arrays in
+    cache.
+    """
+    x, y, w = np.broadcast_arrays(np.log(im), np.asarray(exceeded, float),
+                                  1.0 if weights is None else np.asarray(weights, float))
+    shape = x.shape[:-1]
+    x, y, w = (v.reshape(-1, x.shape[-1]) for v in (x, y, w))
+    if start is None:
+        start = (np.nan, np.nan)
+    theta0, beta0 = (np.broadcast_to(v, shape).ravel() for v in start)
+    theta, beta = np.empty(len(x)), np.empty(len(x))
+    for i in range(0, len(x), chunk):
+        block = slice(i, i + chunk)
+        theta[block], beta[block] = _fit_block(x[block], y[block], w[block], theta0[block], beta0[block],
+                                               iterations, tol)
+    return theta.reshape(shape), beta.reshape(shape)
+
+
+def _fit_block(x, y, w, theta0, beta0, iterations, tol):
+    used = w > 0
+    low = np.where(used & (y == 0), x, -np.inf).max(axis=1)   # largest ln(IM) that did not exceed
+    high = np.where(used & (y == 1), x, np.inf).min(axis=1)   # smallest ln(IM) that exceeded
+    separated = low < high
+
+    # standardize ln(IM) per batch for the conditioning of the 2x2 systems
+    n = w.sum(axis=1)
+    mean = (w * np.where(used, x, 0.0)).sum(axis=1) / n
+    spread = np.sqrt((w * np.where(used, x - mean[:, None], 0.0) ** 2).sum(axis=1) / n)
+    spread = np.where(spread > 0, spread, 1.0)
+    s = np.where(used, (x - mean[:, None]) / spread[:, None], 0.0)
+
+    # eta = (ln(IM) - ln(theta)) / beta = a + b * s
+    known = np.isfinite(theta0) & (beta0 > 0)
+    a = np.where(known, (mean - np.log(np.where(known, theta0, 1.0))) / np.where(known, beta0, 1.0), 0.0)
+    b = np.where(known, spread / np.where(known, beta0, 1.0), 1.0)
+    active = np.flatnonzero(~separated)  # separated batches diverge, so they are not iterated
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(iterations):
+            if not len(active):
+                break
+            sa, wa, ya = s[active], w[active], y[active]
+            eta = a[active, None] + b[active, None] * sa
+            P = np.clip(ndtr(eta), 1e-12, 1 - 1e-12)
+            pdf = np.exp(-0.5 * eta * eta) / np.sqrt(2 * np.pi)
+            q = wa * pdf / (P * (1 - P))
+            u = q * (ya - P)  # score and Fisher weight of the linear predictor
+            W = q * pdf
+            g0, g1 = u.sum(axis=1), np.einsum('ij,ij->i', u, sa)
+            Ws = W * sa
+            I00, I01, I11 = W.sum(axis=1), Ws.sum(axis=1), np.einsum('ij,ij->i', Ws, sa)
+            det = I00 * I11 - I01 ** 2
+            da = (I11 * g0 - I01 * g1) / det
+            db = (I00 * g1 - I01 * g0) / det
+            a[active] += da
+            b[active] += db
+            active = active[np.abs(da) + np.abs(db) > tol]
+
+    bad = separated | ~(b > 0)
+    beta = np.where(bad, np.nan, spread / b)
+    theta = np.where(bad, np.nan, np.exp(mean - a * spread / b))
+    return theta, beta
+
+
+def bootstrap(im, exceeded, lengths, nBoot=1000, seed=0):
+    """Fit NaN-padded (nVariants, nMax) data and ``nBoot`` resamples of every variant.
+
+    Returns (theta, beta) of the data, shape (nVariants,), and of the
+    resamples, shape (nVariants, nBoot).
+    """
+    lengths = np.asarray(lengths)
+    nMax = im.shape[1]
+    valid = np.arange(nMax) < lengths[:, None]
+    im, exceeded = np.where(valid, im, 1.0), np.where(valid, exceeded, 0)
+    theta, beta = fit(im, exceeded, valid)
+
+    rng = np.random.default_rng(seed)
+    index = (rng.random((len(lengths), nBoot, nMax)) * lengths[:, None, None]).astype(np.intp)
+    variant = np.arange(len(lengths))[:, None, None]
+    resampled = np.broadcast_to(valid[:, None, :], index.shape)
+    thetaBoot, betaBoot = fit(im[variant, index], exceeded[variant, index], resampled, (theta[:, None], beta[:, None]))
+    return theta, beta, thetaBoot, betaBoot
+
+
+def confidence(samples, level=0.9):
+    """(lower, upper) percentile bounds along the last axis, ignoring NaN resamples."""
+    tail = 50.0 * (1.0 - level)
+    return np.nanpercentile(samples, tail, axis=-1), np.nanpercentile(samples, 100.0 - tail, axis=-1)
+
+
+def from_store(store, limitStates, im='Sa', groupBy=(), **query):
+    """Fit every (variant, limit state) of the runs in a ResultStore.
+
+    Variants are the distinct values of the ``groupBy`` parameters. Returns
+    (variants, im, exceeded, lengths) with im and exceeded NaN/0-padded to
+    (nVariants * nLimitStates, nMax), variant-major.
+    """
+    columns = (im, 'peakDrift', 'ok') + tuple(groupBy)
+    runs = store.query(columns, **query)
+    keys = np.stack([runs[c].astype(float) for c in groupBy], axis=1) if groupBy else np.zeros((len(runs['id']), 0))
+    variants, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    lengths = np.bincount(inverse, minlength=len(variants))
+    order = np.argsort(inverse, kind='stable')
+    position = np.arange(len(order)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    nMax = lengths.max()
+    IM = np.full((len(variants), nMax), np.nan)
+    IM[inverse[order], position] = runs[im].astype(float)[order]
+    drift = np.zeros((len(variants), nMax))
+    drift[inverse[order], position] = np.where(runs['ok'] == 0, runs['peakDrift'].astype(float), np.inf)[order]
+    exceeded = drift[:, None, :] >= np.asarray(limitStates)[None, :, None]
+    nLimits = len(limitStates)
+    return (variants, np.repeat(IM, nLimits, axis=0), exceeded.reshape(-1, nMax).astype(int),
+            np.repeat(lengths, nLimits))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('root', help="results directory (kmscse.resultstore)")
+    parser.add_argument('--model')
+    parser.add_argument('--im', default='Sa', help="intensity measure column: Sa or GMfact")
+    parser.add_argument('--limit-states', nargs='+', type=float, default=[0.01, 0.02, 0.04], help="drift ratios")
+    parser.add_argument('--group-by', nargs='*', default=[], help="parameters that define a variant")
+    parser.add_argument('--bootstrap', type=int, default=1000)
+    parser.add_argument('--level', type=float, default=0.9)
+    parser.add_argument('--json', help="also write the fits to this file")
+    args = parser.parse_args(argv)
+
+    with resultstore.ResultStore(args.root) as store:
+        variants, im, exceeded, lengths = from_store(store, args.limit_states, args.im, args.group_by,
+                                                     model=args.model)
+    theta, beta, thetaBoot, betaBoot = bootstrap(im, exceeded, lengths, args.bootstrap)
+    thetaLow, thetaHigh = confidence(thetaBoot, args.level)
+    betaLow, betaHigh = confidence(betaBoot, args.level)
+
+    rows = []
+    for i in range(len(theta)):
+        variant, limit = divmod(i, len(args.limit_states))
+        rows.append(dict(zip(args.group_by, variants[variant].tolist()), limitState=args.limit_states[limit],
+                         runs=int(lengths[i]), theta=theta[i], beta=beta[i], thetaLow=thetaLow[i],
+                         thetaHigh=thetaHigh[i], betaLow=betaLow[i], betaHigh=betaHigh[i]))
+    print("".join("%10s" % c for c in args.group_by) + "%10s %6s %10s %21s %8s %17s" % (
+        'drift', 'runs', 'theta', '%g%% bounds' % (100 * args.level), 'beta', 'bounds'))
+    for r in rows:
+        print("".join("%10.4g" % r[c] for c in args.group_by) +
+              "%10.4g %6d %10.4g [%9.4g,%9.4g] %8.3f [%7.3f,%7.3f]" % (
+                  r['limitState'], r['runs'], r['theta'], r['thetaLow'], r['thetaHigh'],
+                  r['beta'], r['betaLow'], r['betaHigh']))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump([{k: float(v) for k, v in r.items()} for r in rows], f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Streaming ingestion of record libraries into the batch runners.
+
+Records are read lazily out of zip and tar archives (kmscse.records.iter_records),
+turned into jobs that carry their values, and fed to a warm worker pool with
+a bounded number of jobs in flight, so a library of thousands of records
+runs without being extracted or loaded at once. Result rows name their
+record by its ``archive::member`` reference.
+
+    python -m kmscse.ingest NGA.zip more.tar.gz --list
+    python -m kmscse.ingest NGA.zip --pattern "*.AT2" --model fiber --scales 0.5 1 2 --processes 4 --store results
+    python -m kmscse.ingest NGA.zip --processes 4 --progress
+"""
+import argparse
+import collections
+import contextlib
+import json
+import os
+import time
+
+import numpy as np
+
+from kmscse import jobs, models, progress, records, resultstore, workers
+
+
+def jobs_from(stream, model, scales=(1.0,), **options):
+    """Yield a job per (record, scale) of an ``iter_records`` stream, carrying the record's values."""
+    for reference, (name, accel, dt) in stream:
+        for GMfact in scales:
+            yield jobs.make_job(model, record=reference, GMfact=GMfact, accel=accel, dt=dt, **options)
+
+
+def run(jobIter, processes=1, window=None):
+    """Yield the results of a lazy iterable of jobs, in order, with at most ``window`` in flight.
+
+    ``Pool.map`` and ``imap`` drain the whole iterable up front; here the
+    next job is only drawn once a result is taken, so at most ``window``
+    records (default: 4 per process) are in memory.
+    """
+    if processes == 1:
+        for job in jobIter:
+            yield jobs.run_job(job)
+        return
+    window = window or 4 * (processes or os.cpu_count())
+    with workers.WarmPool(processes) as pool:
+        pending = collections.deque()
+        for job in jobIter:
+            pending.append(pool.apply_async(job))
+            if len(pending) >= window:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('sources', nargs='+', help="zip or tar(.gz/.bz2/.xz) archives, or record files")
+    parser.add_argument('--pattern', nargs='+', default=list(records.PATTERNS), help="record file names to read")
+    parser.add_argument('--dt', type=float, default=records.DEFAULT_DT, help="time step of files without a header")
+    parser.add_argument('--list', action='store_true', help="list the records instead of running them")
+    parser.add_argument('--model', choices=sorted(models.DEFAULTS), default='fiber')
+    parser.add_argument('--scales', nargs='+', type=float, default=[1.0], help="GMfact values")
+    parser.add_argument('--TmaxAnalysis', type=float, default=10.0)
+    parser.add_argument('--processes', type=int, default=1, help="worker processes (0: one per CPU)")
+    parser.add_argument('--json', help="also write the result rows to this file")
+    parser.add_argument('--store', help="insert the result rows into this kmscse.resultstore directory")
+    parser.add_argument('--progress', action='store_true', help="show live throughput and stragglers on stderr")
+    args = parser.parse_args(argv)
+
+    stream = records.iter_records(args.sources, args.pattern, args.dt)
+    start = time.perf_counter()
+    if args.list:
+        print("%-24s %8s %8s %10s %10s  %s" % ('record', 'NPTS', 'dt', 'duration', 'PGA', 'reference'))
+        count = 0
+        for reference, (name, accel, dt) in stream:
+            print("%-24s %8d %8.4f %10.2f %10.4g  %s" % (
+                name[:24], len(accel), dt, len(accel) * dt, np.abs(accel).max() if len(accel) else 0.0, reference))
+            count += 1
+        print("%d records in %.2f s" % (count, time.perf_counter() - start))
+        return
+
+    rows = []
+    print("%-24s %10s %12s %12s %4s %8s" % ('record', 'GMfact', 'drift', 'Mbase', 'ok', 'seconds'))
+    with progress.Monitor() if args.progress else contextlib.nullcontext():
+        for row in run(jobs_from(stream, args.model, args.scales, TmaxAnalysis=args.TmaxAnalysis),
+                       args.processes or None):
+            name = os.path.basename(row['record'].split(records.SEPARATOR)[-1])
+            print("%-24s %10.4g %12.4e %12.4g %4d %8.3f" % (
+                name[-24:], row['GMfact'], row['peakDrift'], row['peakMoment'], row['ok'], row['seconds']))
+            rows.append(row)
+    print("%d runs in %.2f s" % (len(rows), time.perf_counter() - start))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=1, default=float)
+    if args.store:
+        with resultstore.ResultStore(args.store) as store:
+            store.insert(rows)
+
+
+if __name__ == '__main__':
+    main()
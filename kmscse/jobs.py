@@ -0,0 +1,140 @@
+"""Single analysis jobs as run by the kmscse batch runners.
+
+A job is a plain dict, so it can be pickled to a worker or written as JSON:
+
+    dict(model='fiber', params={'fc': -5.0}, study='dynamic', record=None, GMfact=1.0)
+
+``record`` is a path to an acceleration file or an ``archive::member``
+reference (see kmscse.records), ``None`` for BM68elc.acc, or an index into
+the shared RecordStore a pool worker attached to. A job may also carry its
+record's values as ``accel`` and ``dt``, as kmscse.ingest jobs do; they are
+not copied to the result. Optional keys: ``structure`` ('cantilever',
+'portal' or 'frame'), ``drift`` (pushover target drift ratio, 0.05), ``TmaxAnalysis``,
+``recorders`` (kmscse.recording modes) and ``dataDir``, where the recorded
+quantities are written.
+
+Run as a module, one job is read as JSON from stdin and its result written as
+JSON to stdout, which is how kmscse.scheduler runs jobs in subprocesses:
+
+    echo '{"model": "fiber", "GMfact": 1000}' | python -m kmscse.jobs
+"""
+import json
+import sys
+import tempfile
+import time
+
+import numpy as np
+import openseespy.opensees as ops
+
+from kmscse import analysis, models, progress, records, recording, recordstore
+
+# records parsed by this process, keyed by path
+_records = {}
+
+
+def make_job(model, params=None, study='dynamic', record=None, GMfact=1.0, **options):
+    """A job dict with the defaults filled in; ``options`` are the optional keys."""
+    return dict(model=model, params=params or {}, study=study, record=record, GMfact=GMfact, **options)
+
+
+def load_record(record):
+    """(name, accel, dt) for a job's ``record`` entry."""
+    if isinstance(record, int):
+        return recordstore.worker_store.record(record)
+    path = record or records.DEFAULT_RECORD
+    if path not in _records:
+        _records[path] = records.read_record(path)
+    return _records[path]
+
+
+def run_job(job, trace=None, histories=None):
+    """Build, analyze and wipe one job; return its peak response and timing.
+
+    A ``histories`` dict, if given, receives the recorded arrays of the job's
+    ``recorders``, the native ones written with 17 digits so they read back exactly. While a
+    kmscse.progress Monitor is listening, the run reports its progress to it.
+    """
+    start = time.perf_counter()
+    job = dict(job)
+    accel = job.pop('accel', None)
+    dt = job.pop('dt', None)
+    kind = job['model']
+    structure = job.get('structure', 'cantilever')
+    p = models.params(kind, structure, **job.get('params', {}))
+    result = reporting = tmp = None
+    try:
+        layout = models.build(structure, kind, p)
+        pushover = job.get('study', 'dynamic') == 'pushover'
+        height = layout['height']
+        target = job.get('drift', 0.05) * height if pushover else job.get('TmaxAnalysis', 10.0)
+        reporting = progress.reporter(job, target, 'in' if pushover else 's', trace)
+        if reporting is not None:
+            trace = reporting
+        analysis.gravity(layout['PCol'], layout['ctrlNode'], beamLoads=layout['beamLoads'])
+
+        # after gravity, so its steps are not recorded
+        recorder, native, dataDir = None, [], job.get('dataDir')
+        if job.get('recorders') is not None:
+            # elastic members have no sections to record
+            numIntgrPts = 0 if kind == 'elastic' else p['numIntgrPts']
+            nodes = dict(baseNode=layout['baseNode'], topNode=layout['topNode'], colEle=layout['colEle'])
+            dtAnalysis = None if pushover else 0.01  # analysis.ground_motion's DtAnalysis
+            native, hooked = recording.split(job['recorders'], numIntgrPts, dtAnalysis)
+            if dataDir is None and histories is not None:
+                tmp = tempfile.TemporaryDirectory()
+                dataDir = tmp.name
+            if dataDir is None:
+                native = []  # nothing would read them
+            else:
+                recording.define_recorders(job['recorders'], dataDir, numIntgrPts, dtAnalysis, native,
+                                           17 if histories is not None else None, **nodes)
+            if hooked:
+                recorder = recording.Recorder(job['recorders'], numIntgrPts, hooked, **nodes)
+        if pushover:
+            result = analysis.pushover(target, 0.001 * height, p['Weight'], layout['ctrlNode'],
+                                       baseEle=layout['colEle'], verbose=False, trace=trace, recorder=recorder,
+                                       loadNodes=layout['loadNodes'])
+        else:
+            if accel is None:
+                name, accel, dt = load_record(job.get('record'))
+            result = analysis.ground_motion(accel, dt, job.get('GMfact', 1.0), job.get('TmaxAnalysis', 10.0),
+                                            ctrlNode=layout['ctrlNode'], baseEle=layout['colEle'], verbose=False,
+                                            trace=trace, recorder=recorder)
+        if recorder is not None and job.get('dataDir'):
+            recorder.save(job['dataDir'])
+    finally:
+        ops.wipe()  # leave a clean domain for the next job in this process, closing the recorder files
+        if reporting is not None:
+            reporting.done(result['ok'] if result is not None else -1)
+    try:
+        if histories is not None and native:
+            histories.update(recording.load(dataDir, native))
+        if recorder is not None and histories is not None:
+            histories.update(recorder.results())
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    steps = len(result['disp'])
+    row = dict(
+        job,
+        peakDrift=float(np.abs(result['disp']).max() / layout['height']) if steps else np.nan,
+        peakMoment=float(np.abs(result['baseMoment']).max()) if steps else np.nan,
+        steps=steps,
+        iterations=result['iterations'],
+        ok=result['ok'],
+        seconds=time.perf_counter() - start,
+    )
+    if 'force' in result:
+        # pushover lateral strength: the load on every loaded node
+        row['peakShear'] = float(np.abs(result['force']).max() * len(layout['loadNodes'])) if steps else np.nan
+    return row
+
+
+def main():
+    result = run_job(json.load(sys.stdin))
+    json.dump(result, sys.stdout, default=float)
+
+
+if __name__ == '__main__':
+    main()
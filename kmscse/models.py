@@ -0,0 +1,333 @@
+"""Parameterized builders for the kmscse cantilever-column and portal-frame examples.
+
+Parameter names follow the example scripts (LCol, HCol, MyCol, fc, Fy, ...)
+so a value read off a script can be passed straight through.
+"""
+import math
+
+import openseespy.opensees as ops
+
+from kmscse import sections
+
+# kmscse003/004/005 column geometry and loading
+COLUMN = dict(
+    LCol=432.0,  # column length
+    Weight=2000.0,  # superstructure weight
+    HCol=60.0,  # column depth
+    BCol=60.0,  # column width
+    g=386.4,
+    fc=-4.0,  # concrete compressive strength
+    numIntgrPts=5,
+    AFactor=1000.0,  # "make stiff" multiplier on ACol of the elastic members and the aggregator axial response
+    transf='Linear',  # column geometric transformation: Linear (the scripts'), PDelta or Corotational
+)
+
+TRANSFORMATIONS = ('Linear', 'PDelta', 'Corotational')
+
+# element formulation of the nonlinear columns, see build_column
+FORMULATION = dict(
+    element='nonlinearBeamColumn',  # or forceBeamColumn, dispBeamColumn, hinge
+    integration='Lobatto',  # forceBeamColumn: Lobatto or HingeRadau
+    Lp=30.0,  # HingeRadau plastic-hinge length
+    numEle=1,  # dispBeamColumn mesh refinement
+    nHinge=10.0,  # hinge: rotational spring stiffness as a multiple of 3EI/L
+)
+
+ELEMENTS = ('nonlinearBeamColumn', 'forceBeamColumn', 'dispBeamColumn', 'hinge')
+
+# kmscse004: Steel01 moment-curvature aggregated with an elastic axial response
+AGGREGATOR = dict(
+    COLUMN,
+    **FORMULATION,
+    MyCol=130000.0,  # yield moment
+    PhiYCol=0.65e-4,  # yield curvature
+    b=0.01,  # strain-hardening ratio
+)
+
+# kmscse005: Concrete02/Steel02 fiber section (bar count of the dynamic script)
+FIBER = dict(
+    COLUMN,
+    **FORMULATION,
+    coverCol=5.0,
+    numBarsCol=16,
+    barAreaCol=2.25,
+    eps1U=-0.003,
+    fc2Ratio=0.2,
+    eps2U=-0.01,
+    lambdaU=0.1,
+    ftRatio=0.14,
+    Fy=66.8,
+    Es=29000.0,
+    Bs=0.01,
+    R0=18,
+    cR1=0.925,
+    cR2=0.15,
+    nfY=16,
+    nfZ=4,
+    concrete='Concrete02',  # or Concrete01 (DDM sensitivities, see kmscse.sensitivity)
+    steel='Steel02',  # or Steel01
+)
+
+DEFAULTS = {'elastic': COLUMN, 'aggregator': AGGREGATOR, 'fiber': FIBER}
+
+# kmscse002 portal frame: bay width, beam and the elastic members' properties
+FRAME = dict(
+    LBeam=504.0,
+    EFrame=4227.0,  # elastic modulus of the kmscse001/002 members
+    AColFrame=3.6e9,  # elastic column area, axially rigid
+    IzColFrame=1080000.0,
+    ABeam=5.76e9,
+    IzBeam=4423680.0,
+    wBeam=-7.94,  # beam gravity load per unit length
+)
+
+# generated frames (structure 'frame'): a regular grid of kmscse002 members
+GRID = dict(
+    stories=4,
+    bays=3,
+)
+
+STRUCTURES = ('cantilever', 'portal', 'frame')
+
+ColSecTag = 1
+ColTransfTag = 1
+BeamTransfTag = 2
+
+
+def params(kind, structure='cantilever', **overrides):
+    """Return the default parameters of model ``kind`` with ``overrides`` applied."""
+    p = dict(DEFAULTS[kind], **(FRAME if structure in ('portal', 'frame') else {}),
+             **(GRID if structure == 'frame' else {}))
+    unknown = set(overrides) - set(p) - {'EIeff'}
+    if unknown:
+        raise KeyError("unknown %s parameters: %s" % (kind, ', '.join(sorted(unknown))))
+    p.update(overrides)
+    return p
+
+
+def derived(p):
+    """Quantities the scripts calculate from the primary parameters."""
+    Ec = 57 * math.sqrt(abs(p['fc']) * 1000)  # concrete elastic modulus
+    return dict(
+        PCol=p['Weight'],  # nodal dead-load weight per column
+        Mass=p['Weight'] / p['g'],  # nodal mass
+        ACol=p['BCol'] * p['HCol'],  # cross-sectional area
+        IzCol=1. / 12. * p['BCol'] * p['HCol'] ** 3,  # column moment of inertia
+        Ec=Ec,
+    )
+
+
+def yield_capacity(kind, p):
+    """Return (My, PhiY) of the column section at its gravity axial load."""
+    if kind == 'aggregator':
+        return p['MyCol'], p['PhiYCol']
+    if kind == 'fiber':
+        return sections.first_yield(p, derived(p)['PCol'])
+    raise ValueError("model %r has no yield point" % kind)
+
+
+def build_column(kind, p):
+    """Create the cantilever column of the given kind in a fresh OpenSees domain.
+
+    ``elastic`` is the kmscse003 elasticBeamColumn (flexural rigidity ``EIeff``
+    when given, gross Ec*IzCol otherwise), ``aggregator`` the kmscse004 column
+    and ``fiber`` the kmscse005 column. The nonlinear columns use the element
+    formulation selected by ``p['element']``:
+
+    - ``nonlinearBeamColumn``: the scripts' legacy element
+    - ``forceBeamColumn``: Lobatto or HingeRadau (plastic-hinge length ``Lp``,
+      cracked elastic interior) integration
+    - ``dispBeamColumn``: ``numEle`` Legendre elements over the height
+    - ``hinge``: elastic column on a bilinear Steel01 rotational spring at the
+      base (Ibarra-Krawinkler stiffness split with factor ``nHinge``)
+
+    Node 1 is the base and node 2 the top in every case, and element 1 is the
+    element whose node i sits at the base. Every column element uses the
+    ``transf`` geometric transformation.
+    """
+    d = derived(p)
+
+    ops.wipe()
+    ops.model('basic', '-ndm', 2, '-ndf', 3)
+
+    # nodal coordinates
+    ops.node(1, 0, 0)
+    ops.node(2, 0, p['LCol'])
+
+    # Boundary Conditions
+    ops.fix(1, 1, 1, 1)
+
+    # nodal masses
+    ops.mass(2, d['Mass'], 1e-9, 0.0)
+
+    column_transformation(p)
+
+    if kind == 'elastic':
+        EICol = p.get('EIeff', d['Ec'] * d['IzCol'])
+        ops.element('elasticBeamColumn', 1, 1, 2, d['ACol'] * p['AFactor'], d['Ec'], EICol / d['Ec'], ColTransfTag)
+        return
+    if kind not in ('aggregator', 'fiber'):
+        raise ValueError("unknown model kind %r" % kind)
+    if p['element'] not in ELEMENTS:
+        raise ValueError("unknown element formulation %r" % p['element'])
+
+    if p['element'] == 'hinge':
+        _hinge_column(kind, p, d)
+        return
+
+    _column_section(kind, p, d)
+
+    numIntgrPts = p['numIntgrPts']
+    if p['element'] == 'nonlinearBeamColumn':
+        ops.element('nonlinearBeamColumn', 1, 1, 2, numIntgrPts, ColSecTag, ColTransfTag)
+    elif p['element'] == 'forceBeamColumn':
+        if p['integration'] == 'HingeRadau':
+            # elastic interior with the cracked (secant-to-yield) stiffness
+            My, PhiY = yield_capacity(kind, p)
+            A = d['ACol'] * p['AFactor'] if kind == 'aggregator' else d['ACol']
+            ops.section('Elastic', ColSecTag + 1, d['Ec'], A, My / PhiY / d['Ec'])
+            ops.beamIntegration('HingeRadau', 1, ColSecTag, p['Lp'], ColSecTag, p['Lp'], ColSecTag + 1)
+        else:
+            ops.beamIntegration(p['integration'], 1, ColSecTag, numIntgrPts)
+        ops.element('forceBeamColumn', 1, 1, 2, ColTransfTag, 1)
+    else:
+        # numEle elements, intermediate nodes 3, 4, ... from the base up
+        numEle = int(p['numEle'])
+        ops.beamIntegration('Legendre', 1, ColSecTag, numIntgrPts)
+        nodes = [1] + [2 + i for i in range(1, numEle)] + [2]
+        for i in range(1, numEle):
+            ops.node(2 + i, 0, p['LCol'] * i / numEle)
+        for i in range(numEle):
+            ops.element('dispBeamColumn', i + 1, nodes[i], nodes[i + 1], ColTransfTag, 1)
+
+
+def column_transformation(p):
+    """Define geomTransf ColTransfTag of type ``p['transf']`` (default Linear)."""
+    transf = p.get('transf', 'Linear')
+    if transf not in TRANSFORMATIONS:
+        raise ValueError("unknown geometric transformation %r" % transf)
+    ops.geomTransf(transf, ColTransfTag)
+
+
+def _column_section(kind, p, d):
+    """Section ColSecTag of the aggregator or fiber column."""
+    if kind == 'aggregator':
+        ColMatTagFlex = 2
+        ColMatTagAxial = 3
+        EACol = d['Ec'] * d['ACol'] * p['AFactor']  # make axially stiff
+        EIColCrack = p['MyCol'] / p['PhiYCol']
+        ops.uniaxialMaterial('Steel01', ColMatTagFlex, p['MyCol'], EIColCrack, p['b'])
+        ops.uniaxialMaterial('Elastic', ColMatTagAxial, EACol)
+        ops.section('Aggregator', ColSecTag, ColMatTagAxial, 'P', ColMatTagFlex, 'Mz')
+    else:
+        sections.fiber_section(p, ColSecTag)
+
+
+def build_portal(kind, p):
+    """Create the kmscse002 portal frame with columns of the given kind.
+
+    Nodes 1 and 2 are the bases, 3 and 4 the tops of columns 1 (1-3) and 2
+    (2-4), and element 3 the elastic beam. ``elastic`` columns have the
+    kmscse002 properties (EFrame, AColFrame, IzColFrame); ``aggregator`` and
+    ``fiber`` columns use their section with the nonlinearBeamColumn or
+    Lobatto forceBeamColumn formulation.
+    """
+    build_frame(kind, p, 1, 1)
+
+
+def build_frame(kind, p, stories, bays):
+    """Create a regular ``stories`` x ``bays`` frame of kmscse002 members.
+
+    Every story is LCol high and every bay LBeam wide. Node ``1 + i + (bays + 1) * s``
+    is column line ``i`` at floor ``s`` (1 to bays + 1 the bases), elements
+    1 to (bays + 1) * stories the columns, story by story, and the elastic
+    beams follow, floor by floor. Every node above the base carries the
+    column mass; the portal frame is the 1 x 1 case. The columns use the
+    ``transf`` transformation, the beams a Linear one.
+    """
+    d = derived(p)
+    lines = bays + 1
+
+    ops.wipe()
+    ops.model('basic', '-ndm', 2, '-ndf', 3)
+
+    for s in range(stories + 1):
+        for i in range(lines):
+            ops.node(1 + i + lines * s, i * p['LBeam'], s * p['LCol'])
+    for i in range(lines):
+        ops.fix(1 + i, 1, 1, 1)
+    for node in range(1 + lines, 1 + lines * (stories + 1)):
+        ops.mass(node, d['Mass'], 0.0, 0.0)
+
+    column_transformation(p)
+    ops.geomTransf('Linear', BeamTransfTag)
+
+    columns = [(1 + i + lines * s, 1 + i + lines * (s + 1)) for s in range(stories) for i in range(lines)]
+    if kind == 'elastic':
+        for ele, (i, j) in enumerate(columns, 1):
+            ops.element('elasticBeamColumn', ele, i, j, p['AColFrame'], p['EFrame'], p['IzColFrame'], ColTransfTag)
+    elif kind in ('aggregator', 'fiber'):
+        if p['element'] not in ('nonlinearBeamColumn', 'forceBeamColumn') or p['integration'] != 'Lobatto':
+            raise ValueError("frame columns support nonlinearBeamColumn and Lobatto forceBeamColumn only")
+        _column_section(kind, p, d)
+        ops.beamIntegration('Lobatto', 1, ColSecTag, p['numIntgrPts'])
+        for ele, (i, j) in enumerate(columns, 1):
+            if p['element'] == 'nonlinearBeamColumn':
+                ops.element('nonlinearBeamColumn', ele, i, j, p['numIntgrPts'], ColSecTag, ColTransfTag)
+            else:
+                ops.element('forceBeamColumn', ele, i, j, ColTransfTag, 1)
+    else:
+        raise ValueError("unknown model kind %r" % kind)
+    for ele, (s, i) in enumerate(((s, i) for s in range(1, stories + 1) for i in range(bays)), len(columns) + 1):
+        node = 1 + i + lines * s
+        ops.element('elasticBeamColumn', ele, node, node + 1, p['ABeam'], p['EFrame'], p['IzBeam'], BeamTransfTag)
+
+
+def build(structure, kind, p):
+    """Build ``structure`` ('cantilever', 'portal' or 'frame') with ``kind`` columns.
+
+    Returns the layout the analysis drivers and recorders need: base and top
+    nodes, the control node, the base column element, the nodes that carry
+    the lateral and gravity loads, the beam gravity loads, every column
+    element and the height of the top node. A frame's top node is the roof
+    of its first column line, so its drifts are roof drift ratios.
+    """
+    if structure == 'cantilever':
+        build_column(kind, p)
+        numEle = int(p['numEle']) if p.get('element') == 'dispBeamColumn' else 1
+        return dict(baseNode=1, topNode=2, ctrlNode=2, colEle=1, loadNodes=(2,),
+                    PCol=derived(p)['PCol'], beamLoads=(), columns=tuple(range(1, numEle + 1)), height=p['LCol'])
+    if structure == 'portal':
+        build_portal(kind, p)
+        return dict(baseNode=1, topNode=3, ctrlNode=3, colEle=1, loadNodes=(3, 4),
+                    PCol=0.0, beamLoads=((3, p['wBeam']),), columns=(1, 2), height=p['LCol'])
+    if structure == 'frame':
+        stories, bays = int(p['stories']), int(p['bays'])
+        build_frame(kind, p, stories, bays)
+        lines = bays + 1
+        nColumns = lines * stories
+        return dict(baseNode=1, topNode=1 + lines * stories, ctrlNode=1 + lines * stories, colEle=1,
+                    loadNodes=tuple(range(1 + lines, 1 + lines * (stories + 1))), PCol=0.0,
+                    beamLoads=tuple((ele, p['wBeam']) for ele in range(nColumns + 1, nColumns + 1 + bays * stories)),
+                    columns=tuple(range(1, nColumns + 1)), height=stories * p['LCol'])
+    raise ValueError("unknown structure %r" % structure)
+
+
+def _hinge_column(kind, p, d):
+    """Elastic column (element 1, nodes 3-2) on a zeroLength base spring (element 2, nodes 1-3)."""
+    My, PhiY = yield_capacity(kind, p)
+    EI = My / PhiY
+    b = p['b'] if kind == 'aggregator' else p['Bs']
+    n = p['nHinge']
+
+    # spring and column in series reproduce EI; spring hardening scaled to match b
+    Ks = n * 3.0 * EI / p['LCol']
+    bs = b / (1.0 + n * (1.0 - b))
+    HingeMatTag = 4
+    ops.uniaxialMaterial('Steel01', HingeMatTag, My, Ks, bs)
+
+    ops.node(3, 0, 0)
+    ops.fix(3, 1, 1, 0)
+    ops.element('zeroLength', 2, 1, 3, '-mat', HingeMatTag, '-dir', 3)
+    EIElastic = EI * n / (n - 1.0)
+    ops.element('elasticBeamColumn', 1, 3, 2, d['ACol'] * p['AFactor'], d['Ec'], EIElastic / d['Ec'], ColTransfTag)
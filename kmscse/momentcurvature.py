@@ -0,0 +1,180 @@
+"""Moment-curvature and P-M interaction of the kmscse005 fiber section.
+
+Each axial load is analyzed on its own zeroLengthSection element, with the
+cases spread over a pool of worker processes. The curve at the gravity load
+can be idealized as the bilinear Steel01 response used by the kmscse004
+Aggregator section (MyCol, PhiYCol, b).
+
+    python -m kmscse.momentcurvature --axial-loads -2000 0 -4000 --calibrate
+"""
+import argparse
+import multiprocessing
+
+import numpy as np
+import openseespy.opensees as ops
+
+from kmscse import models, sections
+
+maxKDefault = 1.0e-3
+numIncrDefault = 200
+
+
+def _section_model(p):
+    ops.wipe()
+    ops.model('basic', '-ndm', 2, '-ndf', 3)
+    sections.fiber_section(p, models.ColSecTag)
+
+    # two nodes at the same location, axial load and moment act on node 2
+    ops.node(1, 0.0, 0.0)
+    ops.node(2, 0.0, 0.0)
+    ops.fix(1, 1, 1, 1)
+    ops.fix(2, 0, 1, 0)
+    ops.element('zeroLengthSection', 1, 1, 2, models.ColSecTag)
+
+
+def moment_curvature(p, P, maxK=maxKDefault, numIncr=numIncrDefault):
+    """Curvature and moment histories of the section under constant axial load ``P``.
+
+    ``P`` is negative in compression. The arrays stop at the last converged
+    increment if the section fails before reaching ``maxK``.
+    """
+    _section_model(p)
+
+    # constant axial load
+    ops.timeSeries('Constant', 1)
+    ops.pattern('Plain', 1, 1)
+    ops.load(2, P, 0.0, 0.0)
+
+    ops.integrator('LoadControl', 0.0)
+    ops.system('SparseGeneral', '-piv')
+    ops.test('NormUnbalance', 1.0e-9, 10)
+    ops.numberer('Plain')
+    ops.constraints('Plain')
+    ops.algorithm('Newton')
+    ops.analysis('Static')
+    if ops.analyze(1) != 0:
+        return np.zeros(0), np.zeros(0)
+
+    # reference moment, curvature controlled
+    ops.timeSeries('Linear', 2)
+    ops.pattern('Plain', 2, 2)
+    ops.load(2, 0.0, 0.0, 1.0)
+    ops.integrator('DisplacementControl', 2, 3, maxK / numIncr)
+
+    kappa = np.zeros(numIncr + 1)
+    M = np.zeros(numIncr + 1)
+    n = 1
+    while n <= numIncr and ops.analyze(1) == 0:
+        kappa[n] = ops.nodeDisp(2, 3)
+        M[n] = ops.getLoadFactor(2)
+        n += 1
+    return kappa[:n], M[:n]
+
+
+def _curve(args):
+    return moment_curvature(*args)
+
+
+def moment_curvature_curves(p, axialLoads, maxK=maxKDefault, numIncr=numIncrDefault, processes=None):
+    """Moment-curvature curves for every axial load in one call.
+
+    Returns (kappa, M, converged): two (len(axialLoads), numIncr + 1) arrays,
+    padded with NaN past a failed increment, and the number of converged
+    points of each curve.
+    """
+    tasks = [(p, float(P), maxK, numIncr) for P in axialLoads]
+    with multiprocessing.Pool(processes) as pool:
+        curves = pool.map(_curve, tasks)
+
+    kappa = np.full((len(tasks), numIncr + 1), np.nan)
+    M = np.full((len(tasks), numIncr + 1), np.nan)
+    converged = np.zeros(len(tasks), int)
+    for i, (k, m) in enumerate(curves):
+        kappa[i, :len(k)] = k
+        M[i, :len(m)] = m
+        converged[i] = len(k)
+    return kappa, M, converged
+
+
+def axial_capacity(p):
+    """Squash load (negative) and tensile capacity of the section, ignoring concrete tension."""
+    y, A, isSteel = sections.fiber_layout(p)
+    As = A[isSteel].sum()
+    Ac = A[~isSteel].sum() - As
+    return p['fc'] * Ac - p['Fy'] * As, p['Fy'] * As
+
+
+def interaction(p, numPoints=21, fraction=0.95, maxK=maxKDefault, numIncr=numIncrDefault, processes=None):
+    """P-M interaction surface from the peak moment of each moment-curvature curve.
+
+    Axial loads span ``fraction`` of the compressive to tensile capacity.
+    Returns (P, Mmax) arrays; Mmax is NaN where the section cannot carry P.
+    """
+    Pc, Pt = axial_capacity(p)
+    P = np.linspace(fraction * Pc, fraction * Pt, numPoints)
+    M = moment_curvature_curves(p, P, maxK, numIncr, processes)[1]
+    Mmax = np.full(numPoints, np.nan)
+    valid = ~np.isnan(M).all(1)
+    Mmax[valid] = np.nanmax(np.abs(M[valid]), 1)
+    return P, Mmax
+
+
+def bilinear(kappa, M, crackFraction=0.75):
+    """Equal-area bilinear idealization of a moment-curvature curve.
+
+    The elastic branch is the secant through ``crackFraction`` of the peak
+    moment; the hardening branch ends at the peak moment. Returns the
+    kmscse004 Steel01 parameters (MyCol, PhiYCol, b).
+    """
+    good = ~np.isnan(kappa)
+    kappa, M = kappa[good], M[good]
+    iu = np.argmax(M)
+    ku, Mu = kappa[iu], M[iu]
+    ic = np.argmax(M >= crackFraction * Mu)
+    K = M[ic] / kappa[ic]
+    area = np.sum(0.5 * (M[1:iu + 1] + M[:iu]) * np.diff(kappa[:iu + 1]))
+    My = (2.0 * area - Mu * ku) / (ku - Mu / K)
+    PhiY = My / K
+    b = (Mu - My) / (ku - PhiY) / K if ku > PhiY else 0.0
+    return float(My), float(PhiY), float(b)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--axial-loads', nargs='+', type=float, default=[-models.FIBER['Weight']],
+                        help="axial loads, negative in compression (default: gravity load)")
+    parser.add_argument('--max-curvature', type=float, default=maxKDefault)
+    parser.add_argument('--increments', type=int, default=numIncrDefault)
+    parser.add_argument('--interaction', type=int, metavar='N', help="also compute an N-point P-M surface")
+    parser.add_argument('--calibrate', action='store_true',
+                        help="print kmscse004 Steel01 parameters from the first axial load")
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--out', help="save the curves to this .npz file")
+    args = parser.parse_args(argv)
+
+    p = models.params('fiber')
+    kappa, M, converged = moment_curvature_curves(p, args.axial_loads, args.max_curvature, args.increments,
+                                                  args.processes)
+    for P, m, n in zip(args.axial_loads, M, converged):
+        print("P = %10.1f  points = %4d  Mmax = %12.1f" % (P, n, np.nanmax(m)))
+    results = dict(axialLoads=np.array(args.axial_loads), kappa=kappa, M=M)
+
+    if args.interaction:
+        PSurf, MSurf = interaction(p, args.interaction, maxK=args.max_curvature, numIncr=args.increments,
+                                   processes=args.processes)
+        for P, m in zip(PSurf, MSurf):
+            print("P-M: %12.1f %12.1f" % (P, m))
+        results.update(PSurface=PSurf, MSurface=MSurf)
+
+    if args.calibrate:
+        MyCol, PhiYCol, b = bilinear(kappa[0], M[0])
+        print("MyCol = %.0f" % MyCol)
+        print("PhiYCol = %.4g" % PhiYCol)
+        print("b = %.4g" % b)
+
+    if args.out:
+        np.savez(args.out, **results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Performance-regression tracker: timed benchmark runs against a per-revision history.
+
+The benchmark cases are the ten example analyses of kmscse.regression and a
+few generated frames (``models.build_frame``) run through kmscse.jobs, one
+after another so the timings are not skewed by competing processes. Each
+case is run ``--warmup`` times untimed and ``--repeat`` times timed; its
+summary (min, median, mean, standard deviation and the robust spread
+1.4826 * MAD of the wall times) is appended to a JSON history under the git
+revision and a fingerprint of the machine.
+
+A case has slowed down when its median exceeds the baseline median (the
+pooled samples of the last ``--baseline`` entries of this machine at other
+revisions, or at this one when the tree is modified) by more than
+``--threshold`` of it and by more than ``--sigma`` times the combined noise
+of the two medians. The exit status is 1 if any case has.
+
+    python -m kmscse.perftrack --repeat 7 --history perf.json
+    python -m kmscse.perftrack "kmscse005-*" "frame-*" --threshold 0.05 --no-record
+"""
+import argparse
+import collections
+import datetime
+import fnmatch
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import numpy as np
+
+from kmscse import jobs, regression
+
+# generated frames: larger models of the same members
+FRAMES = collections.OrderedDict([
+    ('frame-8x4-elastic-dynamic', jobs.make_job('elastic', dict(stories=8, bays=4), structure='frame')),
+    ('frame-8x4-aggregator-dynamic', jobs.make_job('aggregator', dict(stories=8, bays=4), structure='frame')),
+    ('frame-8x4-aggregator-pushover', jobs.make_job('aggregator', dict(stories=8, bays=4), 'pushover',
+                                                    structure='frame', drift=0.02)),
+    ('frame-4x3-fiber-dynamic', jobs.make_job('fiber', dict(stories=4, bays=3), structure='frame')),
+])
+
+CASES = collections.OrderedDict(regression.CASES, **FRAMES)
+HISTORY = 'perf-history.json'
+
+
+def revision():
+    """(git revision, whether the working tree has uncommitted changes), 'unknown' outside a checkout."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        head = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, text=True, check=True)
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return head.stdout.strip(), bool(status.stdout.strip())
+
+
+def machine():
+    """Description of this machine and software stack, and its short fingerprint."""
+    cpu = platform.processor()
+    try:
+        with open('/proc/cpuinfo') as f:
+            cpu = next((line.split(':', 1)[1].strip() for line in f if line.startswith('model name')), cpu)
+    except OSError:
+        pass
+    try:
+        from importlib.metadata import version
+        opensees = version('openseespy')
+    except Exception:
+        opensees = 'unknown'
+    info = dict(node=platform.node(), system=platform.system(), machine=platform.machine(), cpu=cpu,
+                cpus=os.cpu_count(), python=platform.python_version(), numpy=np.__version__, openseespy=opensees)
+    # the host name is reported but not hashed, so identical runners share a history
+    key = json.dumps({k: v for k, v in info.items() if k != 'node'}, sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:12], info
+
+
+def summary(samples):
+    samples = np.asarray(samples, float)
+    median = np.median(samples)
+    return dict(samples=samples.tolist(), min=float(samples.min()), median=float(median),
+                mean=float(samples.mean()), std=float(samples.std(ddof=1)) if len(samples) > 1 else 0.0,
+                spread=float(1.4826 * np.median(np.abs(samples - median))))
+
+
+def run_case(name):
+    """Result row of one case, unrecorded."""
+    if name in regression.CASES:
+        return regression.run_case(name)
+    return jobs.run_job(dict(CASES[name], name=name))
+
+
+def benchmark(names, repeat=5, warmup=1):
+    """Yield (name, summary of the wall times, result row of the last run) for each case."""
+    for name in names:
+        for _ in range(warmup):
+            run_case(name)
+        rows = [run_case(name) for _ in range(repeat)]
+        yield name, summary([row['seconds'] for row in rows]), rows[-1]
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def baseline(history, fingerprint, rev, dirty, name, entries=5):
+    """Pooled samples of ``name`` from the last ``entries`` runs of this machine at other revisions.
+
+    A modified working tree is compared with its own revision as committed, too.
+    """
+    samples = []
+    previous = [e for e in history if e['machine'] == fingerprint and name in e['cases'] and
+                (e['revision'], e['dirty']) != (rev, dirty) and (e['revision'] != rev or dirty)]
+    for entry in previous[-entries:]:
+        samples += entry['cases'][name]['samples']
+    return np.array(samples)
+
+
+def slowdown(current, base, threshold=0.1, sigma=3.0):
+    """(relative change of the median, whether it is a slowdown beyond the threshold and the noise)."""
+    if not len(base):
+        return np.nan, False
+    baseMedian = np.median(base)
+    baseSpread = 1.4826 * np.median(np.abs(base - baseMedian))
+    change = current['median'] - baseMedian
+    # standard error of a median is about 1.25 sigma / sqrt(n)
+    noise = 1.25 * np.hypot(baseSpread / np.sqrt(len(base)), current['spread'] / np.sqrt(len(current['samples'])))
+    return change / baseMedian, bool(change > threshold * baseMedian and change > sigma * noise)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('cases', nargs='*', default=['*'], help="case name patterns (default: all)")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per case")
+    parser.add_argument('--warmup', type=int, default=1, help="untimed runs per case before those")
+    parser.add_argument('--history', default=HISTORY, help="JSON history file")
+    parser.add_argument('--baseline', type=int, default=5, help="earlier entries pooled into the baseline")
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative slowdown of the median")
+    parser.add_argument('--sigma', type=float, default=3.0, help="slowdown in units of the median's noise")
+    parser.add_argument('--no-record', action='store_true', help="compare without appending to the history")
+    parser.add_argument('--list', action='store_true', help="list the cases and the history entries")
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if any(fnmatch.fnmatch(name, pattern) for pattern in args.cases)]
+    if not names:
+        parser.error("no case matches %s" % ' '.join(args.cases))
+    history = load_history(args.history)
+    rev, dirty = revision()
+    fingerprint, info = machine()
+    if args.list:
+        print("\n".join(names))
+        for entry in history:
+            print("%s %-12s %s%s %d cases" % (entry['date'], entry['machine'], entry['revision'][:12],
+                                               '+' if entry['dirty'] else '', len(entry['cases'])))
+        return
+
+    print("revision %s%s on %s (%s, %d CPUs)" % (rev[:12], ' (modified)' if dirty else '', fingerprint,
+                                                  info['cpu'], info['cpus']))
+    print("%-30s %9s %9s %9s %9s %8s %8s" % ('case', 'min', 'median', 'spread', 'baseline', 'change', 'steps'))
+    cases, slower = collections.OrderedDict(), []
+    for name, s, row in benchmark(names, args.repeat, args.warmup):
+        base = baseline(history, fingerprint, rev, dirty, name, args.baseline)
+        change, slow = slowdown(s, base, args.threshold, args.sigma)
+        print("%-30s %9.4f %9.4f %9.4f %9s %8s %8d%s" % (
+            name, s['min'], s['median'], s['spread'], '%.4f' % np.median(base) if len(base) else '-',
+            '%+.1f%%' % (100 * change) if len(base) else '-', row['steps'], '  SLOWER' if slow else ''))
+        cases[name] = dict(s, steps=row['steps'], iterations=row['iterations'], ok=row['ok'])
+        if slow:
+            slower.append(name)
+
+    if not args.no_record:
+        history.append(dict(revision=rev, dirty=dirty, machine=fingerprint, info=info, repeat=args.repeat,
+                            warmup=args.warmup, date=datetime.datetime.now().isoformat(timespec='seconds'),
+                            cases=cases))
+        with open(args.history, 'w') as f:
+            json.dump(history, f, indent=1)
+    print("%d cases, %d slower than the baseline%s" % (len(names), len(slower),
+                                                      ': ' + ' '.join(slower) if slower else ''))
+    sys.exit(1 if slower else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Vectorized post-processing of many runs at once.
+
+Histories of many runs are stacked into NaN-padded arrays with the step as
+axis 1, (nRuns, nSteps) for a channel or (nRuns, nSteps, nIP, 2) for the
+section forces and deformations, indexed by integration-point number so runs
+recording different sections (1 and 5 of a pushover, 1-5 of a ground motion)
+line up with NaN for the others, and every measure is computed for all runs
+in one pass: capacity curve, bilinear idealization (yield point, ductility),
+hysteretic energy per integration point, residual drift and peak demands.
+
+    python -m kmscse.postprocess kmscse005_.../Data other/Data --json summary.json
+"""
+import argparse
+import glob
+import json
+import os
+
+import numpy as np
+
+from kmscse import models
+
+
+def pad(histories):
+    """Stack a list of arrays of different lengths into a NaN-padded array; also return the lengths."""
+    lengths = np.array([len(h) for h in histories])
+    first = np.asarray(histories[0], float)
+    out = np.full((len(histories), lengths.max()) + first.shape[1:], np.nan)
+    for i, h in enumerate(histories):
+        out[i, :len(h)] = h
+    return out, lengths
+
+
+def _compact(*arrays):
+    """Move the NaN entries of every row to its end, keeping the order of the others."""
+    order = np.argsort(np.isnan(arrays[0]), axis=1, kind='stable')
+    return [np.take_along_axis(a, order, axis=1) for a in arrays]
+
+
+def capacity_curve(disp, force):
+    """Backbone of (nRuns, nSteps) histories: the steps at which |disp| reaches a new maximum.
+
+    Returns |disp| and |force| compacted to the front of each row, NaN-padded.
+    """
+    d = np.abs(disp)
+    reached = np.where(np.isnan(d), -np.inf, d)
+    onEnvelope = reached >= np.maximum.accumulate(reached, axis=1)
+    return _compact(np.where(onEnvelope, d, np.nan), np.where(onEnvelope, np.abs(force), np.nan))
+
+
+def bilinear(disp, force, crackFraction=0.75, ultimateFraction=0.8):
+    """Equal-area bilinear idealization of (nRuns, nSteps) capacity curves.
+
+    As momentcurvature.bilinear, from the origin: the elastic branch is the
+    secant through ``crackFraction`` of the peak force and the hardening
+    branch ends at the peak. The ultimate point is where the force drops
+    below ``ultimateFraction`` of the peak, or the last point. Returns a
+    dict of arrays Dy, Fy, K, b, Dpeak, Fpeak, Du and ductility = Du/Dy.
+    """
+    n = len(disp)
+    rows = np.arange(n)
+    d = np.concatenate([np.zeros((n, 1)), disp], axis=1)
+    F = np.concatenate([np.zeros((n, 1)), force], axis=1)
+    valid = ~np.isnan(F)
+    last = valid.sum(axis=1) - 1
+    Fv = np.where(valid, F, -np.inf)
+
+    iu = np.argmax(Fv, axis=1)
+    Du, Fu = d[rows, iu], F[rows, iu]
+    ic = np.argmax(Fv >= crackFraction * Fu[:, None], axis=1)
+    segment = 0.5 * (F[:, 1:] + F[:, :-1]) * np.diff(d, axis=1)
+    area = np.where(np.arange(segment.shape[1]) < iu[:, None], segment, 0.0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        K = F[rows, ic] / d[rows, ic]
+        Fy = (2.0 * area - Fu * Du) / (Du - Fu / K)
+        Dy = Fy / K
+        b = np.where(Du > Dy, (Fu - Fy) / (Du - Dy) / K, 0.0)
+
+    steps = np.arange(F.shape[1])
+    dropped = valid & (steps > iu[:, None]) & (F < ultimateFraction * Fu[:, None])
+    iult = np.where(dropped.any(axis=1), np.argmax(dropped, axis=1), last)
+    Dult = d[rows, iult]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ductility = Dult / Dy
+    return dict(Dy=Dy, Fy=Fy, K=K, b=b, Dpeak=Du, Fpeak=Fu, Du=Dult, ductility=ductility)
+
+
+def hysteretic_energy(force, deformation):
+    """Work done on each section: trapezoidal sum over the steps (axis 1) and the components (last axis).
+
+    With (nRuns, nSteps, nIP, 2) section histories this is the energy per
+    integration point, (nRuns, nIP), NaN for a section a run did not record.
+    """
+    work = 0.5 * (force[:, 1:] + force[:, :-1]) * np.diff(deformation, axis=1)
+    axes = (1, work.ndim - 1)
+    return np.where(np.isnan(work).all(axis=axes), np.nan, np.nansum(work, axis=axes))
+
+
+def residual_drift(drift, lengths, window=100):
+    """|mean| of the last ``window`` valid steps (all of a shorter run) of NaN-padded (nRuns, nSteps) drifts."""
+    index = np.maximum(lengths - window, 0)[:, None] + np.arange(window)
+    inRun = index < lengths[:, None]
+    values = np.take_along_axis(drift, np.minimum(index, drift.shape[1] - 1), axis=1)
+    return np.abs(np.nanmean(np.where(inRun, values, np.nan), axis=1))
+
+
+def peak_demands(histories):
+    """Peak absolute value over the steps of every channel in a dict of NaN-padded arrays."""
+    return {name: np.nanmax(np.abs(h), axis=1) for name, h in histories.items()}
+
+
+def read_data(dataDir):
+    """Histories of one run from the scripts' Data/*.out files, without the time column.
+
+    The section histories are (nSteps, nSections, 2) with the integration-point
+    numbers of their files in ``sections``.
+    """
+    data = {}
+    for name in ('DFree', 'DBase', 'RBase'):
+        path = os.path.join(dataDir, name + '.out')
+        if os.path.exists(path) and os.path.getsize(path):
+            data[name] = np.atleast_2d(np.loadtxt(path))[:, 1:]
+    for kind in ('ForceColSec', 'DefoColSec'):
+        paths = sorted(glob.glob(os.path.join(dataDir, kind + '*.out')),
+                       key=lambda p: int(os.path.basename(p)[len(kind):-4]))
+        if paths:
+            data[kind] = np.stack([np.atleast_2d(np.loadtxt(p))[:, 1:] for p in paths], axis=1)
+            data['sections'] = [int(os.path.basename(p)[len(kind):-4]) for p in paths]
+    return data
+
+
+def by_section(runs, kind):
+    """NaN-padded (nRuns, nSteps, nIP, 2) section histories, integration point i at index i - 1, and the lengths.
+
+    A run without ``sections`` numbers its sections 1, 2, ...
+    """
+    numbers = [np.asarray(r.get('sections', np.arange(1, r[kind].shape[1] + 1))) for r in runs]
+    nIP = max(n.max() for n in numbers)
+    histories = []
+    for r, n in zip(runs, numbers):
+        h = np.full((len(r[kind]), nIP) + r[kind].shape[2:], np.nan)
+        h[:, n - 1] = r[kind]
+        histories.append(h)
+    return pad(histories)
+
+
+def summarize(runs, LCol=models.COLUMN['LCol'], window=100):
+    """Per-run measures of a list of ``read_data``-style dicts, computed over all runs at once."""
+    drift, lengths = pad([r['DFree'][:, 0] / LCol for r in runs])
+    shear, _ = pad([r['RBase'][:, 0] for r in runs])
+    moment, _ = pad([r['RBase'][:, 2] for r in runs])
+    summary = bilinear(*capacity_curve(drift, shear))
+    summary['residualDrift'] = residual_drift(drift, lengths, window)
+    summary.update(peak_demands(dict(peakDrift=drift, peakShear=shear, peakMoment=moment)))
+    if all('ForceColSec' in r and 'DefoColSec' in r for r in runs):
+        force, _ = by_section(runs, 'ForceColSec')
+        deformation, _ = by_section(runs, 'DefoColSec')
+        summary['energy'] = hysteretic_energy(force, deformation)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('dirs', nargs='+', help="Data directories with DFree.out and RBase.out")
+    parser.add_argument('--LCol', type=float, default=models.COLUMN['LCol'])
+    parser.add_argument('--window', type=int, default=100, help="final steps averaged for the residual drift")
+    parser.add_argument('--json', help="also write the summary to this file")
+    args = parser.parse_args(argv)
+
+    summary = summarize([read_data(d) for d in args.dirs], args.LCol, args.window)
+    columns = ['peakDrift', 'residualDrift', 'Dy', 'Fy', 'ductility', 'peakMoment']
+    print("%-40s" % 'run' + "".join("%14s" % c for c in columns))
+    for i, d in enumerate(args.dirs):
+        print("%-40s" % d[-40:] + "".join("%14.5g" % summary[c][i] for c in columns))
+    if 'energy' in summary:
+        recorded = np.flatnonzero(~np.isnan(summary['energy']).all(axis=0))
+        print("hysteretic energy of the recorded sections:")
+        print("%-40s" % 'run' + "".join("%14s" % ('IP %d' % (i + 1)) for i in recorded))
+        for d, e in zip(args.dirs, summary['energy']):
+            print("%-40s" % d[-40:] + "".join("%14.5g" % v for v in e[recorded]))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({k: v.tolist() for k, v in summary.items()}, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
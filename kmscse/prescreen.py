@@ -0,0 +1,106 @@
+"""Multi-fidelity ground-motion runs for the kmscse004/kmscse005 columns.
+
+Each record/scale case is first run on a cheap elastic column whose flexural
+rigidity is the section's secant stiffness to yield (MyCol/PhiYCol for the
+aggregator section, the cracked first-yield point for the fiber section).
+If the peak base moment stays below ``yieldFraction`` of the yield moment the
+elastic result answers the case; otherwise the nonlinear column is run.
+
+    python -m kmscse.prescreen --model fiber --scales 1 50 200 400
+"""
+import argparse
+import json
+import multiprocessing
+
+import numpy as np
+
+from kmscse import analysis, models, records, recordstore
+
+
+def run_case(kind, p, accel, dt, GMfact, **gm):
+    """Build ``kind`` with parameters ``p``, apply gravity and run one record."""
+    models.build_column(kind, p)
+    analysis.gravity(models.derived(p)['PCol'])
+    return analysis.ground_motion(accel, dt, GMfact, **gm)
+
+
+def screen_case(kind, p, name, accel, dt, GMfact, yieldFraction=0.8, **gm):
+    """Answer one (record, scale) case at the lowest fidelity that is good enough.
+
+    Returns a row with the fidelity that answered it, the elastic
+    demand-to-yield ratio and the peaks of the reported result.
+    """
+    My, PhiY = models.yield_capacity(kind, p)
+    elastic = dict(models.COLUMN, **{k: p[k] for k in models.COLUMN})
+    elastic['EIeff'] = My / PhiY
+
+    result = run_case('elastic', elastic, accel, dt, GMfact, **gm)
+    demandRatio = np.abs(result['baseMoment']).max() / My if result['ok'] == 0 else np.inf
+    fidelity = 'elastic'
+    if demandRatio >= yieldFraction:
+        result = run_case(kind, p, accel, dt, GMfact, **gm)
+        fidelity = kind
+    return dict(
+        record=name,
+        GMfact=GMfact,
+        fidelity=fidelity,
+        demandRatio=float(demandRatio),
+        peakDrift=float(np.abs(result['disp']).max() / p['LCol']) if len(result['disp']) else np.nan,
+        peakMoment=float(np.abs(result['baseMoment']).max()) if len(result['baseMoment']) else np.nan,
+        ok=result['ok'],
+    )
+
+
+def _screen_stored(args):
+    kind, p, i, GMfact, yieldFraction, gm = args
+    name, accel, dt = recordstore.worker_store.record(i)
+    return screen_case(kind, p, name, accel, dt, GMfact, yieldFraction, **gm)
+
+
+def screen(kind, p, suite, scales, yieldFraction=0.8, processes=1, **gm):
+    """Screen every (record, scale) case of ``suite``, a list of (name, accel, dt).
+
+    With more than one process the suite is put in a shared-memory
+    RecordStore and the workers receive only record indices.
+    """
+    if processes == 1:
+        return [screen_case(kind, p, name, accel, dt, GMfact, yieldFraction, **gm)
+                for name, accel, dt in suite for GMfact in scales]
+
+    with recordstore.RecordStore(suite) as store:
+        tasks = [(kind, p, i, GMfact, yieldFraction, gm) for i in range(len(store)) for GMfact in scales]
+        with multiprocessing.Pool(processes, recordstore.attach_worker, (store.handle(),)) as pool:
+            return pool.map(_screen_stored, tasks)
+
+
+def print_report(rows):
+    print("%-12s %10s %-11s %8s %10s %12s %4s" % ('record', 'GMfact', 'fidelity', 'M/My', 'drift', 'Mbase', 'ok'))
+    for r in rows:
+        print("%-12s %10.4g %-11s %8.3f %10.3e %12.4g %4d" % (
+            r['record'], r['GMfact'], r['fidelity'], r['demandRatio'], r['peakDrift'], r['peakMoment'], r['ok']))
+    nonlinear = sum(r['fidelity'] != 'elastic' for r in rows)
+    print("%d of %d cases needed the nonlinear model" % (nonlinear, len(rows)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--model', choices=['aggregator', 'fiber'], default='aggregator')
+    parser.add_argument('--records', nargs='*', help="acceleration files (default: BM68elc.acc)")
+    parser.add_argument('--dt', type=float, default=records.DEFAULT_DT, help="record time step")
+    parser.add_argument('--scales', nargs='+', type=float, default=[1.0], help="GMfact values")
+    parser.add_argument('--yield-fraction', type=float, default=0.8)
+    parser.add_argument('--tmax', type=float, default=10.0, help="TmaxAnalysis")
+    parser.add_argument('--processes', type=int, default=1, help="worker processes (0: one per CPU)")
+    parser.add_argument('--json', help="also write the report rows to this file")
+    args = parser.parse_args(argv)
+
+    rows = screen(args.model, models.params(args.model), records.read_records(args.records, args.dt),
+                  args.scales, args.yield_fraction, args.processes or None, TmaxAnalysis=args.tmax, verbose=False)
+    print_report(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""Live progress, throughput and ETA for the kmscse batch runners.
+
+A ``Monitor`` in the coordinating process listens on a localhost UDP port
+and publishes it in the ``KMSCSE_PROGRESS`` environment variable, which pool
+workers and job subprocesses inherit. While it is set, kmscse.jobs wraps
+every run in a ``Reporter``: a telemetry trace (see kmscse.telemetry) that
+sends the simulated time against TmaxAnalysis (pushover displacement against
+Dmax), steps per second and the fallback-algorithm events of its run as a
+small datagram every ``interval`` seconds and when the run ends. Datagrams
+are fire-and-forget, so a busy or absent coordinator never slows a worker.
+
+The monitor aggregates them into completed and running jobs, throughput in
+runs and steps per second, an ETA from the fraction of the work done, and
+stragglers: running jobs whose projected duration (elapsed time over
+fraction done) exceeds ``straggler`` times the median of the finished ones.
+
+    with progress.Monitor(total=len(jobList)) as monitor:
+        rows = specs.run(jobList, processes=4)
+    print(monitor.status())
+
+    python -m kmscse.specs fiber.toml --processes 4 --progress
+    python -m kmscse.scheduler --model fiber --scales 1000 2000 3000 --progress
+"""
+import collections
+import itertools
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+from kmscse import analysis
+
+ENV = 'KMSCSE_PROGRESS'
+
+# algorithms of the converged steps that count as fallback events
+FALLBACKS = frozenset(label for label, test, algorithm in analysis.fallbacks())
+
+# numbers the runs of this process, so repeated jobs stay apart
+_runs = itertools.count()
+
+
+def job_name(job):
+    """A short label for a job: its name, else model, record and scale."""
+    if job.get('name'):
+        return str(job['name'])
+    record = job.get('record')
+    record = os.path.basename(str(record).split('::')[-1]) if record is not None else 'BM68elc.acc'
+    if job.get('study') == 'pushover':
+        return '%s pushover %g' % (job['model'], job.get('drift', 0.05))
+    return '%s %s x%g' % (job['model'], record, job.get('GMfact', 1.0))
+
+
+class Reporter:
+    """Telemetry trace that streams a run's progress to the Monitor at ``address``.
+
+    ``target`` is TmaxAnalysis or the pushover Dmax; every converged step
+    advances the run by its step size. Another ``trace`` is passed every step
+    too.
+    """
+
+    def __init__(self, address, name, target, unit='s', trace=None, interval=0.5):
+        self.address = address
+        self.trace = trace
+        self.interval = interval
+        self.message = dict(job=name, pid=os.getpid(), run=next(_runs), target=target, unit=unit, value=0.0,
+                            steps=0, fallbacks=0, failures=0, seconds=0.0, event='start')
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.start = self.sent = time.perf_counter()
+        self._send()
+
+    def record(self, t, seconds, iterations, norm, algorithm, size, ok):
+        if self.trace is not None:
+            self.trace.record(t, seconds, iterations, norm, algorithm, size, ok)
+        m = self.message
+        if ok == 0:
+            m['steps'] += 1
+            m['value'] += size
+            m['fallbacks'] += algorithm in FALLBACKS
+        else:
+            m['failures'] += 1
+        now = time.perf_counter()
+        if now - self.sent >= self.interval:
+            m['event'] = 'step'
+            self._send(now)
+
+    def done(self, ok):
+        self.message.update(event='done', ok=ok)
+        self._send()
+        self.socket.close()
+
+    def _send(self, now=None):
+        now = now or time.perf_counter()
+        self.message['seconds'] = now - self.start
+        self.sent = now
+        try:
+            self.socket.sendto(json.dumps(self.message).encode(), self.address)
+        except OSError:
+            pass  # progress is best effort
+
+
+def reporter(job, target, unit='s', trace=None):
+    """A Reporter for ``job`` when a Monitor is listening (``KMSCSE_PROGRESS`` is set), else None."""
+    address = os.environ.get(ENV)
+    if not address:
+        return None
+    host, port = address.rsplit(':', 1)
+    return Reporter((host, int(port)), job_name(job), target, unit, trace)
+
+
+class Monitor:
+    """Collects the Reporter datagrams of a batch and prints a status line every ``display`` seconds.
+
+    ``total`` is the number of jobs in the batch, if known, for the ETA; a
+    ``display`` of None prints nothing. Use as a context manager around the
+    batch runner; the environment variable is set while it is open.
+    """
+
+    def __init__(self, total=None, display=2.0, straggler=3.0, stream=sys.stderr):
+        self.total = total
+        self.display = display
+        self.straggler = straggler
+        self.stream = stream
+        self.jobs = collections.OrderedDict()  # (pid, run) -> last message with its arrival time
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.settimeout(0.1)
+        self.address = '127.0.0.1:%d' % self.socket.getsockname()[1]
+        self.finished = None
+
+    def __enter__(self):
+        self.previous = os.environ.get(ENV)
+        os.environ[ENV] = self.address
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._listen, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self._drain()
+        self.finished = time.perf_counter()
+        if self.previous is None:
+            os.environ.pop(ENV, None)
+        else:
+            os.environ[ENV] = self.previous
+        self.socket.close()
+        if self.display is not None:
+            print(self.line(), file=self.stream)
+
+    def _listen(self):
+        shown = time.perf_counter()
+        while not self.stopped.is_set():
+            try:
+                self._receive(self.socket.recv(65536))
+            except socket.timeout:
+                pass
+            now = time.perf_counter()
+            if self.display is not None and now - shown >= self.display:
+                print(self.line(), file=self.stream, flush=True)
+                shown = now
+
+    def _drain(self):
+        self.socket.setblocking(False)
+        while True:
+            try:
+                self._receive(self.socket.recv(65536))
+            except OSError:
+                return
+
+    def _receive(self, data):
+        message = json.loads(data)
+        message['received'] = time.perf_counter()
+        with self.lock:
+            self.jobs[message['pid'], message['run']] = message
+
+    def status(self):
+        """Counts, throughput, ETA and stragglers of the batch so far (or in all, once closed)."""
+        now = self.finished or time.perf_counter()
+        elapsed = now - self.started
+        with self.lock:
+            messages = list(self.jobs.values())
+        done = [m for m in messages if m['event'] == 'done']
+        running = [m for m in messages if m['event'] != 'done']
+        for m in running:
+            # time since the last message counts too, a run stuck in one step sends nothing
+            m['elapsed'] = m['seconds'] + now - m['received']
+            m['fraction'] = min(m['value'] / m['target'], 1.0) if m['target'] else 0.0
+            m['projected'] = m['elapsed'] / m['fraction'] if m['fraction'] > 0 else np.inf
+        work = len(done) + sum(m['fraction'] for m in running)
+        rate = work / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - work) / rate if self.total is not None and rate > 0 else None
+        durations = [m['seconds'] for m in done]
+        typical = np.median(durations) if durations else None
+        stragglers = []
+        if typical:
+            stragglers = sorted(((m['projected'] / typical, m) for m in running
+                                 if max(m['projected'], m['elapsed']) > self.straggler * typical and
+                                 m['elapsed'] > typical), key=lambda item: -item[0])
+        steps = sum(m['steps'] for m in messages)
+        return dict(
+            elapsed=elapsed,
+            done=len(done),
+            failed=sum(m.get('ok', 0) != 0 for m in done),
+            running=len(running),
+            total=self.total,
+            runsPerSecond=len(done) / elapsed if elapsed > 0 else 0.0,
+            stepsPerSecond=steps / elapsed if elapsed > 0 else 0.0,
+            fallbacks=sum(m['fallbacks'] for m in messages),
+            failures=sum(m['failures'] for m in messages),
+            eta=eta,
+            stragglers=[dict(job=m['job'], pid=m['pid'], elapsed=m['elapsed'], fraction=m['fraction'],
+                             slowdown=ratio) for ratio, m in stragglers],
+        )
+
+    def line(self, s=None):
+        """One status line."""
+        s = s or self.status()
+        text = "%d%s done (%d failed), %d running, %.2f runs/s, %.0f steps/s, %d fallbacks, ETA %s" % (
+            s['done'], '/%d' % s['total'] if s['total'] is not None else '', s['failed'], s['running'],
+            s['runsPerSecond'], s['stepsPerSecond'], s['fallbacks'],
+            '%.0f s' % s['eta'] if s['eta'] is not None else '-')
+        if s['stragglers']:
+            text += "; stragglers: " + ", ".join("%s (%.0f%% after %.0f s)" % (
+                m['job'], 100 * m['fraction'], m['elapsed']) for m in s['stragglers'][:3])
+        return text
@@ -0,0 +1,235 @@
+"""Reduced recording modes for the kmscse004/005 recorder set.
+
+Each quantity of the example scripts (DFree, DBase, RBase, Drift, FCol,
+ForceColSec{i}, DefoColSec{i}) gets its own mode:
+
+    all          every step, as the scripts record now
+    envelope     running min, max and abs-max only (EnvelopeNode/EnvelopeElement)
+    every:k      every k-th step
+    event:n      n steps either side of the peak drift
+
+``define_recorders`` issues native OpenSees file recorders for the modes
+OpenSees supports itself (Node/Element recorders with ``-time``, their
+Envelope variants and ``-dT``), so no Python runs between the steps.
+``Recorder`` keeps the data in memory and is passed as ``recorder=`` to
+``analysis.pushover`` or ``analysis.ground_motion``; ``split`` leaves it only
+what OpenSees cannot record: event windows, Drift (OpenSeesPy 3.7 fails to
+create Drift recorders and has no Envelope one) and every:k without a time
+step. kmscse.jobs runs its ``recorders`` modes this way, and the kmscse004/005
+scripts select a mode per quantity in their recorder definitions.
+
+    python -m kmscse.recording --model fiber --GMfact 3000 --mode "*=envelope" DFree=every:10 Drift=event:50 --out Data
+"""
+import argparse
+import collections
+import fnmatch
+import os
+import time
+
+import numpy as np
+import openseespy.opensees as ops
+
+from kmscse import analysis, models, records
+
+
+def quantities(numIntgrPts, baseNode=1, topNode=2, colEle=1):
+    """Name -> (OpenSees recorder arguments, function reading the current values)."""
+    LCol = lambda: ops.nodeCoord(topNode, 2) - ops.nodeCoord(baseNode, 2)
+
+    def reaction():
+        ops.reactions()
+        return ops.nodeReaction(baseNode)
+
+    q = collections.OrderedDict()
+    q['DFree'] = (('Node', '-node', topNode, '-dof', 1, 2, 3, 'disp'), lambda: ops.nodeDisp(topNode))
+    q['DBase'] = (('Node', '-node', baseNode, '-dof', 1, 2, 3, 'disp'), lambda: ops.nodeDisp(baseNode))
+    q['RBase'] = (('Node', '-node', baseNode, '-dof', 1, 2, 3, 'reaction'), reaction)
+    q['Drift'] = (('Drift', '-iNode', baseNode, '-jNode', topNode, '-dof', 1, '-perpDirn', 2),
+                  lambda: [(ops.nodeDisp(topNode, 1) - ops.nodeDisp(baseNode, 1)) / LCol()])
+    q['FCol'] = (('Element', '-ele', colEle, 'globalForce'), lambda: ops.eleResponse(colEle, 'globalForce'))
+    for i in range(1, numIntgrPts + 1):
+        q['ForceColSec%d' % i] = (('Element', '-ele', colEle, 'section', i, 'force'),
+                                  lambda i=i: ops.sectionForce(colEle, i))
+        q['DefoColSec%d' % i] = (('Element', '-ele', colEle, 'section', i, 'deformation'),
+                                 lambda i=i: ops.sectionDeformation(colEle, i))
+    return q
+
+
+def parse_mode(spec):
+    """'every:10' -> ('every', 10); 'envelope' -> ('envelope', None)."""
+    name, _, n = spec.partition(':')
+    if name not in ('all', 'envelope', 'every', 'event') or bool(n) != (name in ('every', 'event')):
+        raise ValueError("unknown recording mode %r" % spec)
+    return name, int(n) if n else None
+
+
+def resolve(modes, names):
+    """Mode of every quantity in ``names`` from ``{pattern: spec}``; later patterns win, default 'all'."""
+    resolved = collections.OrderedDict((name, ('all', None)) for name in names)
+    for pattern, spec in modes.items():
+        for name in fnmatch.filter(names, pattern):
+            resolved[name] = parse_mode(spec)
+    return resolved
+
+
+class Recorder:
+    """In-memory recorders with a reduced mode per quantity.
+
+    ``record()`` is called after every converged step; ``results()`` returns
+    a dict of arrays per quantity whose first column is the time, as in the
+    scripts' ``-time`` output. Envelopes are 3 rows (min, max, abs-max) of a
+    (time, value) pair per component, as EnvelopeNode/EnvelopeElement write
+    them with ``-time``. Only ``names`` are recorded, if given.
+    """
+
+    def __init__(self, modes=None, numIntgrPts=5, names=None, **nodes):
+        q = quantities(numIntgrPts, **nodes)
+        self.drift = q['Drift'][1]
+        self.quantities = collections.OrderedDict((name, q[name]) for name in (q if names is None else names))
+        self.modes = resolve(modes or {}, list(self.quantities))
+        self.step = 0
+        self.rows = {name: [] for name, (mode, n) in self.modes.items() if mode in ('all', 'every')}
+        self.envelopes = {}
+        self.windows = {name: [] for name, (mode, n) in self.modes.items() if mode == 'event'}
+        self.before = {name: collections.deque(maxlen=n) for name, (mode, n) in self.modes.items()
+                       if mode == 'event'}
+        self.after = dict.fromkeys(self.windows, 0)
+        self.peak = -1.0
+
+    def record(self):
+        t = ops.getTime()
+        trigger = False
+        if self.windows:
+            drift = abs(self.drift()[0])
+            trigger = drift > self.peak
+            self.peak = max(self.peak, drift)
+        for name, (mode, n) in self.modes.items():
+            if mode == 'every' and self.step % n:
+                continue
+            values = self.quantities[name][1]()
+            if mode == 'envelope':
+                # a few components per quantity: plain floats are cheaper than numpy calls every step
+                if name not in self.envelopes:
+                    self.envelopes[name] = [[[t, x] for x in values], [[t, x] for x in values],
+                                            [[t, abs(x)] for x in values]]
+                    continue
+                low, high, peak = self.envelopes[name]
+                for j, x in enumerate(values):
+                    if x < low[j][1]:
+                        low[j] = [t, x]
+                    if x > high[j][1]:
+                        high[j] = [t, x]
+                    if abs(x) > peak[j][1]:
+                        peak[j] = [t, abs(x)]
+                continue
+            row = [t] + list(values)
+            if mode == 'event':
+                if trigger:
+                    # a new peak restarts the window from the steps before it
+                    self.windows[name] = list(self.before[name]) + [row]
+                    self.after[name] = n
+                elif self.after[name]:
+                    self.windows[name].append(row)
+                    self.after[name] -= 1
+                self.before[name].append(row)
+            else:
+                self.rows[name].append(row)
+        self.step += 1
+
+    def results(self):
+        out = {name: np.array(rows) for name, rows in self.rows.items()}
+        out.update((name, np.array(rows).reshape(3, -1)) for name, rows in self.envelopes.items())
+        out.update((name, np.array(rows)) for name, rows in self.windows.items())
+        return out
+
+    def save(self, dataDir):
+        """Write every quantity to ``dataDir/<name>.out`` as the scripts' recorders do."""
+        os.makedirs(dataDir, exist_ok=True)
+        for name, values in self.results().items():
+            np.savetxt(os.path.join(dataDir, name + '.out'), np.atleast_2d(values), fmt='%.6g')
+
+
+def split(modes, numIntgrPts=5, dt=None):
+    """(quantities OpenSees records natively, quantities left to ``Recorder``) for ``modes``."""
+    native, hooked = [], []
+    for name, (mode, n) in resolve(modes, list(quantities(numIntgrPts))).items():
+        if mode == 'event' or name == 'Drift' or (mode == 'every' and dt is None):
+            hooked.append(name)
+        else:
+            native.append(name)
+    return native, hooked
+
+
+def define_recorders(modes, dataDir, numIntgrPts=5, dt=None, names=None, precision=None, **nodes):
+    """Issue native OpenSees file recorders for ``modes``, for ``names`` or every quantity.
+
+    ``envelope`` uses EnvelopeNode/EnvelopeElement and ``every:k`` records
+    every ``k*dt`` of analysis time, so it needs the time step of a transient
+    analysis; ``event`` has no native counterpart, use ``Recorder``.
+    ``precision`` is the number of significant digits written (OpenSees: 6).
+    """
+    os.makedirs(dataDir, exist_ok=True)
+    q = quantities(numIntgrPts, **nodes)
+    for name, (mode, n) in resolve(modes, list(q if names is None else names)).items():
+        args = list(q[name][0])
+        options = ['-file', os.path.join(dataDir, name + '.out'), '-time']
+        if precision is not None:
+            options += ['-precision', precision]
+        if mode == 'envelope':
+            if args[0] == 'Drift':
+                raise ValueError("OpenSees has no envelope Drift recorder")
+            args[0] = 'Envelope' + args[0]
+        elif mode == 'every':
+            if dt is None:
+                raise ValueError("every:k recording needs the analysis time step")
+            options += ['-dT', n * dt]
+        elif mode == 'event':
+            raise ValueError("event capture of %s needs the in-memory Recorder" % name)
+        ops.recorder(args[0], *options, *args[1:])
+
+
+def load(dataDir, names):
+    """The arrays written by ``define_recorders`` for ``names``, once the recorders are closed (``ops.wipe``)."""
+    return {name: np.loadtxt(os.path.join(dataDir, name + '.out'), ndmin=2) for name in names}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--model', choices=['aggregator', 'fiber'], default='fiber')
+    parser.add_argument('--study', choices=['pushover', 'dynamic'], default='dynamic')
+    parser.add_argument('--GMfact', type=float, default=1.0)
+    parser.add_argument('--mode', nargs='*', default=[], metavar='PATTERN=MODE',
+                        help="e.g. '*=envelope' DFree=every:10 Drift=event:50")
+    parser.add_argument('--out', help="write the recorded quantities to this directory")
+    args = parser.parse_args(argv)
+
+    p = models.params(args.model)
+    modes = collections.OrderedDict(spec.split('=', 1) for spec in args.mode)
+    full, reduced = Recorder(numIntgrPts=p['numIntgrPts']), Recorder(modes, p['numIntgrPts'])
+    for recorder in (full, reduced):
+        models.build_column(args.model, p)
+        analysis.gravity(models.derived(p)['PCol'])
+        start = time.perf_counter()
+        if args.study == 'pushover':
+            analysis.pushover(0.05 * p['LCol'], 0.001 * p['LCol'], p['Weight'], verbose=False, recorder=recorder)
+        else:
+            name, accel, dt = records.read_record(records.DEFAULT_RECORD)
+            analysis.ground_motion(accel, dt, args.GMfact, verbose=False, recorder=recorder)
+        recorder.seconds = time.perf_counter() - start
+        ops.wipe()
+
+    print("%-14s %-10s %8s %8s" % ('quantity', 'mode', 'values', 'of'))
+    fullResults, reducedResults = full.results(), reduced.results()
+    for name, (mode, n) in reduced.modes.items():
+        print("%-14s %-10s %8d %8d" % (name, mode + (':%d' % n if n else ''),
+                                        reducedResults[name].size, fullResults[name].size))
+    kept = sum(v.size for v in reducedResults.values())
+    total = sum(v.size for v in fullResults.values())
+    print("%d of %d values kept (%.1fx less), analysis %.3f s vs %.3f s with every step" % (
+        kept, total, total / max(kept, 1), reduced.seconds, full.seconds))
+    if args.out:
+        reduced.save(args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""Ground-motion records: plain acceleration files such as the bundled
+``BM68elc.acc``, PEER files and records inside zip and tar archives.
+
+Record libraries ship as thousands of PEER files (``*.AT2``) inside zip or
+(compressed) tar archives. ``iter_records`` reads them lazily: each member
+is decompressed as a stream, its header parsed for NPTS and DT and its
+values converted chunk by chunk into one array, so neither the archive nor
+the library is extracted to disk or held in memory. Both PEER header styles
+are read:
+
+    PEER NGA STRONG MOTION DATABASE RECORD
+    IMPERIAL VALLEY 10/15/79 2316, EL CENTRO ARRAY #6, 230
+    ACCELERATION TIME SERIES IN UNITS OF G
+    NPTS=  3930, DT=   .0050 SEC            (older files: "3930   .00500   NPTS, DT")
+
+A record inside an archive is referred to as ``archive.zip::dir/name.AT2``,
+which ``read_record`` accepts wherever a path is expected.
+"""
+import fnmatch
+import os
+import re
+import tarfile
+import zipfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RECORD = os.path.join(ROOT, 'kmscse004_2DNonlinearCantileverColumn_UniaxialInelasticSection', 'BM68elc.acc')
+DEFAULT_DT = 0.01  # time step of BM68elc.acc
+
+PATTERNS = ('*.at2', '*.acc')  # record file names, matched case-insensitively
+SEPARATOR = '::'  # between an archive and a member in a record reference
+
+NGA_HEADER = re.compile(rb'NPTS\s*=\s*(\d+)\s*,?\s*DT\s*=\s*([-+.\dEe]+)', re.I)
+OLD_HEADER = re.compile(rb'^\s*(\d+)\s+([-+.\dEe]+)\s+NPTS\s*,\s*DT', re.I)
+HEADER_LINES = 4
+EXPONENT = bytes.maketrans(b'dD', b'eE')  # Fortran double-precision exponents, 1.0D-03
+
+
+def parse(stream, name, dt=DEFAULT_DT, chunk=1 << 16):
+    """(name, accel, dt) from a binary stream of a PEER or plain acceleration file.
+
+    The values are converted ``chunk`` bytes at a time, into an array of
+    NPTS values preallocated from the header when there is one; a file
+    without a header takes ``dt``. Fortran ``D`` exponents are read as ``E``.
+    """
+    lines = []
+    npts = None
+    for _ in range(HEADER_LINES):
+        lines.append(stream.readline())
+        match = NGA_HEADER.search(lines[-1]) or OLD_HEADER.search(lines[-1])
+        if match:
+            npts, dt = int(match.group(1)), float(match.group(2))
+            break
+    if npts is None:
+        try:
+            np.array(lines[0].translate(EXPONENT).split(), float)
+        except ValueError:
+            raise ValueError("%s: no NPTS and DT in the PEER header" % name) from None
+        pending = b''.join(lines)  # no header, these are values
+    else:
+        pending = b''
+
+    accel = np.empty(npts) if npts is not None else None
+    pieces = []
+    n = 0
+    while True:
+        data = stream.read(chunk)
+        text = pending + data
+        pending = b''
+        if data and not text[-1:].isspace():
+            # a number cut by the chunk boundary goes with the next chunk
+            cut = len(text.rstrip(b'0123456789.eEdD+-'))
+            text, pending = text[:cut], text[cut:]
+        values = np.array(text.translate(EXPONENT).split(), float)
+        if accel is None:
+            pieces.append(values)
+        else:
+            take = min(len(values), npts - n)
+            accel[n:n + take] = values[:take]
+            n += take
+        if not data:
+            break
+    if accel is None:
+        return name, np.concatenate(pieces), dt
+    if n < npts:
+        raise ValueError("%s: %d values, NPTS=%d" % (name, n, npts))
+    return name, accel, dt
+
+
+def _name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _matches(path, patterns):
+    base = os.path.basename(path).lower()
+    return any(fnmatch.fnmatch(base, pattern.lower()) for pattern in patterns)
+
+
+def read_record(path, dt=DEFAULT_DT):
+    """Return (name, accel, dt) of a record file or ``archive::member`` reference.
+
+    ``dt`` is the time step of files without a PEER header.
+    """
+    source, _, member = path.partition(SEPARATOR)
+    if not member:
+        with open(source, 'rb') as stream:
+            return parse(stream, _name(source), dt)
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive, archive.open(member) as stream:
+            return parse(stream, _name(member), dt)
+    with tarfile.open(source, 'r:*') as archive:
+        return parse(archive.extractfile(member), _name(member), dt)
+
+
+def read_records(paths, dt=DEFAULT_DT):
+    """Read every record in ``paths``, defaulting to the bundled El Centro record."""
+    return [read_record(path, dt) for path in (paths or [DEFAULT_RECORD])]
+
+
+def iter_records(sources, patterns=PATTERNS, dt=DEFAULT_DT, chunk=1 << 16):
+    """Lazily yield (reference, (name, accel, dt)) for the records of every archive or file in ``sources``.
+
+    Zip members are opened one at a time; tar archives (also .tar.gz, .bz2,
+    .xz) are read front to back as a stream, without seeking.
+    """
+    for source in sources:
+        if zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and _matches(info.filename, patterns):
+                        with archive.open(info) as stream:
+                            yield source + SEPARATOR + info.filename, parse(stream, _name(info.filename), dt, chunk)
+        elif tarfile.is_tarfile(source):
+            with tarfile.open(source, 'r|*') as archive:
+                for info in archive:
+                    if info.isfile() and _matches(info.name, patterns):
+                        yield source + SEPARATOR + info.name, parse(archive.extractfile(info), _name(info.name), dt,
+                                                                    chunk)
+        else:
+            with open(source, 'rb') as stream:
+                yield source, parse(stream, _name(source), dt, chunk)
+
+
+def spectral_acceleration(accel, dt, periods, xDamp=0.05):
+    """Pseudo-spectral acceleration of ``accel`` at ``periods``, in the units of ``accel``.
+
+    Exact piecewise-linear (Nigam-Jennings) SDOF recurrence, vectorized over
+    the periods.
+    """
+    T = np.atleast_1d(np.asarray(periods, float))
+    wn = 2 * np.pi / T
+    root = np.sqrt(1 - xDamp ** 2)
+    wd = wn * root
+    e, s, c = np.exp(-xDamp * wn * dt), np.sin(wd * dt), np.cos(wd * dt)
+    k = wn ** 2
+    A = e * (xDamp / root * s + c)
+    B = e * s / wd
+    C = (2 * xDamp / (wn * dt) + e * (((1 - 2 * xDamp ** 2) / (wd * dt) - xDamp / root) * s
+                                      - (1 + 2 * xDamp / (wn * dt)) * c)) / k
+    D = (1 - 2 * xDamp / (wn * dt) + e * ((2 * xDamp ** 2 - 1) / (wd * dt) * s + 2 * xDamp / (wn * dt) * c)) / k
+    Av = -e * wn / root * s
+    Bv = e * (c - xDamp / root * s)
+    Cv = (-1 / dt + e * ((wn / root + xDamp / (dt * root)) * s + c / dt)) / k
+    Dv = (1 - e * (xDamp / root * s + c)) / (k * dt)
+
+    p = -np.asarray(accel, float)
+    u, v, peak = np.zeros_like(T), np.zeros_like(T), np.zeros_like(T)
+    for i in range(len(p) - 1):
+        u, v = A * u + B * v + C * p[i] + D * p[i + 1], Av * u + Bv * v + Cv * p[i] + Dv * p[i + 1]
+        np.maximum(peak, np.abs(u), out=peak)
+    return k * peak
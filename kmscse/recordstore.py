@@ -0,0 +1,83 @@
+"""Shared-memory ground-motion store for worker pools.
+
+The parent loads a record suite once into a single
+``multiprocessing.shared_memory`` block with an index of names, offsets,
+lengths and time steps. Workers attach by name and get zero-copy NumPy views,
+so a task only needs to carry a record index and a scale factor.
+
+    with RecordStore(records.read_records(paths)) as store:
+        with multiprocessing.Pool(initializer=attach_worker, initargs=(store.handle(),)) as pool:
+            pool.map(task, [(i, GMfact) for i in range(len(store))])
+"""
+from multiprocessing import shared_memory, util
+
+import numpy as np
+
+
+class RecordStore:
+    """Records packed end to end in one float64 shared-memory block."""
+
+    def __init__(self, suite=None, handle=None):
+        if handle is None:
+            names = [name for name, accel, dt in suite]
+            lengths = np.array([len(accel) for name, accel, dt in suite], np.int64)
+            offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+            dts = np.array([dt for name, accel, dt in suite], float)
+            self.shm = shared_memory.SharedMemory(create=True, size=max(int(lengths.sum()), 1) * 8)
+            self.owner = True
+            self.data = np.ndarray((int(lengths.sum()),), float, buffer=self.shm.buf)
+            for (name, accel, dt), offset, length in zip(suite, offsets, lengths):
+                self.data[offset:offset + length] = accel
+        else:
+            shmName, names, offsets, lengths, dts = handle
+            self.shm = shared_memory.SharedMemory(name=shmName)
+            self.owner = False
+            offsets, lengths, dts = np.asarray(offsets), np.asarray(lengths), np.asarray(dts)
+            self.data = np.ndarray((int(lengths.sum()),), float, buffer=self.shm.buf)
+        self.names, self.offsets, self.lengths, self.dts = list(names), offsets, lengths, dts
+
+    def handle(self):
+        """Small picklable description workers pass to ``RecordStore(handle=...)``."""
+        return (self.shm.name, self.names, self.offsets.tolist(), self.lengths.tolist(), self.dts.tolist())
+
+    def __len__(self):
+        return len(self.names)
+
+    def record(self, i):
+        """(name, accel, dt) of record ``i``; ``accel`` is a read-only view into shared memory."""
+        view = self.data[self.offsets[i]:self.offsets[i] + self.lengths[i]]
+        view.flags.writeable = False
+        return self.names[i], view, float(self.dts[i])
+
+    def close(self):
+        """Detach; the creating process also frees the block."""
+        self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# the store a pool worker attached to in attach_worker
+worker_store = None
+
+
+def attach_worker(handle):
+    """Pool initializer: attach this worker to the parent's store once, until the worker exits."""
+    global worker_store
+    worker_store = RecordStore(handle=handle)
+    # run by the worker's own exit handling once the pool is closed and joined
+    util.Finalize(None, detach_worker, exitpriority=0)
+
+
+def detach_worker():
+    """Close this worker's handle on the store; the parent still owns the block."""
+    global worker_store
+    if worker_store is not None:
+        worker_store.close()
+        worker_store = None
@@ -0,0 +1,301 @@
+"""Golden-output regression harness for the ten kmscse example analyses.
+
+Every example script (kmscse001-005, dynamic and pushover) is a case, every
+step of DFree, DBase, RBase, Drift, FCol and the section forces and
+deformations recorded in memory. The kmscse003-005 scripts are the
+kmscse.jobs models and drivers; the elastic kmscse001/002 scripts have their
+own settings (mass 5.18, Newton with NormDispIncr, Plain and BandGeneral,
+0.1 in pushover increments, 1000 steps of 0.02 s), so ``run_script`` repeats
+their commands as written.
+
+``--update`` stores the results as references (``references/<case>.npz``);
+otherwise each channel is compared with its reference column by column,
+scaled by the reference's peak, and reported as the peak and RMS error:
+
+    error = |new - reference| / max(max|reference|, FLOOR * max|channel|, atol)
+
+The floor keeps a column that is zero but for roundoff (the free-end moment
+of FCol, say) from being measured against its own noise. A channel passes
+when both are within its tolerance. Runs on a different step grid (adaptive
+stepping, say) are interpolated onto the reference times when both are
+increasing; otherwise a change in the number of steps fails the channel.
+The cases run in parallel and the exit status is 1 if any fails.
+
+    python -m kmscse.regression --update
+    python -m kmscse.regression --tolerance "*=1e-6" "ForceColSec*=1e-4" --processes 4
+    python -m kmscse.regression kmscse005-* --rms 1e-5 --json errors.json
+"""
+import argparse
+import collections
+import fnmatch
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import openseespy.opensees as ops
+
+from kmscse import jobs, records, recording
+
+REFERENCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'references')
+
+# kmscse001/002 cases run by run_script; the others are kmscse.jobs jobs with the
+# scripts' models, record (BM68elc.acc, GMfact 1, 10 s) and pushover targets as drift ratios
+CASES = collections.OrderedDict([
+    ('kmscse001-dynamic', dict(script='kmscse001', study='dynamic')),
+    ('kmscse001-pushover', dict(script='kmscse001', study='pushover')),
+    ('kmscse002-dynamic', dict(script='kmscse002', study='dynamic')),
+    ('kmscse002-pushover', dict(script='kmscse002', study='pushover')),
+    ('kmscse003-dynamic', jobs.make_job('elastic')),
+    ('kmscse003-pushover', jobs.make_job('elastic', study='pushover', drift=0.01)),
+    ('kmscse004-dynamic', jobs.make_job('aggregator')),
+    ('kmscse004-pushover', jobs.make_job('aggregator', study='pushover', drift=0.05)),
+    ('kmscse005-dynamic', jobs.make_job('fiber')),
+    ('kmscse005-pushover', jobs.make_job('fiber', {'numBarsCol': 5}, 'pushover', drift=0.01)),
+])
+
+# peak and RMS error tolerances of every channel, by name pattern; later patterns win
+TOLERANCES = collections.OrderedDict([('*', 1e-6)])
+ATOL = 1e-12
+FLOOR = 1e-9  # of the channel's peak, the smallest peak a column is scaled by
+
+
+def run_script(script, study, histories=None):
+    """Result row of the kmscse001 (cantilever) or kmscse002 (portal) script, command for command.
+
+    The scripts' ``pattern('Plain', tag, 'Linear')`` is an explicit Linear
+    time series here, which OpenSeesPy 3.7 requires. Every step is recorded
+    into ``histories`` when given.
+    """
+    portal = script == 'kmscse002'
+    ops.wipe()
+    ops.model('basic', '-ndm', 2, '-ndf', 3)
+    ops.node(1, 0, 0)
+    if portal:
+        ops.node(2, 504, 0)
+        ops.node(3, 0, 432)
+        ops.node(4, 504, 432)
+        ops.fix(1, 1, 1, 1)
+        ops.fix(2, 1, 1, 1)
+        ops.mass(3, 5.18, 0., 0.)
+        ops.mass(4, 5.18, 0., 0.)
+        ctrlNode, loadNodes = 3, (3, 4)
+    else:
+        ops.node(2, 0, 432)
+        ops.fix(1, 1, 1, 1)
+        ops.mass(2, 5.18, 1.e-9 if study == 'dynamic' else 0., 0.)
+        ctrlNode, loadNodes = 2, (2,)
+    ops.geomTransf('Linear', 1)
+    ops.element('elasticBeamColumn', 1, 1, ctrlNode, 3600000000, 4227, 1080000, 1)
+    if portal:
+        ops.element('elasticBeamColumn', 2, 2, 4, 3600000000, 4227, 1080000, 1)
+        ops.element('elasticBeamColumn', 3, 3, 4, 5760000000, 4227, 4423680, 1)
+    ops.timeSeries('Linear', 1)
+    ops.pattern('Plain', 1, 1)
+    if portal:
+        ops.eleLoad('-ele', 3, '-type', '-beamUniform', -7.94)
+    else:
+        ops.load(2, 0, -2000, 0)
+    ops.constraints('Plain')
+    ops.numberer('Plain')
+    ops.system('BandGeneral')
+    ops.test('NormDispIncr', 1.0e-8, 6)
+    ops.algorithm('Newton')
+    ops.integrator('LoadControl', 0.1)
+    ops.analysis('Static')
+    ops.analyze(10)
+    ops.loadConst('-time', 0.0)
+
+    if study == 'pushover':
+        ops.timeSeries('Linear', 2)
+        ops.pattern('Plain', 2, 2)
+        for node in loadNodes:
+            ops.load(node, 2000., 0.0, 0.0)
+        ops.integrator('DisplacementControl', ctrlNode, 1, 0.1)
+        nSteps, dt = 100 if portal else 1000, ()
+    else:
+        if portal:
+            name, accel, dtRecord = records.read_record(records.DEFAULT_RECORD)
+            ops.timeSeries('Path', 2, '-dt', dtRecord, '-values', *accel, '-factor', 1)
+            ops.pattern('UniformExcitation', 2, 1, '-accel', 2)
+            omega1 = ops.eigen('-fullGenLapack', 1)[0] ** 0.5
+            ops.rayleigh(0.0, 0.0, 0.0, 2 * 0.02 / omega1)
+        ops.wipeAnalysis()
+        ops.constraints('Plain')
+        ops.numberer('Plain')
+        ops.system('BandGeneral')
+        ops.test('NormDispIncr', 1.0e-8, 10)
+        ops.algorithm('Newton')
+        ops.integrator('Newmark', 0.5, 0.25)
+        ops.analysis('Transient')
+        nSteps, dt = 1000, (0.02,)
+
+    # step by step, so every step is recorded; the scripts' analyze(n) stops at the first failure too
+    recorder = recording.Recorder(numIntgrPts=0, topNode=ctrlNode) if histories is not None else None
+    steps = iterations = ok = 0
+    start = time.perf_counter()
+    try:
+        while steps < nSteps and ok == 0:
+            ok = ops.analyze(1, *dt)
+            iterations += ops.testIter()
+            if ok == 0:
+                steps += 1
+                if recorder is not None:
+                    recorder.record()
+        seconds = time.perf_counter() - start
+    finally:
+        ops.wipe()
+    if recorder is not None:
+        histories.update(recorder.results())
+    return dict(script=script, study=study, steps=steps, iterations=iterations, ok=ok,
+                seconds=seconds)
+
+
+def run_case(name, histories=None):
+    """Result row of one case, its every step recorded into ``histories`` when given."""
+    case = CASES[name]
+    if 'script' in case:
+        return dict(run_script(case['script'], case['study'], histories), name=name)
+    if histories is None:
+        return jobs.run_job(dict(case, name=name))
+    return jobs.run_job(dict(case, name=name, recorders={}), histories=histories)
+
+
+def _run_case(name):
+    histories = {}
+    return run_case(name, histories), histories
+
+
+def save(name, histories, root=REFERENCES):
+    os.makedirs(root, exist_ok=True)
+    np.savez_compressed(os.path.join(root, name + '.npz'), **histories)
+
+
+def load(name, root=REFERENCES):
+    """The reference histories of a case, or None when it has none."""
+    path = os.path.join(root, name + '.npz')
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return dict(data)
+
+
+def tolerance(channel, tolerances):
+    """The tolerance of ``channel`` from ``{pattern: tol}``."""
+    tol = None
+    for pattern, value in tolerances.items():
+        if fnmatch.fnmatch(channel, pattern):
+            tol = value
+    return tol
+
+
+def channel_error(new, reference, atol=ATOL):
+    """(peak, RMS) error of one channel's values against its reference, or None if they cannot be compared.
+
+    Both arrays hold the time in their first column.
+    """
+    if new.shape[1:] != reference.shape[1:]:
+        return None
+    if new.shape != reference.shape or not np.array_equal(new[:, 0], reference[:, 0]):
+        t, tRef = new[:, 0], reference[:, 0]
+        if len(t) < 2 or np.any(np.diff(t) <= 0) or np.any(np.diff(tRef) <= 0):
+            return None
+        new = np.column_stack([tRef] + [np.interp(tRef, t, column) for column in new[:, 1:].T])
+    peaks = np.abs(reference[:, 1:]).max(axis=0, initial=0.0)
+    scale = np.maximum(peaks, max(FLOOR * peaks.max(initial=0.0), atol))
+    error = np.abs(new[:, 1:] - reference[:, 1:]) / scale
+    if not error.size:
+        return 0.0, 0.0
+    return float(error.max()), float(np.sqrt((error ** 2).mean(axis=0)).max())
+
+
+def compare(histories, references, tolerances=TOLERANCES, rmsTolerances=None, atol=ATOL):
+    """Rows of (channel, peak error, RMS error, passed) for every reference channel."""
+    rows = []
+    for channel, reference in references.items():
+        tol = tolerance(channel, tolerances)
+        rmsTol = tolerance(channel, rmsTolerances) if rmsTolerances else tol
+        error = channel_error(histories[channel], reference, atol) if channel in histories else None
+        if error is None:
+            rows.append(dict(channel=channel, peak=np.inf, rms=np.inf, passed=False))
+            continue
+        peak, rms = error
+        rows.append(dict(channel=channel, peak=peak, rms=rms, passed=peak <= tol and rms <= rmsTol))
+    return rows
+
+
+def run(names, processes=None):
+    """Run the named cases in parallel; yield (name, row, histories) as they finish."""
+    if processes == 1:
+        for name in names:
+            yield (name,) + _run_case(name)
+        return
+    with multiprocessing.Pool(min(processes or os.cpu_count(), len(names))) as pool:
+        for name, result in zip(names, pool.imap(_run_case, names)):
+            yield (name,) + result
+
+
+def _tolerances(specs):
+    tolerances = collections.OrderedDict(TOLERANCES)
+    for spec in specs:
+        pattern, value = spec.split('=', 1) if '=' in spec else ('*', spec)
+        tolerances[pattern] = float(value)
+    return tolerances
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('cases', nargs='*', default=['*'], help="case name patterns (default: all ten)")
+    parser.add_argument('--update', action='store_true', help="store the results as the new references")
+    parser.add_argument('--references', default=REFERENCES, help="reference directory")
+    parser.add_argument('--tolerance', nargs='+', default=[], metavar='PATTERN=TOL',
+                        help="peak (and RMS) error tolerance, e.g. 1e-6 'ForceColSec*=1e-4'")
+    parser.add_argument('--rms', nargs='+', metavar='PATTERN=TOL', help="separate RMS error tolerances")
+    parser.add_argument('--atol', type=float, default=ATOL, help="smallest peak a channel is scaled by")
+    parser.add_argument('--processes', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--verbose', action='store_true', help="list every channel, not only failures")
+    parser.add_argument('--json', help="also write the channel errors to this file")
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if any(fnmatch.fnmatch(name, pattern) for pattern in args.cases)]
+    if not names:
+        parser.error("no case matches %s" % ' '.join(args.cases))
+    tolerances = _tolerances(args.tolerance)
+    rmsTolerances = _tolerances(args.rms) if args.rms else None
+
+    start = time.perf_counter()
+    failed, report = 0, []
+    print("%-20s %-14s %12s %12s %6s %8s" % ('case', 'channel', 'peak error', 'RMS error', 'steps', 'seconds'))
+    for name, row, histories in run(names, args.processes):
+        if args.update:
+            save(name, histories, args.references)
+            print("%-20s %-14s %12s %12s %6d %8.3f" % (name, '(stored)', '', '', row['steps'], row['seconds']))
+            continue
+        references = load(name, args.references)
+        if references is None:
+            print("%-20s %-14s %12s %12s %6d %8.3f" % (name, '(no reference)', '', '', row['steps'], row['seconds']))
+            failed += 1
+            continue
+        channels = compare(histories, references, tolerances, rmsTolerances, args.atol)
+        worst = max(channels, key=lambda c: c['peak'])
+        status = 'ok' if all(c['passed'] for c in channels) else 'FAILED'
+        failed += status != 'ok'
+        print("%-20s %-14s %12.3e %12.3e %6d %8.3f  %s" % (
+            name, worst['channel'], worst['peak'], worst['rms'], row['steps'], row['seconds'], status))
+        for c in channels:
+            if args.verbose or not c['passed']:
+                print("%-20s %-14s %12.3e %12.3e %s" % ('', c['channel'], c['peak'], c['rms'],
+                                                       '' if c['passed'] else ' FAILED'))
+        report.append(dict(case=name, ok=row['ok'], steps=row['steps'], seconds=row['seconds'], channels=channels))
+
+    print("%d cases, %d failed, %.2f s" % (len(names), failed, time.perf_counter() - start))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=1, default=float)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
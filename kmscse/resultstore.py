@@ -0,0 +1,200 @@
+"""Indexed results store: SQLite for run metadata, .npz files for histories.
+
+Every run is a row of ``runs`` (model, study, record, GMfact, Sa, status and
+the peak results) plus one ``params`` row per resolved model parameter, so
+default values are queryable too. Histories are optional and go to
+``blobs/<id>.npz``. Batch runners insert their result rows in bulk:
+
+    store = ResultStore('results')
+    store.insert(rows, histories)
+    store.query('peakDrift', model='fiber', fc=('<', -5), Sa=('>', 1.0))
+
+    python -m kmscse.resultstore results ingest rows.json --period 0.5
+    python -m kmscse.resultstore results query --model fiber --where "fc<-5" "Sa>1"
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+
+import numpy as np
+
+from kmscse import jobs, models, records
+
+# run columns besides id; the first six are indexed
+COLUMNS = ('model', 'study', 'record', 'GMfact', 'Sa', 'status', 'ok', 'peakDrift', 'peakMoment',
+           'steps', 'iterations', 'seconds')
+OPERATORS = ('<', '<=', '>', '>=', '=', '!=')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY, model TEXT, study TEXT, record TEXT, GMfact REAL, Sa REAL, status TEXT,
+    ok INTEGER, peakDrift REAL, peakMoment REAL, steps INTEGER, iterations INTEGER, seconds REAL,
+    history TEXT);
+CREATE TABLE IF NOT EXISTS params (run INTEGER, name TEXT, value REAL);
+CREATE INDEX IF NOT EXISTS params_name_value ON params (name, value, run);
+CREATE INDEX IF NOT EXISTS params_run ON params (run, name, value);
+""" + "".join("CREATE INDEX IF NOT EXISTS runs_%s ON runs (%s);\n" % (c, c) for c in COLUMNS[:6])
+
+
+def status(row):
+    """The row's scheduler status, else ok/failed from the analysis return code."""
+    return row.get('status') or ('ok' if row.get('ok') == 0 else 'failed')
+
+
+def row_record(row):
+    """The row's record; a missing one is the default record (a RecordStore index may be 0)."""
+    return records.DEFAULT_RECORD if row.get('record') is None else row['record']
+
+
+class ResultStore:
+    """A results directory holding ``runs.sqlite`` and the ``blobs`` history files."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(os.path.join(root, 'blobs'), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, 'runs.sqlite'))
+        self.db.executescript(SCHEMA)
+
+    def insert(self, rows, histories=None):
+        """Insert result rows (kmscse.jobs style dicts) in one transaction; return their ids.
+
+        ``histories`` is an optional list of dicts of arrays, one per row.
+        """
+        rows = list(rows)
+        written = []
+        try:
+            with self.db:
+                start = self.db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM runs").fetchone()[0]
+                ids = list(range(start, start + len(rows)))
+                blobs = [None] * len(rows)
+                for i, history in enumerate(histories or []):
+                    if history:
+                        blobs[i] = os.path.join('blobs', '%d.npz' % ids[i])
+                self.db.executemany(
+                    "INSERT INTO runs VALUES (%s)" % ", ".join("?" * (len(COLUMNS) + 2)),
+                    [(i, row['model'], row.get('study', 'dynamic'), row_record(row), row.get('GMfact'),
+                      row.get('Sa'), status(row)) + tuple(row.get(c) for c in COLUMNS[6:]) + (blob,)
+                     for i, row, blob in zip(ids, rows, blobs)])
+                self.db.executemany("INSERT INTO params VALUES (?, ?, ?)", [
+                    (i, name, value) for i, row in zip(ids, rows)
+                    for name, value in self._params(row).items() if isinstance(value, (int, float))])
+                # the files go last, inside the transaction: a failed write rolls the rows back
+                for blob, history in zip(blobs, histories or []):
+                    if blob is not None:
+                        np.savez(os.path.join(self.root, blob), **history)
+                        written.append(blob)
+        except BaseException:
+            for blob in written:
+                os.remove(os.path.join(self.root, blob))
+            raise
+        return ids
+
+    def _params(self, row):
+        if row['model'] in models.DEFAULTS:
+            return models.params(row['model'], row.get('structure', 'cantilever'), **row.get('params', {}))
+        return row.get('params', {})
+
+    def query(self, columns=('peakDrift',), model=None, study=None, record=None, status=None, **where):
+        """Columns of the matching runs as a dict of arrays, including their ``id``.
+
+        ``where`` maps a run column or model parameter to ``(operator, value)``,
+        e.g. ``fc=('<', -5)``. Parameter names may also be requested as columns.
+        """
+        if isinstance(columns, str):
+            columns = (columns,)
+        clauses, args = [], []
+        for name, value in (('model', model), ('study', study), ('record', record), ('status', status)):
+            if value is not None:
+                clauses.append("runs.%s = ?" % name)
+                args.append(value)
+        for name, (op, value) in where.items():
+            if op not in OPERATORS:
+                raise ValueError("unknown operator %r" % op)
+            if name in COLUMNS:
+                clauses.append("runs.%s %s ?" % (name, op))
+                args.append(value)
+            else:
+                clauses.append("EXISTS (SELECT 1 FROM params WHERE run = runs.id AND name = ? AND value %s ?)" % op)
+                args += [name, value]
+        selected = ["runs.id"] + [
+            "runs.%s" % c if c in COLUMNS else "(SELECT value FROM params WHERE run = runs.id AND name = '%s')"
+            % c.replace("'", "") for c in columns]
+        sql = "SELECT %s FROM runs" % ", ".join(selected)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        result = self.db.execute(sql + " ORDER BY runs.id", args).fetchall()
+        return {name: np.array([r[j] for r in result]) for j, name in enumerate(('id',) + tuple(columns))}
+
+    def history(self, runId):
+        """Dict of the history arrays stored with run ``runId``."""
+        (blob,) = self.db.execute("SELECT history FROM runs WHERE id = ?", (runId,)).fetchone()
+        if blob is None:
+            return {}
+        with np.load(os.path.join(self.root, blob)) as data:
+            return dict(data)
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def add_intensity(rows, period, xDamp=0.05):
+    """Set ``Sa`` (in g) at ``period`` on every row from its record and GMfact."""
+    spectra = {}
+    for row in rows:
+        record = row.get('record')
+        if record not in spectra:
+            name, accel, dt = jobs.load_record(record)
+            spectra[record] = records.spectral_acceleration(accel, dt, period, xDamp)[0] / models.COLUMN['g']
+        row['Sa'] = spectra[record] * row.get('GMfact', 1.0)
+    return rows
+
+
+def _condition(text):
+    name, op, value = re.match(r"\s*(\w+)\s*(<=|>=|!=|<|>|=)\s*(\S+)\s*$", text).groups()
+    return name, (op, float(value))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('root', help="results directory")
+    sub = parser.add_subparsers(dest='command', required=True)
+    i = sub.add_parser('ingest', help="insert result rows from JSON files (kmscse.scheduler --json etc.)")
+    i.add_argument('files', nargs='+')
+    i.add_argument('--period', type=float, help="also store Sa(period) in g for each row")
+    q = sub.add_parser('query')
+    q.add_argument('--columns', nargs='+', default=['GMfact', 'Sa', 'peakDrift'])
+    q.add_argument('--model')
+    q.add_argument('--status')
+    q.add_argument('--where', nargs='*', default=[], help='conditions such as "fc<-5" "Sa>1"')
+    args = parser.parse_args(argv)
+
+    with ResultStore(args.root) as store:
+        if args.command == 'ingest':
+            for path in args.files:
+                with open(path) as f:
+                    rows = json.load(f)
+                if args.period:
+                    add_intensity(rows, args.period)
+                store.insert(rows)
+            print("%d runs in %s" % (len(store), args.root))
+            return
+        result = store.query(args.columns, args.model, status=args.status, **dict(map(_condition, args.where)))
+        print(" ".join("%12s" % c for c in result))
+        for values in zip(*result.values()):
+            print(" ".join("%12.5g" % v if isinstance(v, (float, np.floating)) else "%12s" % v for v in values))
+        print("%d runs" % len(result['id']))
+
+
+if __name__ == '__main__':
+    main()
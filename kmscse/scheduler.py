@@ -0,0 +1,127 @@
+"""Asyncio scheduler that runs jobs as subprocesses with time and memory limits.
+
+Each job (see kmscse.jobs) runs in its own ``python -m kmscse.jobs``
+process, at most ``concurrency`` at a time. A run that exceeds its wall-clock
+timeout or resident-memory cap is killed and recorded with status
+``timeout`` or ``memory`` instead of holding its slot forever, e.g. a fiber
+column stuck in the ground-motion fallback loop. The report gives queue
+latency, run time and throughput. Memory is sampled every ``poll`` seconds,
+so a job that ends before the first sample reports its RSS as unknown (-).
+
+    python -m kmscse.scheduler --model fiber --scales 1000 2000 3000 --concurrency 4 --timeout 60 --max-rss 500
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from kmscse import jobs, progress
+
+
+def rss(pid):
+    """Resident set size of ``pid`` in MB from /proc, None where unavailable."""
+    try:
+        with open('/proc/%d/status' % pid) as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        return None
+
+
+async def run_one(job, slots, submitted, timeout=None, maxRSS=None, poll=0.2):
+    """Run ``job`` in a subprocess once a slot is free; return its result row."""
+    async with slots:
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'kmscse.jobs', stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        output = asyncio.ensure_future(process.communicate(json.dumps(job).encode()))
+        # sampled between polls: None (unknown) for a job that finishes before the first sample
+        status, peakRSS = None, None
+        while status is None:
+            done, _ = await asyncio.wait([output], timeout=poll)
+            if done:
+                status = 'done'
+                break
+            current = rss(process.pid)
+            if current is not None:
+                peakRSS = current if peakRSS is None else max(peakRSS, current)
+            if timeout is not None and time.perf_counter() - started > timeout:
+                status = 'timeout'
+            elif maxRSS is not None and peakRSS is not None and peakRSS > maxRSS:
+                status = 'memory'
+        if status != 'done':
+            process.kill()
+        stdout, _ = await output
+        finished = time.perf_counter()
+
+    row = dict(job, status=status, queued=started - submitted, wall=finished - started,
+               peakRSS=peakRSS, returncode=process.returncode)
+    if status == 'done':
+        lines = stdout.decode().strip().splitlines()
+        if process.returncode == 0 and lines:
+            row.update(json.loads(lines[-1]))
+            row['status'] = 'ok' if row['ok'] == 0 else 'failed'
+        else:
+            row['status'] = 'error'
+    return row
+
+
+async def schedule(jobList, concurrency=4, timeout=None, maxRSS=None):
+    """Run every job with at most ``concurrency`` subprocesses; rows keep job order."""
+    slots = asyncio.Semaphore(concurrency)
+    submitted = time.perf_counter()
+    return await asyncio.gather(*[run_one(job, slots, submitted, timeout, maxRSS) for job in jobList])
+
+
+def report(rows, elapsed):
+    print("%-10s %10s %-8s %8s %8s %8s %10s" % ('model', 'GMfact', 'status', 'queued', 'wall', 'RSS MB', 'drift'))
+    for r in rows:
+        memory = '-' if r['peakRSS'] is None else '%.1f' % r['peakRSS']
+        print("%-10s %10.4g %-8s %8.2f %8.2f %8s %10.3e" % (
+            r['model'], r['GMfact'], r['status'], r['queued'], r['wall'], memory, r.get('peakDrift', np.nan)))
+    queued = np.array([r['queued'] for r in rows])
+    statuses = sorted(set(r['status'] for r in rows))
+    print("%d jobs in %.2f s (%.2f jobs/s); queue latency mean %.2f s, max %.2f s" % (
+        len(rows), elapsed, len(rows) / elapsed, queued.mean(), queued.max()))
+    print(", ".join("%s %d" % (s, sum(r['status'] == s for r in rows)) for s in statuses))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--jobs', help="JSON list of job dicts (otherwise built from the options below)")
+    parser.add_argument('--model', choices=['elastic', 'aggregator', 'fiber'], default='fiber')
+    parser.add_argument('--study', choices=['pushover', 'dynamic'], default='dynamic')
+    parser.add_argument('--records', nargs='*', help="acceleration files (default: BM68elc.acc)")
+    parser.add_argument('--scales', nargs='+', type=float, default=[1.0])
+    parser.add_argument('--concurrency', type=int, default=os.cpu_count())
+    parser.add_argument('--timeout', type=float, help="wall-clock seconds per run")
+    parser.add_argument('--max-rss', type=float, help="resident memory cap per run in MB")
+    parser.add_argument('--json', help="also write the rows to this file")
+    parser.add_argument('--progress', action='store_true', help="show live progress, ETA and stragglers on stderr")
+    args = parser.parse_args(argv)
+
+    if args.jobs:
+        with open(args.jobs) as f:
+            jobList = json.load(f)
+    else:
+        jobList = [jobs.make_job(args.model, study=args.study, record=path and os.path.abspath(path), GMfact=s)
+                   for path in (args.records or [None]) for s in args.scales]
+
+    start = time.perf_counter()
+    with progress.Monitor(len(jobList)) if args.progress else contextlib.nullcontext():
+        rows = asyncio.run(schedule(jobList, args.concurrency, args.timeout, args.max_rss))
+    report(rows, time.perf_counter() - start)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
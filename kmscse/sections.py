@@ -0,0 +1,110 @@
+"""The kmscse005 fiber section: OpenSees definition and fiber layout arrays.
+
+Sign convention is that of OpenSees 2D sections: compression is negative,
+the section strain is eps(y) = eps0 - y*kappa and M = -sum(sigma*A*y).
+"""
+import numpy as np
+import openseespy.opensees as ops
+
+IDconcU = 1
+IDreinf = 2
+
+
+def materials(p):
+    """Concrete02 and Steel02 arguments of the kmscse005 unconfined concrete and steel."""
+    fc1U = p['fc']
+    fc2U = p['fc2Ratio'] * fc1U
+    ftU = -p['ftRatio'] * fc1U
+    Ets = ftU / 0.002
+    concrete = (fc1U, p['eps1U'], fc2U, p['eps2U'], p['lambdaU'], ftU, Ets)
+    steel = (p['Fy'], p['Es'], p['Bs'], p['R0'], p['cR1'], p['cR2'])
+    return concrete, steel
+
+
+def fiber_section(p, secTag):
+    """Define the kmscse005 materials and fiber section in the current domain.
+
+    ``p['concrete']`` and ``p['steel']`` select Concrete02/Steel02, as in the
+    script, or Concrete01/Steel01 with the same strengths and strains (no
+    tension, bilinear steel), which support OpenSees' DDM sensitivities.
+    """
+    concrete, steel = materials(p)
+    concreteType = p.get('concrete', 'Concrete02')
+    steelType = p.get('steel', 'Steel02')
+    if concreteType not in ('Concrete02', 'Concrete01') or steelType not in ('Steel02', 'Steel01'):
+        raise ValueError("unknown fiber materials %r, %r" % (concreteType, steelType))
+    # the 01 materials take the leading arguments of their 02 counterparts
+    ops.uniaxialMaterial(concreteType, IDconcU, *concrete[:4 if concreteType == 'Concrete01' else None])
+    ops.uniaxialMaterial(steelType, IDreinf, *steel[:3 if steelType == 'Steel01' else None])
+
+    coverY = p['HCol'] / 2.0
+    coverZ = p['BCol'] / 2.0
+    coreY = coverY - p['coverCol']
+    coreZ = coverZ - p['coverCol']
+
+    ops.section('Fiber', secTag)
+    ops.patch('quad', IDconcU, p['nfZ'], p['nfY'], -coverY, coverZ, -coverY, -coverZ, coverY, -coverZ, coverY, coverZ)
+    ops.layer('straight', IDreinf, p['numBarsCol'], p['barAreaCol'], -coreY, coreZ, -coreY, -coreZ)
+    ops.layer('straight', IDreinf, p['numBarsCol'], p['barAreaCol'], coreY, coreZ, coreY, -coreZ)
+
+
+def fiber_layout(p):
+    """Return (y, A, isSteel) arrays matching the fibers ``fiber_section`` creates.
+
+    Fibers sharing a y coordinate are merged since only y enters a 2D section.
+    """
+    coverY = p['HCol'] / 2.0
+    coreY = coverY - p['coverCol']
+    nfY = p['nfY']
+    dy = 2.0 * coverY / nfY
+    yConc = -coverY + dy * (np.arange(nfY) + 0.5)
+    AConc = np.full(nfY, dy * p['BCol'])
+    ABars = p['numBarsCol'] * p['barAreaCol']
+    y = np.concatenate([yConc, [-coreY, coreY]])
+    A = np.concatenate([AConc, [ABars, ABars]])
+    isSteel = np.concatenate([np.zeros(nfY, bool), np.ones(2, bool)])
+    return y, A, isSteel
+
+
+def _cracked_forces(eps0, kappa, y, A, isSteel, Ec0, Es):
+    """Axial force and moment of a no-tension elastic concrete / elastic steel section."""
+    eps = eps0[..., None] - y * kappa[..., None]
+    sig = np.where(isSteel, Es * eps, np.where(eps < 0.0, Ec0 * eps, 0.0))
+    return (sig * A).sum(-1), -(sig * A * y).sum(-1), eps
+
+
+def first_yield(p, PCol, iterations=60):
+    """First-yield moment and curvature of the fiber section under axial load ``PCol``.
+
+    Uses a cracked elastic section (no concrete tension, initial Concrete02
+    modulus 2*fc/eps1U) and returns the point where the extreme bar layer
+    reaches Fy/Es in tension.
+    """
+    y, A, isSteel = fiber_layout(p)
+    Ec0 = 2.0 * p['fc'] / p['eps1U']
+    Es = p['Es']
+    epsY = p['Fy'] / Es
+    N = -PCol
+
+    def axial_strain(kappa):
+        # N(eps0) is monotonic, bisect for axial equilibrium at each curvature
+        lo = np.full_like(kappa, -0.1)
+        hi = np.full_like(kappa, 0.1)
+        for _ in range(iterations):
+            mid = 0.5 * (lo + hi)
+            low = _cracked_forces(mid, kappa, y, A, isSteel, Ec0, Es)[0] < N
+            lo = np.where(low, mid, lo)
+            hi = np.where(low, hi, mid)
+        return 0.5 * (lo + hi)
+
+    kLo = np.zeros(1)
+    kHi = np.full(1, 20.0 * epsY / p['HCol'])
+    for _ in range(iterations):
+        kappa = 0.5 * (kLo + kHi)
+        eps = _cracked_forces(axial_strain(kappa), kappa, y, A, isSteel, Ec0, Es)[2]
+        below = eps[..., isSteel].max(-1) < epsY
+        kLo = np.where(below, kappa, kLo)
+        kHi = np.where(below, kHi, kappa)
+    kappa = 0.5 * (kLo + kHi)
+    My = _cracked_forces(axial_strain(kappa), kappa, y, A, isSteel, Ec0, Es)[1]
+    return float(My[0]), float(kappa[0])
@@ -0,0 +1,265 @@
+"""DDM response sensitivities of the nonlinear columns to their parameters.
+
+OpenSees differentiates the response with respect to every ``parameter``
+alongside the analysis (the direct differentiation method), so one run gives
+the drift history and its gradient history with respect to fc, Fy, Es (fiber
+column) or MyCol, PhiYCol, b (aggregator column). Model parameters reach
+OpenSees through the material arguments they set, e.g. MyCol is both the
+Steel01 yield moment and part of its stiffness MyCol/PhiYCol, and their
+gradients follow by the chain rule.
+
+The same parameters are updated in place between runs: ``update`` changes
+the material arguments and the next run starts from the reset domain, with
+no wipe and rebuild.
+
+Concrete02 and Steel02 have no DDM sensitivities in OpenSees, so the fiber
+column uses the Concrete01/Steel01 variant of its section (see
+sections.fiber_section), and the dynamic runs iterate with Newton and damp
+in proportion to the initial stiffness (see Sensitivity.ground_motion).
+
+    python -m kmscse.sensitivity --model fiber --GMfact 3000 --params fc Fy Es --update Fy=60 Fy=70 --check
+"""
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+import openseespy.opensees as ops
+
+from kmscse import analysis, jobs, models, sections
+
+# material tags of models._column_section and sections.fiber_section
+ColMatTagFlex = 2
+
+# material arguments with DDM support: (material tag, OpenSees parameter name) -> value from the model parameters
+ARGUMENTS = {
+    'aggregator': {
+        (ColMatTagFlex, 'Fy'): lambda p: p['MyCol'],
+        (ColMatTagFlex, 'E'): lambda p: p['MyCol'] / p['PhiYCol'],
+        (ColMatTagFlex, 'b'): lambda p: p['b'],
+    },
+    'fiber': {
+        (sections.IDconcU, 'fc'): lambda p: p['fc'],
+        (sections.IDconcU, 'epsco'): lambda p: p['eps1U'],
+        (sections.IDconcU, 'fcu'): lambda p: p['fc2Ratio'] * p['fc'],
+        (sections.IDconcU, 'epscu'): lambda p: p['eps2U'],
+        (sections.IDreinf, 'Fy'): lambda p: p['Fy'],
+        (sections.IDreinf, 'E'): lambda p: p['Es'],
+        (sections.IDreinf, 'b'): lambda p: p['Bs'],
+    },
+}
+
+PARAMETERS = {'aggregator': ('MyCol', 'PhiYCol', 'b'), 'fiber': ('fc', 'Fy', 'Es')}
+
+# load pattern (and time series) tags of analysis.gravity, pushover and ground_motion
+GravityPattern, PushoverPattern, GroundMotionPattern = 1, 200, 400
+
+
+class Sensitivity:
+    """A column model built once, with a DDM parameter for every material argument.
+
+    ``pushover`` and ``ground_motion`` return the response and, for every
+    name in ``names``, the gradient of the drift history (and of the lateral
+    force history of a pushover) and of its peak. Later runs start from the
+    reset domain, with the values given to ``update``.
+    """
+
+    def __init__(self, model, names=None, structure='cantilever', **params):
+        if model == 'fiber':
+            params.setdefault('concrete', 'Concrete01')
+            params.setdefault('steel', 'Steel01')
+            if (params['concrete'], params['steel']) != ('Concrete01', 'Steel01'):
+                raise ValueError("Concrete02 and Steel02 have no DDM sensitivities, use Concrete01 and Steel01")
+        if model not in ARGUMENTS:
+            raise ValueError("model %r has no material parameters" % model)
+        self.model = model
+        self.p = models.params(model, structure, **params)
+        if self.p['element'] not in ('nonlinearBeamColumn', 'forceBeamColumn', 'dispBeamColumn') or \
+                self.p['integration'] != 'Lobatto':
+            raise ValueError("sensitivities need a fiber or aggregator section along the whole column")
+        self.names = tuple(names or PARAMETERS[model])
+        self.arguments = list(ARGUMENTS[model])
+        self._check(self.names)
+        self.values = self._arguments(self.p)
+
+        self.layout = models.build(structure, model, self.p)
+        columns = self.layout['columns']
+        for tag, (matTag, name) in enumerate(self.arguments, 1):
+            ops.parameter(tag, 'element', columns[0], 'material', matTag, name)
+            for ele in columns[1:]:
+                ops.addToParameter(tag, 'element', ele, 'material', matTag, name)
+        self.jacobian = self._jacobian()
+        self.started = False
+        self.betaK = None
+
+    def _arguments(self, p):
+        return np.array([ARGUMENTS[self.model][argument](p) for argument in self.arguments])
+
+    def _derivative(self, name):
+        """d(material arguments)/d(model parameter ``name``), by central differences."""
+        h = 1e-6 * (abs(self.p[name]) or 1.0)
+        return (self._arguments(dict(self.p, **{name: self.p[name] + h})) -
+                self._arguments(dict(self.p, **{name: self.p[name] - h}))) / (2 * h)
+
+    def _jacobian(self):
+        return np.stack([self._derivative(name) for name in self.names], axis=1)
+
+    def _check(self, names):
+        unknown = set(names) - set(self.p)
+        if unknown:
+            raise KeyError("unknown %s parameters: %s" % (self.model, ', '.join(sorted(unknown))))
+        # e.g. LCol or Weight change the model itself, which needs a rebuild
+        fixed = [name for name in names if not np.any(self._derivative(name))]
+        if fixed:
+            raise ValueError("%s set no material argument" % ', '.join(fixed))
+
+    def update(self, **values):
+        """Set model parameters for the next run in place, without rebuilding the model."""
+        self._check(values)
+        p = dict(self.p, **values)
+        new = self._arguments(p)
+        for tag in np.flatnonzero(new != self.values):
+            ops.updateParameter(int(tag) + 1, float(new[tag]))
+        self.p, self.values = p, new
+        self.jacobian = self._jacobian()
+
+    def _start(self):
+        if self.started:
+            ops.reset()
+            ops.wipeAnalysis()
+            for tag in (GravityPattern, PushoverPattern, GroundMotionPattern):
+                if tag in ops.getPatterns():
+                    ops.remove('loadPattern', tag)
+                    ops.remove('timeSeries', tag)
+        self.started = True
+        self.steps = []
+        analysis.gravity(self.layout['PCol'], self.layout['ctrlNode'], beamLoads=self.layout['beamLoads'],
+                         sensitivity=True)
+
+    def record(self):
+        """Collect the control displacement, load factor and their sensitivities of a converged step."""
+        node = self.layout['ctrlNode']
+        tags = range(1, len(self.arguments) + 1)
+        row = [ops.nodeDisp(node, 1)] + [ops.sensNodeDisp(node, 1, tag) for tag in tags]
+        if PushoverPattern in ops.getPatterns():
+            row += [ops.getLoadFactor(PushoverPattern)] + [ops.sensLambda(PushoverPattern, tag) for tag in tags]
+        self.steps.append(row)
+
+    def _results(self, out, Hload=None):
+        n = len(self.arguments)
+        steps = np.array(self.steps) if self.steps else np.zeros((0, 2 * n + 2))
+        height = self.layout['height']
+        out['drift'] = steps[:, 0] / height
+        out['dDrift'] = steps[:, 1:n + 1] @ self.jacobian / height  # (nSteps, nNames)
+        peak = self._peak(out, 'drift', 'dDrift')
+        if Hload is not None:
+            out['force'] = steps[:, n + 1] * Hload
+            out['dForce'] = steps[:, n + 2:] @ self.jacobian * Hload
+            peak.update(self._peak(out, 'force', 'dForce'))
+        out.update(peak)
+        out['names'] = self.names
+        return out
+
+    def _peak(self, out, key, gradient):
+        """Peak |value| and its gradient, that of the value at the peak step."""
+        if not len(out[key]):
+            return {'peak' + key.title(): np.nan, 'peak' + key.title() + 'Gradient': np.full(len(self.names), np.nan)}
+        i = np.argmax(np.abs(out[key]))
+        return {'peak' + key.title(): abs(out[key][i]),
+                'peak' + key.title() + 'Gradient': np.sign(out[key][i]) * out[gradient][i]}
+
+    def pushover(self, drift=0.05, verbose=False):
+        """The kmscse004/005 pushover to ``drift``; also the gradients of the lateral force."""
+        self._start()
+        height = self.layout['height']
+        out = analysis.pushover(drift * height, 0.001 * height, self.p['Weight'], self.layout['ctrlNode'],
+                                baseEle=self.layout['colEle'], verbose=verbose, recorder=self,
+                                loadNodes=self.layout['loadNodes'], sensitivity=True)
+        return self._results(out, self.p['Weight'])
+
+    def ground_motion(self, accel, dt, GMfact=1.0, TmaxAnalysis=10.0, xDamp=0.02, verbose=False):
+        """The kmscse004/005 dynamic analysis, damped in proportion to the initial stiffness.
+
+        DDM has no committed-stiffness Rayleigh damping, the scripts' choice.
+        The damping matrix is that of the first run (OpenSees keeps each
+        element's initial stiffness) and so are the gradients: they and the
+        updated runs are at constant damping.
+        """
+        self._start()
+        if self.betaK is None:
+            self.betaK = 2 * xDamp / math.sqrt(ops.eigen(1)[0])
+        out = analysis.ground_motion(accel, dt, GMfact, TmaxAnalysis, xDamp=xDamp, ctrlNode=self.layout['ctrlNode'],
+                                     baseEle=self.layout['colEle'], verbose=verbose, recorder=self, sensitivity=True,
+                                     rayleigh=(0.0, 0.0, self.betaK, 0.0))
+        return self._results(out)
+
+
+def finite_differences(s, run, key, h=1e-4):
+    """Central differences of ``run(s)[key]`` over in-place updates of every parameter, to check DDM."""
+    p = dict(s.p)
+    out = []
+    for name in s.names:
+        step = h * (abs(p[name]) or 1.0)
+        s.update(**{name: p[name] + step})
+        up = run(s)[key]
+        s.update(**{name: p[name] - step})
+        down = run(s)[key]
+        s.update(**{name: p[name]})
+        out.append((up - down) / (2 * step))
+    return np.array(out)
+
+
+def _assignment(text):
+    name, value = text.split('=', 1)
+    return name, float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--model', choices=sorted(ARGUMENTS), default='fiber')
+    parser.add_argument('--structure', choices=models.STRUCTURES, default='cantilever')
+    parser.add_argument('--study', choices=['pushover', 'dynamic'], default='dynamic')
+    parser.add_argument('--params', nargs='+', help="parameters to differentiate by (default: per model)")
+    parser.add_argument('--GMfact', type=float, default=1.0)
+    parser.add_argument('--TmaxAnalysis', type=float, default=10.0)
+    parser.add_argument('--drift', type=float, default=0.05, help="pushover target drift ratio")
+    parser.add_argument('--record')
+    parser.add_argument('--update', nargs='*', default=[], metavar='NAME=VALUE',
+                        help="further runs, changing one parameter in place before each")
+    parser.add_argument('--check', action='store_true', help="compare with finite differences of in-place reruns")
+    parser.add_argument('--json', help="also write the peaks and gradients to this file")
+    args = parser.parse_args(argv)
+
+    s = Sensitivity(args.model, args.params, args.structure)
+    if args.study == 'pushover':
+        run = lambda s: s.pushover(args.drift)
+        key = 'peakForce'
+    else:
+        name, accel, dt = jobs.load_record(args.record)
+        run = lambda s: s.ground_motion(accel, dt, args.GMfact, args.TmaxAnalysis)
+        key = 'peakDrift'
+
+    print("%-16s %12s %8s %8s" % ('run', key, 'steps', 'seconds') + "".join("%14s" % ('d/d' + n) for n in s.names))
+    rows = []
+    for label, values in [('base', {})] + [(text, dict([_assignment(text)])) for text in args.update]:
+        s.update(**values)
+        start = time.perf_counter()
+        out = run(s)
+        seconds = time.perf_counter() - start
+        gradient = out[key + 'Gradient']
+        print("%-16s %12.5g %8d %8.3f" % (label, out[key], len(out['drift']), seconds) +
+              "".join("%14.5g" % g for g in gradient))
+        rows.append(dict(run=label, ok=out['ok'], steps=len(out['drift']), seconds=seconds, peak=out[key],
+                         gradient=dict(zip(s.names, gradient.tolist()))))
+        if args.check:
+            fd = finite_differences(s, run, key)
+            print("%-16s %12s %8s %8s" % ('  finite diff.', '', '', '') + "".join("%14.5g" % g for g in fd))
+            rows[-1]['finiteDifferences'] = dict(zip(s.names, fd.tolist()))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(dict(model=args.model, study=args.study, key=key, runs=rows), f, indent=1, default=float)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Declarative model specs and a batch runner for the kmscse examples.
+
+A spec names a model family and an analysis; ``sweep`` expands it into the
+cartesian product of the listed values, so one spec can describe a whole
+parameter study. Every case becomes a kmscse.jobs job and all of them run in
+this process (or a warm worker pool), without a script launch per case.
+
+    # fiber.toml
+    name = "fiber-fc"
+    model = "fiber"              # elastic, aggregator or fiber columns
+    structure = "cantilever"     # "portal" (kmscse002 frame) or "frame" (stories x bays)
+    study = "dynamic"            # or "pushover" (to ``drift`` x LCol)
+    records = ["BM68elc.acc"]    # relative to this file; default: the bundled record
+    [params]
+    numBarsCol = 16
+    [sweep]
+    fc = [-4.0, -5.0, -6.0]
+    GMfact = [1000, 2000, 3000]
+    [recorders]                  # kmscse.recording modes, written to dataDir/<case>
+    "*" = "envelope"
+
+A file holds one spec, a list of specs (JSON) or a ``[[specs]]`` array (TOML).
+The scripts' copies disagree in places; here each choice is an explicit
+parameter with one default: ``AFactor`` (the ``ACol * 1000`` "make stiff"
+factor, absent from kmscse005), ``numBarsCol`` (16 in the kmscse005 dynamic
+script, 5 in its pushover) and the column element the recorders read, which
+is taken from the model layout rather than a hard-coded ``-ele 2``.
+
+    python -m kmscse.specs fiber.toml portal.json --processes 4 --json results.json --store results --progress
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import tomllib
+
+from kmscse import jobs, models, progress, resultstore, workers
+
+# spec keys that are job keys rather than model parameters
+JOB_KEYS = ('study', 'GMfact', 'drift', 'TmaxAnalysis', 'record')
+SPEC_KEYS = ('name', 'model', 'structure', 'params', 'sweep', 'records', 'recorders', 'dataDir', 'path') + JOB_KEYS
+
+
+def load_specs(paths):
+    """Specs from JSON or TOML files; a file may hold one spec or a list of them.
+
+    Every spec gets the ``path`` of its file, which its ``records`` are relative to.
+    """
+    specs = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = tomllib.load(f) if path.endswith('.toml') else json.load(f)
+        if isinstance(data, dict) and 'specs' in data:
+            data = data['specs']
+        specs += [dict(spec, path=os.path.abspath(path)) for spec in (data if isinstance(data, list) else [data])]
+    return specs
+
+
+def expand(spec):
+    """The jobs of one spec: every combination of its ``sweep`` values and records."""
+    unknown = set(spec) - set(SPEC_KEYS)
+    if unknown:
+        raise KeyError("unknown spec keys: %s" % ', '.join(sorted(unknown)))
+    model = spec['model']
+    structure = spec.get('structure', 'cantilever')
+    if structure not in models.STRUCTURES:
+        raise ValueError("unknown structure %r" % structure)
+    name = spec.get('name', '%s-%s' % (structure, model))
+    sweep = dict(spec.get('sweep', {}))
+    if 'records' in spec:
+        # relative to the spec file, or to the working directory for a spec built in Python
+        root = os.path.dirname(spec['path']) if 'path' in spec else os.getcwd()
+        sweep['record'] = [os.path.abspath(os.path.join(root, path)) for path in spec['records']]
+
+    cases = []
+    names = list(sweep)
+    for i, values in enumerate(itertools.product(*(sweep[k] for k in names))):
+        params = dict(spec.get('params', {}))
+        options = {k: spec[k] for k in JOB_KEYS if k in spec}
+        for key, value in zip(names, values):
+            (options if key in JOB_KEYS else params)[key] = value
+        models.params(model, structure, **params)  # reject unknown parameters before running anything
+        job = jobs.make_job(model, params, structure=structure, name='%s-%d' % (name, i), **options)
+        if 'recorders' in spec:
+            job['recorders'] = spec['recorders']
+            job['dataDir'] = os.path.join(spec.get('dataDir', 'Data'), job['name'])
+        cases.append(job)
+    return cases
+
+
+def run(jobList, processes=1):
+    """Run the jobs here, or on a WarmPool when ``processes`` is not 1."""
+    if processes == 1:
+        return [jobs.run_job(job) for job in jobList]
+    with workers.WarmPool(processes) as pool:
+        return pool.map(jobList)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('specs', nargs='+', help="JSON or TOML spec files")
+    parser.add_argument('--processes', type=int, default=1, help="worker processes (0: one per CPU)")
+    parser.add_argument('--dry-run', action='store_true', help="list the cases without running them")
+    parser.add_argument('--json', help="also write the result rows to this file")
+    parser.add_argument('--store', help="insert the result rows into this kmscse.resultstore directory")
+    parser.add_argument('--progress', action='store_true', help="show live progress, ETA and stragglers on stderr")
+    args = parser.parse_args(argv)
+
+    jobList = [job for spec in load_specs(args.specs) for job in expand(spec)]
+    if args.dry_run:
+        for job in jobList:
+            print(json.dumps(job))
+        return
+
+    with progress.Monitor(len(jobList)) if args.progress else contextlib.nullcontext():
+        rows = run(jobList, args.processes or None)
+    print("%-24s %-10s %-11s %-9s %10s %10s %12s %4s %8s" % (
+        'case', 'model', 'structure', 'study', 'GMfact', 'drift', 'Mbase', 'ok', 'seconds'))
+    for r in rows:
+        print("%-24s %-10s %-11s %-9s %10.4g %10.3e %12.4g %4d %8.3f" % (
+            r['name'], r['model'], r['structure'], r['study'], r['GMfact'], r['peakDrift'], r['peakMoment'],
+            r['ok'], r['seconds']))
+    print("%d cases, %.2f s of analysis" % (len(rows), sum(r['seconds'] for r in rows)))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=1)
+    if args.store:
+        with resultstore.ResultStore(args.store) as store:
+            store.insert(rows)
+
+
+if __name__ == '__main__':
+    main()
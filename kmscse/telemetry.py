@@ -0,0 +1,116 @@
+"""Per-step profiling and convergence telemetry for the kmscse analysis drivers.
+
+Pass a ``Trace`` as ``trace=`` to ``analysis.pushover`` or
+``analysis.ground_motion`` and every step records its wall time, Newton
+iterations, final test norm, the algorithm that converged and the step size
+into preallocated arrays.
+
+    python -m kmscse.telemetry --model fiber --study dynamic --GMfact 3000 --out trace.json
+"""
+import argparse
+import json
+
+import numpy as np
+
+from kmscse import analysis, models, records
+
+
+class Trace:
+    """Growable column arrays of step telemetry."""
+
+    fields = ('time', 'seconds', 'iterations', 'norm', 'algorithm', 'size', 'ok')
+
+    def __init__(self, capacity=1024):
+        self.n = 0
+        self.algorithms = []  # algorithm names, indexed by the 'algorithm' column
+        self.time = np.zeros(capacity)
+        self.seconds = np.zeros(capacity)
+        self.iterations = np.zeros(capacity, np.int32)
+        self.norm = np.zeros(capacity)
+        self.algorithm = np.zeros(capacity, np.int16)
+        self.size = np.zeros(capacity)
+        self.ok = np.zeros(capacity, np.int8)
+
+    def record(self, time, seconds, iterations, norm, algorithm, size, ok):
+        if self.n == len(self.time):
+            for field in self.fields:
+                column = getattr(self, field)
+                setattr(self, field, np.concatenate([column, np.zeros_like(column)]))
+        if algorithm not in self.algorithms:
+            self.algorithms.append(algorithm)
+        i = self.n
+        self.time[i] = time
+        self.seconds[i] = seconds
+        self.iterations[i] = iterations
+        self.norm[i] = norm
+        self.algorithm[i] = self.algorithms.index(algorithm)
+        self.size[i] = size
+        self.ok[i] = ok
+        self.n += 1
+
+    def arrays(self):
+        """The recorded columns, trimmed to the number of steps."""
+        return {field: getattr(self, field)[:self.n] for field in self.fields}
+
+    def summary(self, slowest=10):
+        """Totals, per-algorithm step counts and the ``slowest`` steps."""
+        a = self.arrays()
+        order = np.argsort(a['seconds'])[::-1][:slowest]
+        return dict(
+            steps=self.n,
+            seconds=float(a['seconds'].sum()),
+            iterations=int(a['iterations'].sum()),
+            failed=int((a['ok'] != 0).sum()),
+            algorithms={name: int((a['algorithm'] == i).sum()) for i, name in enumerate(self.algorithms)},
+            slowest=[dict(step=int(i), time=float(a['time'][i]), seconds=float(a['seconds'][i]),
+                          iterations=int(a['iterations'][i]), norm=float(a['norm'][i]),
+                          algorithm=self.algorithms[a['algorithm'][i]]) for i in order],
+        )
+
+    def save(self, path):
+        """Write the trace as ``.npz`` arrays or, for any other extension, JSON."""
+        if path.endswith('.npz'):
+            np.savez(path, algorithms=np.array(self.algorithms), **self.arrays())
+            return
+        trace = {field: column.tolist() for field, column in self.arrays().items()}
+        with open(path, 'w') as f:
+            json.dump(dict(algorithms=self.algorithms, summary=self.summary(), **trace), f)
+
+
+def print_summary(summary):
+    print("%d steps, %.3f s, %d iterations, %d failed" % (
+        summary['steps'], summary['seconds'], summary['iterations'], summary['failed']))
+    for name, count in summary['algorithms'].items():
+        print("  %-28s %6d steps" % (name, count))
+    print("%6s %10s %10s %5s %11s  %s" % ('step', 'time', 'seconds', 'iter', 'norm', 'algorithm'))
+    for s in summary['slowest']:
+        print("%(step)6d %(time)10.4g %(seconds)10.2e %(iterations)5d %(norm)11.3e  %(algorithm)s" % s)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--model', choices=['aggregator', 'fiber'], default='fiber')
+    parser.add_argument('--study', choices=['pushover', 'dynamic'], default='dynamic')
+    parser.add_argument('--records', nargs='*', help="acceleration file (default: BM68elc.acc)")
+    parser.add_argument('--GMfact', type=float, default=1.0)
+    parser.add_argument('--slowest', type=int, default=10)
+    parser.add_argument('--out', help="write the trace to this .json or .npz file")
+    args = parser.parse_args(argv)
+
+    p = models.params(args.model)
+    models.build_column(args.model, p)
+    analysis.gravity(models.derived(p)['PCol'])
+    trace = Trace()
+    if args.study == 'pushover':
+        analysis.pushover(0.05 * p['LCol'], 0.001 * p['LCol'], p['Weight'], trace=trace)
+    else:
+        name, accel, dt = records.read_records(args.records)[0]
+        analysis.ground_motion(accel, dt, args.GMfact, trace=trace)
+
+    print_summary(trace.summary(args.slowest))
+    if args.out:
+        trace.save(args.out)
+
+
+if __name__ == '__main__':
+    main()
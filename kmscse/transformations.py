@@ -0,0 +1,153 @@
+"""Geometric-transformation cost/accuracy report for the kmscse columns and frames.
+
+Runs the same pushover, ground motion and collapse search with each column
+transformation (``models.TRANSFORMATIONS``: the scripts' Linear, PDelta and
+Corotational) and reports the extra runtime and Newton iterations per run
+against the change in lateral strength, peak drift and collapse intensity
+relative to Linear. The collapse intensity comes from an IDA-style scan of
+BM68elc.acc (or ``--record``): GMfact steps through ``--GMfact``, 2x, 3x ...
+until a run stops converging or its peak drift exceeds ``--collapse-drift``,
+and the first failing interval is bisected to ``--tolerance``. Resurrection
+above that intensity is not looked for. Cases run one after another so the
+timings are not skewed by competing processes.
+
+    python -m kmscse.transformations --model fiber --GMfact 3000
+    python -m kmscse.transformations --model aggregator --structure frame --params stories=4 bays=2 --json transf.json
+"""
+import argparse
+import json
+
+import numpy as np
+
+from kmscse import jobs, models
+
+
+def collapsed(row, collapseDrift):
+    return row['ok'] != 0 or not row['peakDrift'] < collapseDrift
+
+
+def collapse_intensity(job, GMfact, collapseDrift=0.1, tolerance=0.05, maxGMfact=1e6):
+    """(collapse GMfact, runs of the search) of a dynamic job.
+
+    The scale steps through GMfact, 2 GMfact, ... up to ``maxGMfact`` (inf is
+    returned if none collapses); the first collapse and the last scale below
+    it bracket the result, which is bisected to ``tolerance`` of it.
+    """
+    runs = []
+
+    def run(factor):
+        runs.append(jobs.run_job(dict(job, GMfact=factor)))
+        return collapsed(runs[-1], collapseDrift)
+
+    low, high = 0.0, GMfact
+    while not run(high):
+        low, high = high, high + GMfact
+        if high > maxGMfact:
+            return np.inf, runs
+    while high - low > tolerance * high:
+        middle = 0.5 * (low + high)
+        if run(middle):
+            high = middle
+        else:
+            low = middle
+    return high, runs
+
+
+def compare(model, structure='cantilever', params=None, transformations=models.TRANSFORMATIONS, GMfact=1.0,
+            drift=0.05, collapseDrift=0.1, tolerance=0.05, record=None, collapse=True):
+    """Rows of cost and response per (transformation, study); the first transformation is the reference."""
+    rows = []
+    reference = {}
+    for transf in transformations:
+        job = jobs.make_job(model, dict(params or {}, transf=transf), record=record, structure=structure)
+        studies = [('pushover', [jobs.run_job(dict(job, study='pushover', drift=drift))], 'peakShear'),
+                   ('dynamic', [jobs.run_job(dict(job, GMfact=GMfact))], 'peakDrift')]
+        if collapse:
+            intensity, runs = collapse_intensity(job, GMfact, collapseDrift, tolerance)
+            studies.append(('collapse', runs, intensity))
+        for study, runs, measure in studies:
+            value = runs[-1][measure] if isinstance(measure, str) else measure
+            seconds = sum(r['seconds'] for r in runs)
+            iterations = sum(r['iterations'] for r in runs)
+            # the searches take different numbers of runs, so costs are compared per run
+            perRun = dict(value=value, seconds=seconds / len(runs), iterations=iterations / len(runs))
+            base = reference.setdefault(study, perRun)
+            rows.append(dict(
+                transf=transf,
+                study=study,
+                measure=measure if isinstance(measure, str) else 'GMfact',
+                value=float(value),
+                change=float(value / base['value'] - 1.0) if np.isfinite(base['value']) else np.nan,
+                runs=len(runs),
+                seconds=seconds,
+                iterations=iterations,
+                time=perRun['seconds'] / base['seconds'],
+                iterationRatio=perRun['iterations'] / max(base['iterations'], 1),
+            ))
+            if study != 'collapse':
+                # a collapse search fails runs by design, so only the single runs carry a status
+                rows[-1]['ok'] = runs[-1]['ok']
+    return rows
+
+
+def cheapest(rows, accuracy=0.02):
+    """Per study, the transformation of least time per run whose result is within ``accuracy`` of the most exact.
+
+    The last transformation given (Corotational by default) is taken as the
+    most exact; collapse searches take different numbers of runs, so their
+    total seconds are not compared.
+    """
+    choice = {}
+    for study in dict.fromkeys(r['study'] for r in rows):
+        studyRows = [r for r in rows if r['study'] == study]
+        exact = studyRows[-1]['value']
+        good = [r for r in studyRows if r['value'] == exact or abs(r['value'] / exact - 1.0) <= accuracy]
+        choice[study] = min(good, key=lambda r: r['time'])['transf']
+    return choice
+
+
+def _param(text):
+    name, value = text.split('=', 1)
+    try:
+        return name, float(value)
+    except ValueError:
+        return name, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--model', choices=sorted(models.DEFAULTS), default='fiber')
+    parser.add_argument('--structure', choices=models.STRUCTURES, default='cantilever')
+    parser.add_argument('--params', nargs='*', default=[], metavar='NAME=VALUE', help="model parameters")
+    parser.add_argument('--transformations', nargs='+', choices=models.TRANSFORMATIONS,
+                        default=list(models.TRANSFORMATIONS))
+    parser.add_argument('--GMfact', type=float, default=3000.0, help="scale of the record and first collapse GMfact")
+    parser.add_argument('--record')
+    parser.add_argument('--drift', type=float, default=0.05, help="pushover target drift ratio")
+    parser.add_argument('--collapse-drift', type=float, default=0.1, help="peak drift ratio taken as collapse")
+    parser.add_argument('--tolerance', type=float, default=0.05, help="relative bracket of the collapse GMfact")
+    parser.add_argument('--no-collapse', action='store_true', help="skip the collapse search")
+    parser.add_argument('--accuracy', type=float, default=0.02, help="accepted change from the most exact result")
+    parser.add_argument('--json', help="also write the report rows to this file")
+    args = parser.parse_args(argv)
+
+    params = dict(map(_param, args.params))
+    models.params(args.model, args.structure, **params)  # reject unknown parameters before running anything
+    rows = compare(args.model, args.structure, params, args.transformations, args.GMfact, args.drift,
+                   args.collapse_drift, args.tolerance, args.record, not args.no_collapse)
+    print("%-13s %-9s %-10s %12s %9s %5s %9s %7s %10s %7s %3s" % (
+        'transf', 'study', 'measure', 'value', 'change', 'runs', 'seconds', 'run', 'iterations', 'iter', 'ok'))
+    for r in rows:
+        print("%(transf)-13s %(study)-9s %(measure)-10s %(value)12.5g %(change)+8.2f%% %(runs)5d %(seconds)9.3f "
+              "%(time)6.2fx %(iterations)10d %(iterationRatio)6.2fx %(ok)3s" % dict(r, change=100 * r['change'],
+                                                                                ok=r.get('ok', '-')))
+    choice = cheapest(rows, args.accuracy)
+    print("cheapest within %g%% of %s: %s" % (100 * args.accuracy, args.transformations[-1],
+                                               ", ".join("%s %s" % item for item in choice.items())))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(dict(rows=rows, cheapest=choice), f, indent=1, default=float)
+
+
+if __name__ == '__main__':
+    main()
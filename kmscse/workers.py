@@ -0,0 +1,117 @@
+"""Warm worker pool: OpenSees is imported once per worker, not once per run.
+
+Each worker imports openseespy and builds and wipes a throwaway model in the
+pool initializer, then runs any number of jobs (see kmscse.jobs) through a
+wipe/build/analyze cycle. The report compares the one-off worker startup with
+the solve time and with the cost of launching a fresh interpreter per run.
+
+    python -m kmscse.workers --model elastic --jobs 400 --processes 4
+"""
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from kmscse import jobs, recordstore
+
+# seconds from pool creation until this worker was ready, reported with its first job
+_startup = None
+
+
+def _warm_up(createdAt, handle=None):
+    global _startup
+    import openseespy.opensees as ops
+    ops.wipe()
+    ops.model('basic', '-ndm', 2, '-ndf', 3)
+    ops.node(1, 0.0, 0.0)
+    ops.wipe()
+    if handle is not None:
+        recordstore.attach_worker(handle)
+    _startup = time.time() - createdAt
+
+
+def _run(job):
+    global _startup
+    result = jobs.run_job(job)
+    result['worker'] = os.getpid()
+    result['startup'], _startup = _startup, None
+    return result
+
+
+class WarmPool:
+    """A multiprocessing pool whose workers are warmed up before the first job."""
+
+    def __init__(self, processes=None, store=None, startMethod=None):
+        context = multiprocessing.get_context(startMethod)
+        handle = store.handle() if store is not None else None
+        self.pool = context.Pool(processes, _warm_up, (time.time(), handle))
+
+    def map(self, jobList, chunksize=1):
+        return self.pool.map(_run, jobList, chunksize)
+
+    def imap_unordered(self, jobList, chunksize=1):
+        return self.pool.imap_unordered(_run, jobList, chunksize)
+
+    def apply_async(self, job):
+        """Submit one job; ``.get()`` on the returned AsyncResult waits for its result."""
+        return self.pool.apply_async(_run, (job,))
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def cold_start(repeat=3):
+    """Seconds to launch an interpreter that imports openseespy, as a per-run script pays."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import openseespy.opensees'], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def report(results, elapsed, cold):
+    solve = np.array([r['seconds'] for r in results])
+    startup = np.array([r['startup'] for r in results if r['startup'] is not None])
+    print("%d jobs on %d workers in %.3f s (%.1f jobs/s)" % (
+        len(results), len(startup), elapsed, len(results) / elapsed))
+    print("solve    %.3f s total, %.4f s mean per job" % (solve.sum(), solve.mean()))
+    print("startup  %.3f s total, %.4f s mean per worker" % (startup.sum(), startup.mean()))
+    print("cold     %.4f s per interpreter launch, %.3f s for one launch per job" % (cold, cold * len(results)))
+    print("startup is %.1f%% of worker time here, %.1f%% with one interpreter per job" % (
+        100.0 * startup.sum() / (startup.sum() + solve.sum()),
+        100.0 * cold * len(results) / (cold * len(results) + solve.sum())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--model', choices=['elastic', 'aggregator', 'fiber'], default='elastic')
+    parser.add_argument('--study', choices=['pushover', 'dynamic'], default='dynamic')
+    parser.add_argument('--jobs', type=int, default=100)
+    parser.add_argument('--GMfact', type=float, default=1.0)
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--start-method', choices=multiprocessing.get_all_start_methods())
+    args = parser.parse_args(argv)
+
+    jobList = [jobs.make_job(args.model, study=args.study, GMfact=args.GMfact) for _ in range(args.jobs)]
+    start = time.perf_counter()
+    with WarmPool(args.processes, startMethod=args.start_method) as pool:
+        results = pool.map(jobList)
+    elapsed = time.perf_counter() - start
+    report(results, elapsed, cold_start())
+
+
+if __name__ == '__main__':
+    main()
@@ -59,15 +59,31 @@ ops.element('nonlinearBeamColumn', 1, 1, 2, numIntgrPts, ColSecTag, ColTransfTag
 
 # Define RECORDERS -------------------------------------------------------------
 # (Specify the file paths for recorder outputs)
-ops.recorder('Node', '-file', 'Data/DFree.out', '-time', '-node', 2, '-dof', 1, 2, 3, 'disp') # Displacements of free nodes
-ops.recorder('Node', '-file', 'Data/DBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'disp') # Displacements of support nodes
-ops.recorder('Node', '-file', 'Data/RBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'reaction') # Support reaction
+# recordMode: 'all' (every step), 'envelope' (min, max and abs-max, no Drift) or 'every:k' (every k-th step)
+DtAnalysis = 0.01  # analysis time step, set here for 'every:k'
+recordMode = {'DFree': 'all', 'DBase': 'all', 'RBase': 'all', 'FCol': 'all',
+              'ForceColSec': 'all', 'DefoColSec': 'all'}
+
+
+def recorder(kind, mode, *args):
+    """ops.recorder of the given kind ('Node' or 'Element') in a recording mode."""
+    if mode == 'envelope':
+        ops.recorder('Envelope' + kind, *args)
+    elif mode.startswith('every:'):
+        ops.recorder(kind, '-dT', int(mode[len('every:'):]) * DtAnalysis, *args)
+    else:
+        ops.recorder(kind, *args)
+
+
+recorder('Node', recordMode['DFree'], '-file', 'Data/DFree.out', '-time', '-node', 2, '-dof', 1, 2, 3, 'disp') # Displacements of free nodes
+recorder('Node', recordMode['DBase'], '-file', 'Data/DBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'disp') # Displacements of support nodes
+recorder('Node', recordMode['RBase'], '-file', 'Data/RBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'reaction') # Support reaction
 ops.recorder('Drift', '-file', 'Data/Drift.out', '-time', '-iNode', 1, '-jNode', 2, '-dof', 1, '-perpDirn', 2) # Lateral drift
-ops.recorder('Element', '-file', 'Data/FCol.out', '-time', '-ele', 1, 'globalForce') # Element forces -- column
-ops.recorder('Element', '-file', 'Data/ForceColSec1.out', '-time', '-ele', 1, 'section', 1, 'force') # Column section forces, axial and moment, node i
-ops.recorder('Element', '-file', 'Data/DefoColSec1.out', '-time', '-ele', 1, 'section', 1, 'deformation') # Section deformations, axial and curvature, node i
-ops.recorder('Element', '-file', 'Data/ForceColSec' + str(numIntgrPts) + '.out', '-time', '-ele', 1, 'section', numIntgrPts, 'force') # Section forces, axial and moment, node j
-ops.recorder('Element', '-file', 'Data/DefoColSec' + str(numIntgrPts) + '.out', '-time', '-ele', 1, 'section', numIntgrPts, 'deformation') # Section deformations, axial and curvature, node j
+recorder('Element', recordMode['FCol'], '-file', 'Data/FCol.out', '-time', '-ele', 1, 'globalForce') # Element forces -- column
+recorder('Element', recordMode['ForceColSec'], '-file', 'Data/ForceColSec1.out', '-time', '-ele', 1, 'section', 1, 'force') # Column section forces, axial and moment, node i
+recorder('Element', recordMode['DefoColSec'], '-file', 'Data/DefoColSec1.out', '-time', '-ele', 1, 'section', 1, 'deformation') # Section deformations, axial and curvature, node i
+recorder('Element', recordMode['ForceColSec'], '-file', 'Data/ForceColSec' + str(numIntgrPts) + '.out', '-time', '-ele', 1, 'section', numIntgrPts, 'force') # Section forces, axial and moment, node j
+recorder('Element', recordMode['DefoColSec'], '-file', 'Data/DefoColSec' + str(numIntgrPts) + '.out', '-time', '-ele', 1, 'section', numIntgrPts, 'deformation') # Section deformations, axial and curvature, node j
 
 # define GRAVITY -------------------------------------------------------------
 ops.pattern('Plain', 1, 'Linear')
@@ -95,7 +111,7 @@ GMfile = "BM68elc.acc"
 GMfact = 1.0
 
 # set up ground-motion-analysis parameters
-DtAnalysis = 0.01
+# DtAnalysis is set with the recorders
 TmaxAnalysis = 10.0
 
 # DYNAMIC ANALYSIS PARAMETERS
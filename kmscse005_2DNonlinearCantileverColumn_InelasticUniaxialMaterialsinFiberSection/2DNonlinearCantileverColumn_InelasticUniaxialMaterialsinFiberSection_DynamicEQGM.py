@@ -82,16 +82,33 @@ numIntgrPts = 5
 ops.element('nonlinearBeamColumn', 1, 1, 2, numIntgrPts, ColSecTag, ColTransfTag)
 
 # Define RECORDERS (Assuming the directory "Data" exists)
-ops.recorder('Node', '-file', 'Data/DFree.out', '-time', '-node', 2, '-dof', 1, 2, 3, 'disp') # Recorder for displacements of free nodes
-ops.recorder('Node', '-file', 'Data/DBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'disp') # Recorder for displacements of support nodes
-ops.recorder('Node', '-file', 'Data/RBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'reaction') # Recorder for support reaction
+# Recording modes: 'all' keeps every step, 'envelope' the min, max and abs-max (Drift has no envelope),
+# 'every:k' one step in k (-dT); event-triggered windows need kmscse.recording
+DtAnalysis = 0.01  # time step of the analysis below, the unit of 'every:k'
+recordMode = {'DFree': 'all', 'DBase': 'all', 'RBase': 'all', 'FCol': 'all',
+              'ForceColSec': 'all', 'DefoColSec': 'all'}
+
+
+def recorder(kind, mode, *args):
+    """Define a 'Node' or 'Element' recorder in the given recording mode."""
+    if mode == 'envelope':
+        ops.recorder('Envelope' + kind, *args)
+    elif mode.startswith('every:'):
+        ops.recorder(kind, '-dT', int(mode[len('every:'):]) * DtAnalysis, *args)
+    else:
+        ops.recorder(kind, *args)
+
+
+recorder('Node', recordMode['DFree'], '-file', 'Data/DFree.out', '-time', '-node', 2, '-dof', 1, 2, 3, 'disp') # Recorder for displacements of free nodes
+recorder('Node', recordMode['DBase'], '-file', 'Data/DBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'disp') # Recorder for displacements of support nodes
+recorder('Node', recordMode['RBase'], '-file', 'Data/RBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'reaction') # Recorder for support reaction
 ops.recorder('Drift', '-file', 'Data/Drift.out', '-time', '-iNode', 1, '-jNode', 2, '-dof', 1, '-perpDirn', 2) # Recorder for lateral drift
-ops.recorder('Element', '-file', 'Data/FCol.out', '-time', '-ele', 1, 'globalForce') # Recorder for element forces -- column
+recorder('Element', recordMode['FCol'], '-file', 'Data/FCol.out', '-time', '-ele', 1, 'globalForce') # Recorder for element forces -- column
 numIntgrPts = 5  # or whatever the actual number is in your script # Assuming numIntgrPts is a defined variable in your script
 # Recorders for section forces and deformations at different integration points
 for i in range(1, numIntgrPts + 1): 
-    ops.recorder('Element', '-file', f'Data/ForceColSec{i}.out', '-time', '-ele', 1, 'section', i, 'force') # Recorder for section forces at each integration point
-    ops.recorder('Element', '-file', f'Data/DefoColSec{i}.out', '-time', '-ele', 1, 'section', i, 'deformation') # Recorder for section deformations at each integration point
+    recorder('Element', recordMode['ForceColSec'], '-file', f'Data/ForceColSec{i}.out', '-time', '-ele', 1, 'section', i, 'force') # Recorder for section forces at each integration point
+    recorder('Element', recordMode['DefoColSec'], '-file', f'Data/DefoColSec{i}.out', '-time', '-ele', 1, 'section', i, 'deformation') # Recorder for section deformations at each integration point
 
 # define GRAVITY -------------------------------------------------------------
 ops.pattern('Plain', 1, 'Linear')
@@ -119,7 +136,7 @@ GMfile = "BM68elc.acc"
 GMfact = 1.0
 
 # Analysis parameters
-DtAnalysis = 0.01
+# DtAnalysis is set with the recorders
 TmaxAnalysis = 10.0
 
 ops.constraints('Transformation')
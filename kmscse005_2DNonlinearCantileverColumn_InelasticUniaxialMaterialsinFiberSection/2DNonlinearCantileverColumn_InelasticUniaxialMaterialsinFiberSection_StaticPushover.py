@@ -83,17 +83,30 @@ ops.element('nonlinearBeamColumn', 1, 1, 2, numIntgrPts, ColSecTag, ColTransfTag
 
 # Define RECORDERS -------------------------------------------------------------
 # (Assuming the directory "Data" exists)
-ops.recorder('Node', '-file', 'Data/DFree.out', '-time', '-node', 2, '-dof', 1, 2, 3, 'disp') # Displacements of free nodes
-ops.recorder('Node', '-file', 'Data/DBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'disp') # Displacements of support nodes
-ops.recorder('Node', '-file', 'Data/RBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'reaction') # Support reaction
+# Recording modes: 'all' keeps every step, 'envelope' the min, max and abs-max (Drift has no envelope).
+# Static steps have no time step for -dT: record one step in k with kmscse.recording instead
+recordMode = {'DFree': 'all', 'DBase': 'all', 'RBase': 'all', 'FCol': 'all',
+              'ForceColSec': 'all', 'DefoColSec': 'all'}
+
+
+def recorder(kind, mode, *args):
+    """Define a 'Node' or 'Element' recorder, or its Envelope variant."""
+    if mode == 'envelope':
+        kind = 'Envelope' + kind
+    ops.recorder(kind, *args)
+
+
+recorder('Node', recordMode['DFree'], '-file', 'Data/DFree.out', '-time', '-node', 2, '-dof', 1, 2, 3, 'disp') # Displacements of free nodes
+recorder('Node', recordMode['DBase'], '-file', 'Data/DBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'disp') # Displacements of support nodes
+recorder('Node', recordMode['RBase'], '-file', 'Data/RBase.out', '-time', '-node', 1, '-dof', 1, 2, 3, 'reaction') # Support reaction
 ops.recorder('Drift', '-file', 'Data/Drift.out', '-time', '-iNode', 1, '-jNode', 2, '-dof', 1, '-perpDirn', 2) # Lateral drift
-ops.recorder('Element', '-file', 'Data/FCol.out', '-time', '-ele', 2, 'globalForce') # Element forces -- column
-ops.recorder('Element', '-file', 'Data/ForceColSec1.out', '-time', '-ele', 1, 'section', 1, 'force') # Column section forces, axial and moment, node i
-ops.recorder('Element', '-file', 'Data/DefoColSec1.out', '-time', '-ele', 1, 'section', 1, 'deformation') # Section deformations, axial and curvature, node i
+recorder('Element', recordMode['FCol'], '-file', 'Data/FCol.out', '-time', '-ele', 2, 'globalForce') # Element forces -- column
+recorder('Element', recordMode['ForceColSec'], '-file', 'Data/ForceColSec1.out', '-time', '-ele', 1, 'section', 1, 'force') # Column section forces, axial and moment, node i
+recorder('Element', recordMode['DefoColSec'], '-file', 'Data/DefoColSec1.out', '-time', '-ele', 1, 'section', 1, 'deformation') # Section deformations, axial and curvature, node i
 # Assuming 'numIntgrPts' is defined in your script
 numIntgrPts = 5  # Define or replace with the actual number of integration points used in your element
-ops.recorder('Element', '-file', 'Data/ForceColSec' + str(numIntgrPts) + '.out', '-time', '-ele', 1, 'section', numIntgrPts, 'force') # Section forces, axial and moment, node j
-ops.recorder('Element', '-file', 'Data/DefoColSec' + str(numIntgrPts) + '.out', '-time', '-ele', 1, 'section', numIntgrPts, 'deformation') # Section deformations, axial and curvature, node j
+recorder('Element', recordMode['ForceColSec'], '-file', 'Data/ForceColSec' + str(numIntgrPts) + '.out', '-time', '-ele', 1, 'section', numIntgrPts, 'force') # Section forces, axial and moment, node j
+recorder('Element', recordMode['DefoColSec'], '-file', 'Data/DefoColSec' + str(numIntgrPts) + '.out', '-time', '-ele', 1, 'section', numIntgrPts, 'deformation') # Section deformations, axial and curvature, node j
 
 # define GRAVITY -------------------------------------------------------------
 ops.pattern('Plain', 1, 'Linear')
@@ -0,0 +1,39 @@
+import numpy as np
+import openseespy.opensees as ops
+import pytest
+
+from kmscse import analysis, cyclic, models
+
+
+@pytest.fixture
+def column():
+    p = models.params('aggregator')
+    models.build_column('aggregator', p)
+    analysis.gravity(models.derived(p)['PCol'])
+    yield p
+    ops.wipe()
+
+
+def test_protocols():
+    np.testing.assert_allclose(cyclic.reversals([1.0, 2.0]), [1.0, -1.0, 2.0, -2.0, 0.0])
+    targets = cyclic.fema461(4.0)
+    assert len(targets) == 41 and targets.max() == pytest.approx(4.0) and targets[-1] == 0.0
+    assert np.abs(cyclic.atc24(1.0, 5.5)).max() == 5.0
+
+
+def test_empty_protocol(column):
+    with pytest.raises(ValueError, match='no reversal points'):
+        cyclic.run_protocol([], 0.01 * column['LCol'], column['Weight'], verbose=False)
+
+
+def test_protocol_keeps_other_recorders(column, tmp_path):
+    path = tmp_path / 'DFree.out'
+    ops.recorder('Node', '-file', str(path), '-time', '-node', 2, '-dof', 1, 'disp')
+    Dincr = 0.001 * column['LCol']
+    result = cyclic.run_protocol(cyclic.reversals([0.005 * column['LCol']]), Dincr, column['Weight'],
+                                 verbose=False)
+    assert result['ok'] == 0 and result['segments'] == 3
+    assert result['disp'].max() == pytest.approx(0.005 * column['LCol'])
+    ops.analyze(1)
+    ops.wipe()  # closes the caller's recorder, which recorded the protocol and the extra step
+    assert len(np.loadtxt(path)) == len(result['disp']) + 1
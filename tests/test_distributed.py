@@ -0,0 +1,51 @@
+import json
+import socket
+import time
+
+import pytest
+
+from kmscse import distributed, jobs
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_local_workers(tmp_path, capsys):
+    jobList = [jobs.make_job('elastic', GMfact=s, TmaxAnalysis=0.5) for s in (1.0, 2.0)]
+    jobList.append(jobs.make_job('elastic', params={'notAParameter': 1.0}, TmaxAnalysis=0.5))
+    (tmp_path / 'jobs.json').write_text(json.dumps(jobList))
+    out = tmp_path / 'results.json'
+    distributed.main(['coordinator', '--jobs', str(tmp_path / 'jobs.json'), '--port', str(free_port()),
+                      '--local-workers', '2', '--authkey', 'test', '--out', str(out)])
+    assert 'authkey' not in capsys.readouterr().out  # given, so not generated and printed
+
+    rows = json.loads(out.read_text())
+    assert [r['GMfact'] for r in rows] == [1.0, 2.0, 1.0]
+    assert [r['ok'] for r in rows[:2]] == [0, 0]
+    assert rows[1]['peakDrift'] == pytest.approx(2 * rows[0]['peakDrift'])  # elastic
+    assert len({r['worker'] for r in rows}) <= 2
+    assert rows[2]['status'] == 'error' and rows[2]['ok'] == -1
+    assert rows[2]['error'].startswith('KeyError') and 'notAParameter' in rows[2]['error']
+
+
+def test_expired_lease_is_requeued():
+    coordinator = distributed.Coordinator([dict(n=0), dict(n=1)], leaseTimeout=1.0)
+    assert coordinator.get_task('a') == (0, dict(n=0))
+    assert coordinator.get_task('b') == (1, dict(n=1))
+    time.sleep(0.6)
+    coordinator.heartbeat('b')
+    time.sleep(0.6)
+    # a stopped heartbeating, b renewed its lease
+    assert coordinator.get_task('c') == (0, dict(n=0))
+    assert coordinator.get_task('c') is None
+    assert coordinator.progress() == dict(total=2, done=0, pending=0, leased=2, requeued=1)
+
+    # the late result of the first lease still counts once
+    coordinator.put_result('a', 0, dict(ok=0))
+    coordinator.put_result('c', 0, dict(ok=1))
+    coordinator.put_result('b', 1, dict(ok=0))
+    assert coordinator.finished()
+    assert coordinator.results == {0: dict(ok=0, worker='a'), 1: dict(ok=0, worker='b')}
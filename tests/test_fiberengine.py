@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from kmscse import fiberengine, models
+
+
+def test_engine_matches_opensees():
+    p = models.params('fiber')
+    deformations = fiberengine.cyclic_histories(p, nCases=3, nSteps=80, seed=1)
+    assert fiberengine.validate(p, deformations) < 1e-8
+
+
+def test_cases_are_independent():
+    p = models.params('fiber')
+    deformations = fiberengine.cyclic_histories(p, nCases=4, nSteps=40, seed=2)
+    together = fiberengine.FiberSection(p, 4).run(deformations)
+    alone = fiberengine.FiberSection(p, 1).run(deformations[:, 2:3])
+    np.testing.assert_array_equal(together[:, 2:3], alone)
+
+
+def test_failed_reference_step_raises(monkeypatch):
+    p = models.params('fiber')
+    deformations = fiberengine.cyclic_histories(p, nCases=1, nSteps=5, seed=3)[:, 0]
+    analyze = fiberengine.ops.analyze
+    calls = []
+
+    def failing(*args):
+        calls.append(args)
+        return -3 if len(calls) == 3 else analyze(*args)
+
+    monkeypatch.setattr(fiberengine.ops, 'analyze', failing)
+    with pytest.raises(RuntimeError, match='step 3 of 5'):
+        fiberengine.opensees_section_response(p, deformations)
@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+
+from kmscse import fragility
+
+
+def test_ndtr():
+    x = np.linspace(-6.0, 6.0, 241)
+    exact = np.array([0.5 * math.erfc(-v / math.sqrt(2.0)) for v in x])
+    np.testing.assert_allclose(fragility.ndtr(x), exact, rtol=2e-7, atol=1e-15)
+
+
+def synthetic(theta, beta, n, seed):
+    rng = np.random.default_rng(seed)
+    im = np.exp(rng.uniform(np.log(theta) - 3 * beta, np.log(theta) + 3 * beta, n))
+    exceeded = rng.random(n) < fragility.ndtr(np.log(im / theta) / beta)
+    return im, exceeded
+
+
+def test_fit_recovers_parameters():
+    im, exceeded = synthetic(2.0, 0.4, 20000, seed=0)
+    theta, beta = fragility.fit(im, exceeded)
+    assert abs(theta / 2.0 - 1.0) < 0.03
+    assert abs(beta / 0.4 - 1.0) < 0.05
+
+
+def test_fit_is_batched():
+    runs = [synthetic(theta, beta, 500, seed) for seed, (theta, beta) in enumerate([(1.0, 0.3), (3.0, 0.6)])]
+    im, exceeded = np.array([r[0] for r in runs]), np.array([r[1] for r in runs])
+    theta, beta = fragility.fit(im, exceeded)
+    for i in range(2):
+        single = fragility.fit(im[i], exceeded[i])
+        np.testing.assert_allclose((theta[i], beta[i]), single, rtol=1e-6)
+
+
+def test_separated_data_has_no_fit():
+    im = np.array([0.5, 1.0, 2.0, 4.0])
+    theta, beta = fragility.fit(im, im > 1.5)
+    assert np.isnan(theta) and np.isnan(beta)
+
+
+def test_bootstrap_padding_and_bounds():
+    a, b = synthetic(1.5, 0.5, 300, seed=3), synthetic(1.5, 0.5, 200, seed=4)
+    im, exceeded = np.full((2, 300), np.nan), np.zeros((2, 300), bool)
+    im[0], exceeded[0] = a
+    im[1, :200], exceeded[1, :200] = b
+    theta, beta, thetaBoot, betaBoot = fragility.bootstrap(im, exceeded, [300, 200], nBoot=200, seed=0)
+    np.testing.assert_allclose(theta[1], fragility.fit(*b)[0], rtol=1e-6)
+    assert thetaBoot.shape == betaBoot.shape == (2, 200)
+    low, high = fragility.confidence(thetaBoot, 0.9)
+    assert np.all(low < theta) and np.all(theta < high)
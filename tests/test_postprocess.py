@@ -0,0 +1,60 @@
+import numpy as np
+
+from kmscse import postprocess
+
+
+def run(nSteps, sections, seed):
+    rng = np.random.default_rng(seed)
+    disp = np.cumsum(rng.normal(size=nSteps))
+    return dict(
+        DFree=np.column_stack([disp, 0.1 * disp, 0.01 * disp]),
+        RBase=np.column_stack([-100.0 * disp, np.ones(nSteps), -1e4 * disp]),
+        ForceColSec=rng.normal(size=(nSteps, len(sections), 2)),
+        DefoColSec=rng.normal(size=(nSteps, len(sections), 2)),
+        sections=list(sections),
+    )
+
+
+def test_mixed_section_counts():
+    # the kmscse004/005 pushovers record sections 1 and 5, the kmscse005 ground motion 1-5
+    runs = [run(30, (1, 5), 0), run(50, (1, 2, 3, 4, 5), 1)]
+    force, lengths = postprocess.by_section(runs, 'ForceColSec')
+    assert force.shape == (2, 50, 5, 2)
+    np.testing.assert_array_equal(lengths, [30, 50])
+    np.testing.assert_array_equal(force[0, :30, 4], runs[0]['ForceColSec'][:, 1])
+    assert np.isnan(force[0, :, 1:4]).all() and np.isnan(force[0, 30:]).all()
+
+    summary = postprocess.summarize(runs, LCol=100.0, window=10)
+    energy = summary['energy']
+    assert energy.shape == (2, 5)
+    assert np.isnan(energy[0, 1:4]).all() and np.isfinite(energy[0, [0, 4]]).all()
+    assert np.isfinite(energy[1]).all()
+    single = postprocess.summarize(runs[1:], LCol=100.0, window=10)['energy'][0]
+    np.testing.assert_allclose(energy[1], single)
+
+
+def test_hysteretic_energy_of_a_loop():
+    # one closed cycle of an elastic-perfectly-plastic spring dissipates 4 Fy (u - uy)
+    u = np.array([0.0, 1.0, 2.0, 1.0, -1.0, -2.0, -1.0, 1.0, 2.0])
+    F = np.array([0.0, 1.0, 1.0, 0.0, -1.0, -1.0, 0.0, 1.0, 1.0])
+    energy = postprocess.hysteretic_energy(F[None, :, None], u[None, :, None])
+    np.testing.assert_allclose(energy, [4.0 * 1.0 * (2.0 - 1.0) + 0.5])
+
+
+def test_residual_drift_window():
+    drift = np.array([[1.0, 2.0, 3.0, 4.0, 5.0], [7.0, 9.0, np.nan, np.nan, np.nan]])
+    lengths = np.array([5, 2])
+    # the last two steps of the first run; all of the shorter run, its first step counted once
+    np.testing.assert_allclose(postprocess.residual_drift(drift, lengths, window=2), [4.5, 8.0])
+    np.testing.assert_allclose(postprocess.residual_drift(drift, lengths, window=4), [3.5, 8.0])
+
+
+def test_bilinear_reproduces_a_bilinear_curve():
+    d = np.linspace(0.01, 1.0, 100)
+    F = np.minimum(d / 0.2, 1.0 + 0.05 * (d - 0.2))
+    result = postprocess.bilinear(d[None], F[None])
+    np.testing.assert_allclose(result['K'], 5.0)
+    np.testing.assert_allclose(result['Fy'], 1.0)
+    np.testing.assert_allclose(result['Dy'], 0.2)
+    np.testing.assert_allclose(result['b'], 0.01)
+    np.testing.assert_allclose(result['ductility'], 1.0 / 0.2)
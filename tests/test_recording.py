@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from kmscse import jobs, recording
+
+
+def run(mode, study='dynamic'):
+    # 100 steps of the elastic column; its members have no sections, so DFree, DBase, RBase, Drift and FCol
+    histories = {}
+    row = jobs.run_job(jobs.make_job('elastic', study=study, GMfact=100.0, TmaxAnalysis=1.0, drift=0.1,
+                                     recorders={'*': mode}), histories=histories)
+    assert row['ok'] == 0
+    return row, histories
+
+
+@pytest.fixture(scope='module')
+def full():
+    return {study: run('all', study) for study in ('dynamic', 'pushover')}
+
+
+def test_all(full):
+    row, histories = full['dynamic']
+    assert sorted(histories) == ['DBase', 'DFree', 'Drift', 'FCol', 'RBase']
+    for name, values in histories.items():
+        assert len(values) == row['steps'] == 100
+        np.testing.assert_allclose(values[:, 0], 0.01 * np.arange(1, 101))
+    np.testing.assert_allclose(np.abs(histories['DFree'][:, 1]).max() / jobs.models.COLUMN['LCol'],
+                               row['peakDrift'], rtol=1e-12)
+    np.testing.assert_allclose(histories['Drift'][:, 1], histories['DFree'][:, 1] / jobs.models.COLUMN['LCol'],
+                               rtol=1e-12)
+
+
+def test_envelope(full):
+    # Drift has no native envelope and comes from the in-memory Recorder, the rest from EnvelopeNode/Element
+    row, histories = run('envelope')
+    for name, values in full['dynamic'][1].items():
+        envelope = histories[name]
+        assert envelope.shape == (3, 2 * (values.shape[1] - 1))
+        t, x = values[:, :1], values[:, 1:]
+        for i, (kind, pick) in enumerate((('min', x.argmin(0)), ('max', x.argmax(0)),
+                                          ('abs-max', np.abs(x).argmax(0)))):
+            columns = np.arange(x.shape[1])
+            np.testing.assert_array_equal(envelope[i, 0::2], t[pick, 0], err_msg=name + ' ' + kind)
+            expected = np.abs(x[pick, columns]) if kind == 'abs-max' else x[pick, columns]
+            np.testing.assert_array_equal(envelope[i, 1::2], expected, err_msg=name + ' ' + kind)
+
+
+@pytest.mark.parametrize('study', ['dynamic', 'pushover'])
+def test_every(full, study):
+    # natively with -dT in the ground motion; the pushover has no time step and uses the Recorder
+    row, histories = run('every:10', study)
+    assert recording.split({'*': 'every:10'}, 0, None if study == 'pushover' else 0.01)[0] == (
+        [] if study == 'pushover' else ['DFree', 'DBase', 'RBase', 'FCol'])
+    for name, values in full[study][1].items():
+        assert len(histories[name]) == 10
+        np.testing.assert_array_equal(histories[name], values[::10])
+
+
+def test_event(full):
+    # 5 steps either side of the peak drift
+    row, histories = run('event:5')
+    values = full['dynamic'][1]
+    peak = np.abs(values['Drift'][:, 1]).argmax()
+    assert 5 <= peak < 95
+    for name in values:
+        assert len(histories[name]) == 11
+        np.testing.assert_array_equal(histories[name], values[name][peak - 5:peak + 6])
@@ -0,0 +1,58 @@
+import io
+
+import numpy as np
+import pytest
+
+from kmscse import records
+
+VALUES = np.array([1.5e-3, -2.25e-2, 3.0e-1, -4.125, 5.0, 6.0625e-4, -7.0])
+NGA = (b'PEER NGA STRONG MOTION DATABASE RECORD\nIMPERIAL VALLEY 10/15/79, EL CENTRO\n'
+       b'ACCELERATION TIME SERIES IN UNITS OF G\nNPTS=    7, DT=   .0050 SEC\n'
+       b'  .1500000E-02 -.2250000E-01  .3000000E+00 -.4125000E+01\n  .5000000E+01  .6062500E-03 -.7000000E+01\n')
+
+
+def parse(data, **kwargs):
+    return records.parse(io.BytesIO(data), 'test', **kwargs)
+
+
+@pytest.mark.parametrize('chunk', [1, 2, 3, 7, 16, 1 << 16])
+def test_chunks_do_not_split_numbers(chunk):
+    name, accel, dt = parse(NGA, chunk=chunk)
+    np.testing.assert_array_equal(accel, VALUES)
+    assert dt == 0.005
+
+
+def test_old_peer_header():
+    header = b'PEER\nEL CENTRO\nUNITS OF G\n    7   .0050   NPTS, DT\n'
+    data = header + ' '.join(map(repr, VALUES.tolist())).encode() + b'\n'
+    name, accel, dt = parse(data)
+    np.testing.assert_array_equal(accel, VALUES)
+    assert dt == 0.005
+
+
+def test_plain_file_takes_dt():
+    name, accel, dt = parse(b'1.0 2.0\n3.0\n', dt=0.02, chunk=3)
+    np.testing.assert_array_equal(accel, [1.0, 2.0, 3.0])
+    assert dt == 0.02
+
+
+@pytest.mark.parametrize('chunk', [1, 4, 1 << 16])
+def test_fortran_exponents(chunk):
+    name, accel, dt = parse(b'1.0D-03 -2.5d+00\n3.0E-1 4d0\n', chunk=chunk)
+    np.testing.assert_array_equal(accel, [1.0e-3, -2.5, 0.3, 4.0])
+
+
+def test_missing_values():
+    with pytest.raises(ValueError, match='NPTS=7'):
+        parse(NGA.replace(b' -.7000000E+01', b''))
+
+
+def test_text_header_without_npts():
+    with pytest.raises(ValueError, match='no NPTS and DT'):
+        parse(b'SOME HEADER\nMORE TEXT\n1.0 2.0\n')
+
+
+def test_bundled_record():
+    name, accel, dt = records.read_record(records.DEFAULT_RECORD)
+    assert dt == records.DEFAULT_DT
+    assert len(accel) > 100 and np.all(np.isfinite(accel))
@@ -0,0 +1,40 @@
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from kmscse import jobs, recordstore
+from kmscse.recordstore import RecordStore
+
+SUITE = [('a', np.linspace(-1.0, 1.0, 7), 0.01), ('b', np.array([0.5]), 0.005), ('c', np.arange(1000.0), 0.02)]
+
+
+@pytest.mark.parametrize('method', ['fork', 'spawn'])
+def test_records_reach_the_workers(method):
+    with RecordStore(SUITE) as store:
+        assert len(store) == 3
+        context = multiprocessing.get_context(method)
+        with context.Pool(2, recordstore.attach_worker, (store.handle(),)) as pool:
+            loaded = pool.map(jobs.load_record, [2, 0, 1, 0])
+            pool.close()
+            pool.join()
+    for (name, accel, dt), i in zip(loaded, [2, 0, 1, 0]):
+        assert (name, dt) == (SUITE[i][0], SUITE[i][2])
+        np.testing.assert_array_equal(accel, SUITE[i][1])
+    assert not os.path.exists(os.path.join('/dev/shm', store.shm.name.lstrip('/')))
+
+
+def test_worker_detaches():
+    with RecordStore(SUITE) as store:
+        recordstore.attach_worker(store.handle())
+        try:
+            name, accel, dt = recordstore.worker_store.record(0)
+            with pytest.raises(ValueError):
+                accel[0] = 2.0
+        finally:
+            recordstore.detach_worker()
+        assert recordstore.worker_store is None
+        recordstore.detach_worker()  # again, as the exit finalizer would
+        # the parent's block outlives the worker's handle
+        np.testing.assert_array_equal(store.record(2)[1], SUITE[2][1])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from kmscse import regression
+
+
+def history(t, *columns):
+    return np.column_stack([t] + list(columns))
+
+
+def test_channel_error_is_scaled_per_column():
+    t = np.arange(5.0)
+    reference = history(t, np.linspace(0.0, 10.0, 5), np.linspace(0.0, 0.1, 5))
+    new = reference.copy()
+    new[2, 2] += 0.001  # 1% of that column's peak
+    peak, rms = regression.channel_error(new, reference)
+    assert peak == pytest.approx(0.01)
+    assert rms == pytest.approx(0.01 / np.sqrt(5))
+
+
+def test_channel_error_floor():
+    # a column that is zero but for roundoff is measured against the channel's peak
+    t = np.arange(3.0)
+    reference = history(t, [1e3, 2e3, 3e3], [1e-14, -2e-14, 0.0])
+    new = reference.copy()
+    new[:, 2] = [-3e-14, 0.0, 5e-14]
+    peak, rms = regression.channel_error(new, reference)
+    assert peak == pytest.approx(5e-14 / (regression.FLOOR * 3e3))
+    assert peak < 1e-6
+
+
+def test_channel_error_interpolates_other_steps():
+    t = np.linspace(0.0, 1.0, 11)
+    reference = history(t, 2.0 * t)
+    fine = np.linspace(0.0, 1.0, 101)
+    assert regression.channel_error(history(fine, 2.0 * fine), reference) == pytest.approx((0.0, 0.0), abs=1e-15)
+    # a pushover's load factor is not increasing, so other steps cannot be compared
+    assert regression.channel_error(history(t[::-1], t), reference) is None
+    assert regression.channel_error(history(t, t, t), reference) is None
+
+
+def test_compare_fails_missing_and_changed_channels():
+    reference = dict(DFree=history(np.arange(3.0), [1.0, 2.0, 3.0]), Drift=history(np.arange(3.0), [0.1, 0.2, 0.3]))
+    new = dict(DFree=reference['DFree'] * [1.0, 1.1])
+    rows = {r['channel']: r for r in regression.compare(new, reference, dict(regression.TOLERANCES, DFree=0.2))}
+    assert rows['DFree']['passed'] and rows['DFree']['peak'] == pytest.approx(0.1)
+    assert not rows['Drift']['passed'] and rows['Drift']['peak'] == np.inf
+
+
+def test_tolerance_patterns():
+    tolerances = regression._tolerances(['1e-4', 'ForceColSec*=1e-2'])
+    assert regression.tolerance('DFree', tolerances) == 1e-4
+    assert regression.tolerance('ForceColSec3', tolerances) == 1e-2
+
+
+@pytest.mark.parametrize('name', list(regression.CASES))
+def test_case_matches_reference(name):
+    references = regression.load(name)
+    assert references is not None, "no reference for %s, run python -m kmscse.regression --update" % name
+    histories = {}
+    row = regression.run_case(name, histories)
+    assert row['ok'] == 0
+    failed = [r for r in regression.compare(histories, references) if not r['passed']]
+    assert not failed
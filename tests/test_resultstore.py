@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pytest
+
+from kmscse.resultstore import ResultStore
+
+ROWS = [
+    dict(model='fiber', GMfact=1.0, ok=0, peakDrift=0.01, params=dict(fc=-4.0)),
+    dict(model='fiber', GMfact=2.0, ok=0, peakDrift=0.03, params=dict(fc=-6.0)),
+    dict(model='fiber', GMfact=3.0, ok=-3, peakDrift=0.09, params=dict(fc=-6.0)),
+    dict(model='aggregator', GMfact=1.0, ok=0, peakDrift=0.02),
+    dict(model='fiber', GMfact=4.0, status='timeout'),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultStore(str(tmp_path)) as store:
+        yield store
+
+
+def test_query(store):
+    ids = store.insert(ROWS)
+    assert ids == [1, 2, 3, 4, 5] and len(store) == 5
+
+    fiber = store.query(('GMfact', 'peakDrift'), model='fiber')
+    np.testing.assert_array_equal(fiber['id'], [1, 2, 3, 5])
+    np.testing.assert_array_equal(fiber['GMfact'], [1.0, 2.0, 3.0, 4.0])
+
+    assert store.query(status='ok')['id'].tolist() == [1, 2, 4]
+    assert store.query(status='failed')['id'].tolist() == [3]
+    assert store.query(status='timeout')['id'].tolist() == [5]
+
+    # parameter conditions see the model defaults too (fc = -4 for run 1, and for the timeout run)
+    strong = store.query(('fc', 'peakDrift'), model='fiber', status='ok', fc=('<', -5))
+    assert strong['id'].tolist() == [2]
+    np.testing.assert_array_equal(strong['fc'], [-6.0])
+    assert store.query(model='fiber', fc=('=', -4.0))['id'].tolist() == [1, 5]
+    assert store.query(model='fiber', fc=('<', -5), GMfact=('>', 2.5))['id'].tolist() == [3]
+
+    with pytest.raises(ValueError, match='operator'):
+        store.query(fc=('~', -5))
+
+
+def test_history_round_trip(store):
+    history = dict(time=np.linspace(0.0, 1.0, 11), DFree=np.random.default_rng(0).normal(size=(11, 3)))
+    ids = store.insert(ROWS[:2], [history, None])
+
+    loaded = store.history(ids[0])
+    assert sorted(loaded) == ['DFree', 'time']
+    for name in history:
+        np.testing.assert_array_equal(loaded[name], history[name])
+    assert store.history(ids[1]) == {}
+    assert os.listdir(os.path.join(store.root, 'blobs')) == ['%d.npz' % ids[0]]
+
+
+def test_failed_insert_leaves_nothing(store):
+    store.insert(ROWS[:1])
+    with pytest.raises(KeyError):
+        store.insert([ROWS[1], dict(GMfact=1.0)], [dict(time=np.zeros(3)), None])
+    assert len(store) == 1
+    assert os.listdir(os.path.join(store.root, 'blobs')) == []
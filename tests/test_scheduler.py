@@ -0,0 +1,31 @@
+import asyncio
+import time
+
+from kmscse import jobs, scheduler
+
+
+def run(job, poll=0.2, **limits):
+    return asyncio.run(scheduler.run_one(job, asyncio.Semaphore(1), time.perf_counter(), poll=poll, **limits))
+
+
+def test_timeout_kills_a_long_job():
+    # 100000 steps of the fiber column take minutes
+    start = time.perf_counter()
+    row = run(jobs.make_job('fiber', TmaxAnalysis=1000.0), timeout=0.5)
+    assert time.perf_counter() - start < 5.0
+    assert row['status'] == 'timeout' and row['returncode'] < 0
+    assert 'peakDrift' not in row
+    assert row['peakRSS'] > 0.0
+
+
+def test_memory_cap():
+    row = run(jobs.make_job('fiber', TmaxAnalysis=1000.0), timeout=10.0, maxRSS=1.0)
+    assert row['status'] == 'memory' and row['wall'] < 5.0
+
+
+def test_unsampled_memory_is_unknown(capsys):
+    # the job ends before the first sample, so neither its RSS nor the cap is known
+    row = run(jobs.make_job('elastic', TmaxAnalysis=0.1), poll=60.0, maxRSS=1.0)
+    assert row['status'] == 'ok' and row['peakRSS'] is None
+    scheduler.report([row], 1.0)
+    assert capsys.readouterr().out.splitlines()[1].split()[5] == '-'
@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+from kmscse import specs
+
+TOML = """
+[[specs]]
+name = "fiber-fc"
+model = "fiber"
+records = ["motions/a.acc", "../b.acc"]
+[specs.params]
+numBarsCol = 12
+[specs.sweep]
+fc = [-4.0, -5.0]
+GMfact = [1000, 2000]
+
+[[specs]]
+model = "aggregator"
+structure = "portal"
+study = "pushover"
+drift = 0.02
+"""
+
+
+def dry_run(capsys, *paths):
+    specs.main([str(path) for path in paths] + ['--dry-run'])
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_toml_array_with_sweep_and_records(tmp_path, capsys, monkeypatch):
+    (tmp_path / 'specs').mkdir()
+    path = tmp_path / 'specs' / 'study.toml'
+    path.write_text(TOML)
+    monkeypatch.chdir(tmp_path)  # record paths do not depend on the working directory
+    cases = dry_run(capsys, 'specs/study.toml')
+
+    assert [c['name'] for c in cases] == ['fiber-fc-%d' % i for i in range(8)] + ['portal-aggregator-0']
+    fiber, portal = cases[:8], cases[8]
+    # the sweep keys vary in order, the records last
+    a, b = str(tmp_path / 'specs' / 'motions' / 'a.acc'), str(tmp_path / 'b.acc')
+    assert [(c['params']['fc'], c['GMfact'], c['record']) for c in fiber] == [
+        (fc, GMfact, record) for fc in (-4.0, -5.0) for GMfact in (1000, 2000) for record in (a, b)]
+    assert all(c['params']['numBarsCol'] == 12 and c['structure'] == 'cantilever' for c in fiber)
+    assert 'GMfact' not in fiber[0]['params']
+    assert portal == dict(model='aggregator', params={}, study='pushover', record=None, GMfact=1.0,
+                          structure='portal', name='portal-aggregator-0', drift=0.02)
+
+
+def test_json_list_and_recorders(tmp_path, capsys):
+    path = tmp_path / 'study.json'
+    path.write_text(json.dumps([
+        dict(model='elastic', records=['x.acc'], recorders={'*': 'envelope'}, dataDir='out'),
+        dict(name='one', model='elastic', sweep=dict(TmaxAnalysis=[1.0, 2.0])),
+    ]))
+    cases = dry_run(capsys, path)
+    assert [c['name'] for c in cases] == ['cantilever-elastic-0', 'one-0', 'one-1']
+    assert cases[0]['record'] == str(tmp_path / 'x.acc')
+    assert cases[0]['recorders'] == {'*': 'envelope'}
+    assert cases[0]['dataDir'] == os.path.join('out', 'cantilever-elastic-0')
+    assert [c['TmaxAnalysis'] for c in cases[1:]] == [1.0, 2.0]
+
+
+def test_bad_specs():
+    with pytest.raises(KeyError, match='colour'):
+        specs.expand(dict(model='fiber', colour='red'))
+    with pytest.raises(ValueError, match='tower'):
+        specs.expand(dict(model='fiber', structure='tower'))
+    with pytest.raises(KeyError):
+        specs.expand(dict(model='fiber', sweep=dict(notAParameter=[1, 2])))